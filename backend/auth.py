@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import settings
 from models import TokenData, User
@@ -11,8 +11,9 @@ from database import db
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# JWT token scheme
-security = HTTPBearer()
+# JWT token scheme: an Authorization header, or the session cookie set at login
+security = HTTPBearer(auto_error=False)
+SESSION_COOKIE = "session"
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -46,7 +47,9 @@ def verify_token(token: str) -> Optional[TokenData]:
     except JWTError:
         return None
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+async def get_current_user(
+    request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,7 +57,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
+    token = credentials.credentials if credentials else request.cookies.get(SESSION_COOKIE)
+    if not token:
+        raise credentials_exception
     token_data = verify_token(token)
     if token_data is None:
         raise credentials_exception
@@ -80,6 +85,12 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
         return None
     return User(**user)
 
+def set_session_cookie(response, token: str):
+    """Keep the JWT in an HTTP-only cookie so the pages' own fetch calls are authenticated"""
+    response.set_cookie(
+        SESSION_COOKIE, token, max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60, httponly=True, samesite="lax"
+    )
+
 def create_user_token(user: User) -> str:
     """Create a token for a user"""
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,50 +1,169 @@
+import asyncio
 import json
 import hashlib
-from typing import Any, Optional, Callable
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from database import cache
 import httpx
 from config import settings
 
+# Cache statuses reported to clients (X-Cache header)
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
 class CacheService:
     def __init__(self):
         self.cache = cache
         self.default_expire = 3600  # 1 hour
+        self.soft_ttl = settings.CACHE_SOFT_TTL
+        self.hard_ttl = settings.CACHE_HARD_TTL
+        self.refreshing: Dict[Tuple[str, ...], asyncio.Task] = {}
+        self.counts = Counter()
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate a cache key from prefix and arguments"""
         key_data = f"{prefix}:{str(args)}:{str(sorted(kwargs.items()))}"
         return hashlib.md5(key_data.encode()).hexdigest()
     
-    async def get_github_profile(self, username: str) -> Optional[dict]:
-        """Get cached GitHub profile"""
-        key = self._generate_key("github_profile", username)
-        return await self.cache.get(key)
+    # ---------- stale-while-revalidate entries ----------
     
-    async def set_github_profile(self, username: str, profile: dict, expire: int = None) -> bool:
-        """Cache GitHub profile"""
-        key = self._generate_key("github_profile", username)
-        return await self.cache.set(key, profile, expire or self.default_expire)
+    async def get_entry(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Get a timestamped entry as (value, age in seconds); (None, None) when missing"""
+        entry = await self.cache.get(key)
+        if entry is None:
+            return None, None
+        if not isinstance(entry, dict) or "stored_at" not in entry:
+            # Written without a timestamp: usable, but due for a refresh
+            return entry, float("inf")
+        return entry["value"], time.time() - entry["stored_at"]
     
-    async def get_github_repos(self, username: str) -> Optional[list]:
-        """Get cached GitHub repositories"""
-        key = self._generate_key("github_repos", username)
-        return await self.cache.get(key)
+    async def set_entry(self, key: str, value: Any, expire: int = None) -> bool:
+        """Store a value with its write time; it is dropped after `expire` (the hard TTL)"""
+        return await self.cache.set(key, {"value": value, "stored_at": time.time()}, expire or self.hard_ttl)
+    
+    async def read_through_many(
+        self,
+        keys: List[str],
+        loader: Callable[[], Awaitable[List[Any]]],
+        soft_ttl: int = None,
+        hard_ttl: int = None,
+        refresh_loader: Callable[[], Awaitable[List[Any]]] = None,
+    ) -> Tuple[List[Any], str]:
+        """
+        Read entries that are loaded together (one value per key) with stale-while-revalidate:
+        - all younger than the soft TTL: served as is ("fresh");
+        - any older: served as is while `loader` refreshes them in the background ("stale");
+        - any missing (past the hard TTL): `loader` runs before returning ("miss").
+        `refresh_loader` (default: `loader`) is used for background refreshes; it runs in its own task.
+        """
+        soft_ttl = soft_ttl or self.soft_ttl
+        entries = [await self.get_entry(key) for key in keys]
+        values = [value for value, _ in entries]
+
+        if any(age is None for _, age in entries):
+            values = await loader()
+            for key, value in zip(keys, values):
+                await self.set_entry(key, value, hard_ttl)
+            self.counts[MISS] += 1
+            return values, MISS
+
+        if any(age >= soft_ttl for _, age in entries):
+            self.refresh(keys, refresh_loader or loader, hard_ttl)
+            self.counts[STALE] += 1
+            return values, STALE
+
+        self.counts[FRESH] += 1
+        return values, FRESH
+    
+    async def read_through(self, key: str, loader: Callable[[], Awaitable[Any]], soft_ttl: int = None, hard_ttl: int = None) -> Tuple[Any, str]:
+        """Single-key `read_through_many`"""
+        async def load_one():
+            return [await loader()]
+        values, status = await self.read_through_many([key], load_one, soft_ttl, hard_ttl)
+        return values[0], status
+    
+    def refresh(self, keys: List[str], loader: Callable[[], Awaitable[List[Any]]], hard_ttl: int = None):
+        """Reload entries in the background; at most one refresh per key set at a time"""
+        task_key = tuple(keys)
+        if task_key in self.refreshing:
+            return
+
+        async def run():
+            try:
+                values = await loader()
+                for key, value in zip(keys, values):
+                    await self.set_entry(key, value, hard_ttl)
+                self.counts["refreshed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counts["refresh_errors"] += 1
+                print(f"Error refreshing cache entry: {e}")
+            finally:
+                self.refreshing.pop(task_key, None)
+
+        self.refreshing[task_key] = asyncio.create_task(run())
+    
+    async def shutdown(self):
+        """Cancel background refreshes still in flight (called from the app lifespan)"""
+        tasks = list(self.refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def stats(self) -> dict:
+        return {"refreshing": len(self.refreshing), **self.counts}
+    
+    # ---------- GitHub data ----------
+    
+    # Keyed by token scope as well: a token can see private fields and repositories,
+    # and a hit must never hand them (or skip the auth check) to another token
+    def github_profile_key(self, username: str, scope: str) -> str:
+        return self._generate_key("github_profile", username, scope)
+    
+    def github_repos_key(self, username: str, scope: str) -> str:
+        return self._generate_key("github_repos", username, scope)
+    
+    async def get_github_profile(self, username: str, scope: str) -> Optional[dict]:
+        """Get cached GitHub profile as seen by a token scope"""
+        value, _ = await self.get_entry(self.github_profile_key(username, scope))
+        return value
+    
+    async def set_github_profile(self, username: str, scope: str, profile: dict, expire: int = None) -> bool:
+        """Cache GitHub profile as seen by a token scope"""
+        return await self.set_entry(self.github_profile_key(username, scope), profile, expire)
     
-    async def set_github_repos(self, username: str, repos: list, expire: int = None) -> bool:
-        """Cache GitHub repositories"""
-        key = self._generate_key("github_repos", username)
-        return await self.cache.set(key, repos, expire or self.default_expire)
+    async def get_github_repos(self, username: str, scope: str) -> Optional[list]:
+        """Get cached GitHub repositories as seen by a token scope"""
+        value, _ = await self.get_entry(self.github_repos_key(username, scope))
+        return value
     
-    async def get_repository_readme(self, username: str, repo_name: str) -> Optional[str]:
-        """Get cached repository README"""
-        key = self._generate_key("readme", username, repo_name)
+    async def set_github_repos(self, username: str, scope: str, repos: list, expire: int = None) -> bool:
+        """Cache GitHub repositories as seen by a token scope"""
+        return await self.set_entry(self.github_repos_key(username, scope), repos, expire)
+    
+    async def get_repository_readme(self, username: str, repo_name: str, version: str = "") -> Optional[str]:
+        """Get cached repository README (optionally for a specific version, e.g. token scope and pushed_at)"""
+        key = self._generate_key("readme", username, repo_name, version)
         return await self.cache.get(key)
     
-    async def set_repository_readme(self, username: str, repo_name: str, content: str, expire: int = None) -> bool:
+    async def set_repository_readme(self, username: str, repo_name: str, content: str, version: str = "", expire: int = None) -> bool:
         """Cache repository README"""
-        key = self._generate_key("readme", username, repo_name)
+        key = self._generate_key("readme", username, repo_name, version)
         return await self.cache.set(key, content, expire or self.default_expire)
     
+    async def get_repository_languages(self, username: str, repo_name: str, version: str) -> Optional[dict]:
+        """Get cached repository language breakdown for a given version (token scope and push)"""
+        key = self._generate_key("languages", username, repo_name, version)
+        return await self.cache.get(key)
+    
+    async def set_repository_languages(self, username: str, repo_name: str, version: str, languages: dict, expire: int = None) -> bool:
+        """Cache repository language breakdown for a given version (token scope and push)"""
+        key = self._generate_key("languages", username, repo_name, version)
+        return await self.cache.set(key, languages, expire or self.default_expire)
+    
     async def get_ai_skills_analysis(self, content_hash: str) -> Optional[dict]:
         """Get cached AI skills analysis"""
         key = self._generate_key("ai_skills", content_hash)
@@ -55,6 +174,46 @@ class CacheService:
         key = self._generate_key("ai_skills", content_hash)
         return await self.cache.set(key, analysis, expire or self.default_expire)
     
+    async def get_ai_skills_analyses(self, content_hashes: List[str]) -> Dict[str, Any]:
+        """Get cached AI skills analyses for many content hashes in one round trip (hits only)"""
+        if not content_hashes:
+            return {}
+        keys = [self._generate_key("ai_skills", content_hash) for content_hash in content_hashes]
+        try:
+            values = self.cache.redis.mget(keys)
+        except Exception as e:
+            print(f"Error getting from cache: {e}")
+            return {}
+        return {
+            content_hash: json.loads(value)
+            for content_hash, value in zip(content_hashes, values) if value
+        }
+    
+    async def set_ai_skills_analyses(self, analyses: Dict[str, Any], expire: int = None) -> bool:
+        """Cache AI skills analyses keyed by content hash in one pipelined round trip"""
+        if not analyses:
+            return True
+        try:
+            pipe = self.cache.redis.pipeline()
+            for content_hash, analysis in analyses.items():
+                key = self._generate_key("ai_skills", content_hash)
+                pipe.setex(key, expire or self.default_expire, json.dumps(analysis, default=str))
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Error setting cache: {e}")
+            return False
+    
+    async def get_fused_analysis(self, analysis_id: str) -> Optional[dict]:
+        """Get a cached fused analysis (skills, jobs and suggestions of one completion)"""
+        key = self._generate_key("ai_fused", analysis_id)
+        return await self.cache.get(key)
+    
+    async def set_fused_analysis(self, analysis_id: str, analysis: dict, expire: int = None) -> bool:
+        """Cache a fused analysis"""
+        key = self._generate_key("ai_fused", analysis_id)
+        return await self.cache.set(key, analysis, expire or self.default_expire)
+    
     async def get_ai_job_matches(self, skills_hash: str) -> Optional[list]:
         """Get cached AI job matches"""
         key = self._generate_key("ai_jobs", skills_hash)
@@ -65,12 +224,12 @@ class CacheService:
         key = self._generate_key("ai_jobs", skills_hash)
         return await self.cache.set(key, jobs, expire or self.default_expire)
     
-    async def get_ai_skill_suggestions(self, skills_hash: str) -> Optional[list]:
+    async def get_ai_skill_suggestions(self, skills_hash: str) -> Optional[dict]:
         """Get cached AI skill suggestions"""
         key = self._generate_key("ai_suggestions", skills_hash)
         return await self.cache.get(key)
     
-    async def set_ai_skill_suggestions(self, skills_hash: str, suggestions: list, expire: int = None) -> bool:
+    async def set_ai_skill_suggestions(self, skills_hash: str, suggestions: dict, expire: int = None) -> bool:
         """Cache AI skill suggestions"""
         key = self._generate_key("ai_suggestions", skills_hash)
         return await self.cache.set(key, suggestions, expire or self.default_expire)
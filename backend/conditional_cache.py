@@ -0,0 +1,162 @@
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import httpx
+from config import settings
+
+# Headers refreshed from a 304 response; everything else comes from the stored 200
+REFRESHED_HEADERS = ("etag", "last-modified", "date", "x-ratelimit-limit", "x-ratelimit-remaining",
+                     "x-ratelimit-reset", "x-ratelimit-used", "x-ratelimit-resource")
+DROPPED_HEADERS = ("transfer-encoding", "connection", "keep-alive")
+
+
+class CachedResponse:
+    def __init__(self, status_code: int, headers: list, body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        header_map = httpx.Headers(headers)
+        self.etag = header_map.get("etag")
+        self.last_modified = header_map.get("last-modified")
+
+
+class ConditionalRequestCache:
+    """
+    In-process LRU store of GitHub response bodies and their validators.
+
+    Entries are keyed by URL, Accept header and a hash of the Authorization
+    header, so responses are never shared between tokens. Least recently used
+    entries are evicted once either the entry count or the total of stored
+    body bytes is over its limit.
+    """
+
+    def __init__(self, max_entries: int = None, max_entry_bytes: int = None, max_bytes: int = None):
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.max_entries = max_entries or settings.GITHUB_CONDITIONAL_CACHE_MAX_ENTRIES
+        self.max_entry_bytes = max_entry_bytes or settings.GITHUB_CONDITIONAL_CACHE_MAX_ENTRY_BYTES
+        self.max_bytes = max_bytes or settings.GITHUB_CONDITIONAL_CACHE_MAX_BYTES
+        self.bytes = 0  # body bytes currently stored
+        self.hits = 0  # stored validator sent with the request
+        self.not_modified = 0  # GitHub answered 304 and the stored body was served
+        self.misses = 0  # nothing stored, unconditional request
+        self.stored = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(request: httpx.Request) -> str:
+        auth = hashlib.sha256(request.headers.get("authorization", "").encode()).hexdigest()[:16]
+        return f"{request.url}|{request.headers.get('accept', '')}|{auth}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key: str, entry: CachedResponse):
+        if len(entry.body) > min(self.max_entry_bytes, self.max_bytes):
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous.body)
+        self.entries[key] = entry
+        self.bytes += len(entry.body)
+        self.stored += 1
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted.body)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evictions": self.evictions,
+        }
+
+
+class RecordingStream(httpx.AsyncByteStream):
+    """Passes a response body through unchanged and keeps a copy for the cache"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, max_bytes: int, on_complete: Callable[[bytes], None]):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.on_complete = on_complete
+        self.chunks = []
+        self.size = 0
+        self.complete = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            if self.chunks is not None:
+                self.size += len(chunk)
+                if self.size > self.max_bytes:
+                    self.chunks = None  # too large to keep, keep streaming
+                else:
+                    self.chunks.append(chunk)
+            yield chunk
+        self.complete = True
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+        # Only a fully read body is safe to replay
+        if self.complete and self.chunks is not None:
+            self.on_complete(b"".join(self.chunks))
+            self.chunks = None
+
+
+class ConditionalCacheTransport(httpx.AsyncBaseTransport):
+    """
+    Sends If-None-Match / If-Modified-Since for GET requests with a stored
+    validator and replays the stored body when GitHub answers 304.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ConditionalRequestCache):
+        self.transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or "if-none-match" in request.headers or "if-modified-since" in request.headers:
+            return await self.transport.handle_async_request(request)
+
+        key = self.cache.key_for(request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.hits += 1
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+        else:
+            self.cache.misses += 1
+
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.not_modified += 1
+            headers = httpx.Headers(entry.headers)
+            for name in REFRESHED_HEADERS:
+                if name in response.headers:
+                    headers[name] = response.headers[name]
+            return httpx.Response(entry.status_code, headers=headers, content=entry.body, request=request)
+
+        if response.status_code == 200 and ("etag" in response.headers or "last-modified" in response.headers):
+            headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in DROPPED_HEADERS]
+            response.stream = RecordingStream(
+                response.stream,
+                self.cache.max_entry_bytes,
+                lambda body: self.cache.store(key, CachedResponse(200, headers, body)),
+            )
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# Global instance shared by every GitHub API call
+github_conditional_cache = ConditionalRequestCache()
@@ -7,6 +7,31 @@ class Settings:
     # API Keys
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
     
+    # LLM (OpenRouter) Client Settings
+    OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+    LLM_MODEL = os.getenv("LLM_MODEL", "meta-llama/llama-3-8b-instruct")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # per attempt
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+    LLM_REQUEST_BUDGET = float(os.getenv("LLM_REQUEST_BUDGET", "90"))  # all AI calls of one page request
+    LLM_SINGLEFLIGHT_ENABLED = os.getenv("LLM_SINGLEFLIGHT_ENABLED", "true").lower() == "true"  # share identical in-flight calls
+    LLM_SINGLEFLIGHT_RESULT_TTL = int(os.getenv("LLM_SINGLEFLIGHT_RESULT_TTL", "30"))  # seconds other workers can pick up a result
+    
+    # Skill Extraction Settings (map-reduce over README chunks)
+    SKILL_CHUNK_TOKENS = int(os.getenv("SKILL_CHUNK_TOKENS", "3000"))  # prompt size per call, estimated locally
+    SKILL_EXTRACTION_CONCURRENCY = int(os.getenv("SKILL_EXTRACTION_CONCURRENCY", "4"))
+    SKILL_CACHE_TTL = int(os.getenv("SKILL_CACHE_TTL", "2592000"))  # per-README skills, keyed by content hash
+    SKILL_EXTRACTION_MODE = os.getenv("SKILL_EXTRACTION_MODE", "hybrid")  # local | hybrid | llm
+    README_PREPROCESS_RULES = os.getenv("README_PREPROCESS_RULES", "all")  # comma list of readme_preprocessing rules, or "none"
+    README_CODE_BLOCK_LINES = int(os.getenv("README_CODE_BLOCK_LINES", "15"))  # longer fenced code is cut to its first lines
+    FUSED_ANALYSIS_MAX_TOKENS = int(os.getenv("FUSED_ANALYSIS_MAX_TOKENS", "6000"))  # README budget of the single-call analysis
+    FUSED_ANALYSIS_TTL = int(os.getenv("FUSED_ANALYSIS_TTL", "86400"))
+    ANALYZE_SUGGESTIONS_TIMEOUT = float(os.getenv("ANALYZE_SUGGESTIONS_TIMEOUT", "60"))  # /analyze-skills branches, including YouTube lookups
+    ANALYZE_JOBS_TIMEOUT = float(os.getenv("ANALYZE_JOBS_TIMEOUT", "45"))
+    SKILL_SET_CACHE_TTL = int(os.getenv("SKILL_SET_CACHE_TTL", "86400"))  # job matches/suggestions per canonical skill set
+    SKILL_SET_CACHE_BUCKETS = os.getenv("SKILL_SET_CACHE_BUCKETS", "false").lower() == "true"  # key on taxonomy skills by category only
+    
     # JWT Settings
     SECRET_KEY = os.getenv("sukesh-is-a-creator")
     ALGORITHM = "HS256"
@@ -19,6 +44,44 @@ class Settings:
     # Redis Settings
     REDIS_URL = os.getenv("REDIS_URL", "")
     
+    # Cache Settings (stale-while-revalidate for GitHub data)
+    CACHE_SOFT_TTL = int(os.getenv("CACHE_SOFT_TTL", "300"))  # older entries are served and refreshed in the background
+    CACHE_HARD_TTL = int(os.getenv("CACHE_HARD_TTL", "86400"))  # older entries are refetched before responding
+    
+    # HTTP Client Pool Settings
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "False").lower() == "true"
+    
+    # GitHub API Settings
+    GITHUB_BACKEND = os.getenv("GITHUB_BACKEND", "rest").lower()  # "rest" or "graphql"
+    GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+    GITHUB_GRAPHQL_MAX_README_ALIASES = int(os.getenv("GITHUB_GRAPHQL_MAX_README_ALIASES", "100"))
+    GITHUB_README_CONCURRENCY = int(os.getenv("GITHUB_README_CONCURRENCY", "8"))
+    GITHUB_README_MAX_BYTES = int(os.getenv("GITHUB_README_MAX_BYTES", "262144"))
+    GITHUB_README_CACHE_TTL = int(os.getenv("GITHUB_README_CACHE_TTL", "1800"))
+    GITHUB_LANGUAGES_CONCURRENCY = int(os.getenv("GITHUB_LANGUAGES_CONCURRENCY", "8"))
+    # Language breakdowns are keyed by pushed_at, so they only change when the repo does
+    GITHUB_LANGUAGES_CACHE_TTL = int(os.getenv("GITHUB_LANGUAGES_CACHE_TTL", "604800"))
+    GITHUB_CONDITIONAL_CACHE_ENABLED = os.getenv("GITHUB_CONDITIONAL_CACHE_ENABLED", "True").lower() == "true"
+    GITHUB_CONDITIONAL_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CONDITIONAL_CACHE_MAX_ENTRIES", "2000"))
+    GITHUB_CONDITIONAL_CACHE_MAX_ENTRY_BYTES = int(os.getenv("GITHUB_CONDITIONAL_CACHE_MAX_ENTRY_BYTES", "1000000"))
+    GITHUB_CONDITIONAL_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CONDITIONAL_CACHE_MAX_BYTES", "67108864"))  # all stored bodies, per worker
+    
+    # GitHub Rate-Limit Scheduler Settings
+    GITHUB_RATE_LIMIT_MAX_CONCURRENCY = int(os.getenv("GITHUB_RATE_LIMIT_MAX_CONCURRENCY", "8"))  # per token
+    GITHUB_RATE_LIMIT_BACKGROUND_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_BACKGROUND_RESERVE", "100"))
+    GITHUB_RATE_LIMIT_PACING_THRESHOLD = float(os.getenv("GITHUB_RATE_LIMIT_PACING_THRESHOLD", "0.1"))
+    GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "30"))
+    GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT", "900"))
+    GITHUB_RATE_LIMIT_MAX_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_MAX_RETRIES", "2"))
+    
+    # GitHub Prewarm Settings (background fetch after OAuth login)
+    GITHUB_PREWARM_ENABLED = os.getenv("GITHUB_PREWARM_ENABLED", "True").lower() == "true"
+    GITHUB_PREWARM_README_COUNT = int(os.getenv("GITHUB_PREWARM_README_COUNT", "10"))
+    
     # GitHub OAuth Settings
     GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID", "")
     GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET", "")
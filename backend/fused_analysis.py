@@ -0,0 +1,264 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+from pydantic import ValidationError
+from config import settings
+from models import JobMatch, SkillSuggestion
+from llm_client import llm_client
+from llm_metrics import llm_metrics
+from cache_service import cache_service
+from readme_preprocessing import readme_preprocessor
+from skill_extraction import chunk_text, estimate_tokens, parse_skill_list, reduce_skills
+from skill_taxonomy import local_skill_extractor
+
+# Bump when the prompt or schema changes so stored analyses are not reused
+FUSED_ANALYSIS_VERSION = "fused-v1"
+
+# What the model must return: one object feeding the skills, jobs and suggestions pages
+FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "jobs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "company": {"type": "string"},
+                    "matched_skills": {"type": "array", "items": {"type": "string"}},
+                    "experience_level": {"type": "string", "enum": ["junior", "mid", "senior", "lead"]},
+                    "remote": {"type": "boolean"},
+                },
+                "required": ["title", "description", "company", "matched_skills", "experience_level", "remote"],
+                "additionalProperties": False,
+            },
+        },
+        "suggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "skill_name": {"type": "string"},
+                    "reason": {"type": "string"},
+                    "search": {"type": "string"},
+                    "difficulty": {"type": "string", "enum": ["beginner", "intermediate", "advanced"]},
+                    "estimated_time": {"type": "string"},
+                },
+                "required": ["skill_name", "reason", "search", "difficulty", "estimated_time"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["skills", "jobs", "suggestions"],
+    "additionalProperties": False,
+}
+
+
+class FusedAnalysis:
+    """Skills, job matches and skill suggestions from one completion"""
+
+    def __init__(
+        self,
+        analysis_id: str,
+        skills: List[str],
+        jobs: List[JobMatch],
+        suggestions: List[SkillSuggestion],
+        raw: str,
+        cached: bool = False,
+    ):
+        self.analysis_id = analysis_id
+        self.skills = skills
+        self.jobs = jobs
+        self.suggestions = suggestions
+        self.raw = raw
+        self.cached = cached
+
+    def to_dict(self) -> dict:
+        return {
+            "skills": self.skills,
+            "jobs": [job.dict() for job in self.jobs],
+            "suggestions": [suggestion.dict() for suggestion in self.suggestions],
+            "raw": self.raw,
+        }
+
+    @classmethod
+    def from_dict(cls, analysis_id: str, data: dict) -> "FusedAnalysis":
+        return cls(
+            analysis_id,
+            data.get("skills") or [],
+            [JobMatch(**job) for job in data.get("jobs") or []],
+            [SkillSuggestion(**suggestion) for suggestion in data.get("suggestions") or []],
+            data.get("raw") or "",
+            cached=True,
+        )
+
+
+def parse_fused_response(content: str) -> dict:
+    """The JSON object of a fused completion, tolerating code fences and text around it"""
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):] if "{" in text else text
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise ValueError("no JSON object in the response")
+        return json.loads(text[start:end + 1])
+
+
+def validate_jobs(items) -> List[JobMatch]:
+    """Job entries that fit the JobMatch model; the rest are dropped"""
+    jobs = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        if "matched_skills" not in item and "skills" in item:
+            item["matched_skills"] = item["skills"]
+        try:
+            job = JobMatch(**item)
+        except ValidationError as e:
+            print(f"⚠️ Dropping invalid job match: {e.errors()[:1]}")
+            continue
+        job.matched_skills = local_skill_extractor.normalize(job.matched_skills)
+        jobs.append(job)
+    return jobs
+
+
+def validate_suggestions(items) -> List[SkillSuggestion]:
+    """Suggestions that fit the SkillSuggestion model; the YouTube search becomes their learning resource"""
+    suggestions = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        search = str(item.pop("search", "") or item.get("skill_name", ""))
+        item.setdefault("learning_resources", [{"title": search, "url": ""}] if search else [])
+        try:
+            suggestions.append(SkillSuggestion(**item))
+        except ValidationError as e:
+            print(f"⚠️ Dropping invalid skill suggestion: {e.errors()[:1]}")
+    return suggestions
+
+
+class FusedAnalyzer:
+    """
+    Full analysis in a single completion: one JSON-schema-constrained answer
+    carries the skills, four job matches and 3-5 skill suggestions, instead of
+    three calls that each re-send the skill list.
+
+    READMEs are preprocessed and, when together they exceed
+    FUSED_ANALYSIS_MAX_TOKENS, each is cut to an equal share. Results are
+    stored under a hash of the prompt, so the suggestions and job pages (and
+    identical re-runs) read them without another call.
+    """
+
+    def __init__(self):
+        self.max_tokens = settings.FUSED_ANALYSIS_MAX_TOKENS
+        self.ttl = settings.FUSED_ANALYSIS_TTL
+
+    def prompt_readmes(self, readmes: Dict[str, str]) -> Dict[str, str]:
+        """Preprocessed READMEs, each cut to its share of the token budget when they do not all fit"""
+        prepared = {repo: text for repo, text in readme_preprocessor.preprocess_many(readmes).items() if text.strip()}
+        if sum(estimate_tokens(text) for text in prepared.values()) <= self.max_tokens:
+            return prepared
+        share = max(200, self.max_tokens // max(1, len(prepared)))
+        return {repo: chunk_text(text, share)[0] for repo, text in prepared.items()}
+
+    @staticmethod
+    def messages_for(readmes: Dict[str, str], context: str = "", known: Optional[List[str]] = None) -> List[dict]:
+        sections = "\n\n".join(f"### Repository {repo}\n{text}" for repo, text in readmes.items())
+        hint = f"Already detected in these READMEs: {', '.join(known)}." if known else ""
+        return [
+            {
+                "role": "system",
+                "content": "You are a career advisor and backend development mentor who analyses developers' GitHub READMEs.",
+            },
+            {
+                "role": "user",
+                "content": f"""
+                Analyse the README files below and answer with ONE JSON object, nothing else:
+
+                - "skills": the technical skills (languages, frameworks, tools, libraries) the READMEs show.
+                - "jobs": 4 job roles that fit these skills, each with "title", a short "description",
+                  3–5 "matched_skills" taken from "skills", a "company" that typically hires for it,
+                  "experience_level" (junior, mid, senior or lead) and "remote" (true/false).
+                - "suggestions": 3–5 missing backend development skills, each with "skill_name", a one-sentence
+                  "reason", a searchable YouTube title as "search" (not a link), "difficulty"
+                  (beginner, intermediate or advanced) and "estimated_time" (e.g. "2 weeks").
+
+                {context}
+                {hint}
+
+                {sections}
+                """,
+            },
+        ]
+
+    @staticmethod
+    def analysis_id_for(messages: List[dict]) -> str:
+        data = json.dumps({"version": FUSED_ANALYSIS_VERSION, "model": llm_client.model, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+    async def load(self, analysis_id: Optional[str]) -> Optional[FusedAnalysis]:
+        """A stored analysis (None when unknown or expired)"""
+        if not analysis_id:
+            return None
+        data = await cache_service.get_fused_analysis(analysis_id)
+        if not data:
+            return None
+        try:
+            return FusedAnalysis.from_dict(analysis_id, data)
+        except (ValidationError, TypeError) as e:
+            print(f"⚠️ Ignoring unreadable stored analysis {analysis_id}: {e}")
+            return None
+
+    async def analyze(self, readmes: Dict[str, str], context: str = "") -> FusedAnalysis:
+        """Run (or reuse) the fused analysis; raises LLMError, or ValueError when the answer is unusable"""
+        prompt_readmes = self.prompt_readmes(readmes)
+        known = reduce_skills([local_skill_extractor.extract(text) for text in readmes.values()])
+        messages = self.messages_for(prompt_readmes, context, known)
+        analysis_id = self.analysis_id_for(messages)
+
+        stored = await self.load(analysis_id)
+        llm_metrics.record_cache("fused_analysis", stored is not None)
+        if stored is not None:
+            return stored
+
+        result = await llm_client.chat(
+            messages,
+            temperature=0.3,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "developer_analysis", "strict": True, "schema": FUSED_SCHEMA},
+            },
+        )
+        parse_started = time.perf_counter()
+        try:
+            parsed = parse_fused_response(result.content)
+        except ValueError as e:
+            llm_metrics.record_parse("fused_analysis", False, time.perf_counter() - parse_started)
+            print("Raw fused analysis response:", result.content[:1000])
+            raise ValueError(f"Invalid response from AI: {e}")
+        llm_metrics.record_parse("fused_analysis", isinstance(parsed, dict), time.perf_counter() - parse_started)
+        if not isinstance(parsed, dict):
+            raise ValueError("Invalid response from AI: expected a JSON object")
+
+        skills = parsed.get("skills")
+        skills = [str(skill) for skill in skills if skill] if isinstance(skills, list) else parse_skill_list(str(skills or ""))
+        analysis = FusedAnalysis(
+            analysis_id,
+            reduce_skills([known, local_skill_extractor.normalize(skills)]),
+            validate_jobs(parsed.get("jobs")),
+            validate_suggestions(parsed.get("suggestions")),
+            result.content,
+        )
+        await cache_service.set_fused_analysis(analysis_id, analysis.to_dict(), self.ttl)
+        return analysis
+
+
+# Global instance
+fused_analyzer = FusedAnalyzer()
@@ -0,0 +1,116 @@
+from typing import Optional
+import httpx
+
+
+class GitHubError(Exception):
+    """
+    Base error for GitHub calls.
+    `message` is shown on the profile page, `marker` next to a README.
+    """
+
+    status_code = 502
+    message = "Invalid credentials or user not found"
+
+    def __init__(self, detail: str = "", status_code: Optional[int] = None):
+        self.detail = detail
+        if status_code is not None:
+            self.status_code = status_code
+        super().__init__(detail or self.message)
+
+    @property
+    def marker(self) -> str:
+        return f"(Error {self.status_code}: {self.detail[:100]})"
+
+
+class GitHubNotFoundError(GitHubError):
+    status_code = 404
+    message = "User not found. Please check the username."
+    marker = "(README not found)"
+
+
+class GitHubAuthError(GitHubError):
+    status_code = 401
+    message = "Invalid GitHub token. Please check your token."
+    marker = "(Authentication failed)"
+
+
+class GitHubForbiddenError(GitHubError):
+    status_code = 403
+    message = "Access forbidden. Please check your token permissions."
+    marker = "(Access forbidden - rate limit or permissions)"
+
+
+class GitHubRateLimitError(GitHubForbiddenError):
+    message = "API rate limit exceeded. Please try again later."
+
+
+class GitHubTimeoutError(GitHubError):
+    status_code = 504
+    message = "Request timeout. Please try again."
+    marker = "(Request timeout)"
+
+
+class GitHubNetworkError(GitHubError):
+    status_code = 503
+
+    @property
+    def message(self) -> str:
+        return f"Network error: {self.detail}"
+
+    @property
+    def marker(self) -> str:
+        return f"(Network error: {self.detail})"
+
+
+class GitHubResponseError(GitHubError):
+    """GitHub answered 200 but the body could not be used"""
+
+    message = "Invalid response from GitHub API"
+
+    @property
+    def marker(self) -> str:
+        return f"({self.detail})"
+
+
+class GitHubUnexpectedError(GitHubError):
+    @property
+    def message(self) -> str:
+        return f"An unexpected error occurred: {self.detail}"
+
+    @property
+    def marker(self) -> str:
+        return f"(Unexpected error: {self.detail})"
+
+
+def error_for_status(status_code: int, detail: str = "", rate_limited: bool = False) -> GitHubError:
+    """Map an HTTP status from GitHub to its typed error"""
+    if status_code == 404:
+        return GitHubNotFoundError(detail)
+    if status_code == 401:
+        return GitHubAuthError(detail)
+    if status_code == 429 or (status_code == 403 and rate_limited):
+        return GitHubRateLimitError(detail, status_code)
+    if status_code == 403:
+        return GitHubForbiddenError(detail)
+    return GitHubError(detail, status_code)
+
+
+def error_for_response(response: httpx.Response) -> GitHubError:
+    """Map a non-2xx GitHub response (body already read) to its typed error"""
+    rate_limited = (
+        response.headers.get("x-ratelimit-remaining") == "0"
+        or "retry-after" in response.headers
+        or "rate limit" in response.text.lower()
+    )
+    return error_for_status(response.status_code, response.text[:200], rate_limited)
+
+
+def error_for_exception(exc: Exception) -> GitHubError:
+    """Map transport failures to typed errors"""
+    if isinstance(exc, GitHubError):
+        return exc
+    if isinstance(exc, httpx.TimeoutException):
+        return GitHubTimeoutError(str(exc))
+    if isinstance(exc, httpx.RequestError):
+        return GitHubNetworkError(str(exc))
+    return GitHubUnexpectedError(str(exc))
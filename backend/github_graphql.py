@@ -0,0 +1,232 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from http_clients import http_clients
+from github_errors import GitHubResponseError, error_for_status
+
+# GitHub rejects queries that could return more than 500,000 nodes
+MAX_NODES_PER_QUERY = 500000
+REPOS_PER_PAGE = 100
+TOPICS_PER_REPO = 20
+# README file names tried for each repository, in order. Blob expressions are
+# case-sensitive, unlike REST /readme: repositories matching none of them fall
+# back to REST (see GitHubService._download_readmes)
+README_EXPRESSIONS = (
+    "HEAD:README.md", "HEAD:readme.md", "HEAD:Readme.md", "HEAD:README.markdown",
+    "HEAD:README.rst", "HEAD:README.txt", "HEAD:README",
+    "HEAD:docs/README.md", "HEAD:docs/README.rst", "HEAD:.github/README.md",
+)
+
+
+def cap_readme_text(text: str, max_bytes: int) -> str:
+    """Cut README text to `max_bytes` of UTF-8, marked like a truncated REST download"""
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    # A multi-byte character cut at the cap is dropped, as the REST decoder does
+    return encoded[:max_bytes].decode("utf-8", errors="ignore") + f"\n\n(README truncated after {max_bytes} bytes)"
+
+
+PROFILE_FIELDS = """
+    login name bio avatarUrl url location company websiteUrl twitterUsername createdAt
+    followers { totalCount }
+    following { totalCount }
+"""
+
+REPOSITORIES_FIELD = """
+    repositories(first: %(per_page)d, after: $after, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: NAME, direction: ASC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name nameWithOwner description url isFork
+        stargazerCount forkCount createdAt updatedAt pushedAt
+        primaryLanguage { name }
+        repositoryTopics(first: %(topics)d) { nodes { topic { name } } }
+      }
+    }
+"""
+
+
+class GitHubGraphQLLoader:
+    """
+    Loads profile, repositories and README blobs through GitHub's GraphQL API,
+    returning the same shapes as the REST endpoints used by the templates.
+    """
+
+    def __init__(self, url: str = None, max_readme_aliases: int = None):
+        self.url = url or settings.GITHUB_GRAPHQL_URL
+        self.max_readme_aliases = max_readme_aliases or settings.GITHUB_GRAPHQL_MAX_README_ALIASES
+
+    @staticmethod
+    def _readme_fields() -> str:
+        return " ".join(
+            f'f{i}: object(expression: {json.dumps(expression)}) {{ ... on Blob {{ text isBinary }} }}'
+            for i, expression in enumerate(README_EXPRESSIONS)
+        )
+
+    @staticmethod
+    def _repositories_field() -> str:
+        return REPOSITORIES_FIELD % {"per_page": REPOS_PER_PAGE, "topics": TOPICS_PER_REPO}
+
+    def build_query(self, include_user: bool, readme_repos: List[str]) -> str:
+        """Build one query for the user, their repositories and README blobs of `readme_repos`"""
+        parts = []
+        if include_user:
+            parts.append(f"user(login: $login) {{ {PROFILE_FIELDS} {self._repositories_field()} }}")
+        for i, repo in enumerate(readme_repos):
+            parts.append(f"r{i}: repository(owner: $login, name: {json.dumps(repo)}) {{ {self._readme_fields()} }}")
+        variables = "$login: String!, $after: String" if include_user else "$login: String!"
+        return f"query({variables}) {{ {' '.join(parts)} }}"
+
+    @staticmethod
+    def estimate_nodes(include_user: bool, readme_count: int) -> int:
+        """Worst-case node count GitHub will charge for a query"""
+        nodes = 0
+        if include_user:
+            nodes += REPOS_PER_PAGE + REPOS_PER_PAGE * TOPICS_PER_REPO
+        return nodes + readme_count * len(README_EXPRESSIONS)
+
+    def chunk_readme_repos(self, include_user: bool, readme_repos: List[str]) -> List[List[str]]:
+        """Split README aliases into as few queries as the node and alias limits allow"""
+        per_readme = self.estimate_nodes(False, 1)
+        first_capacity = (MAX_NODES_PER_QUERY - self.estimate_nodes(include_user, 0)) // per_readme
+        chunks, start = [], 0
+        capacity = min(first_capacity, self.max_readme_aliases)
+        while start < len(readme_repos) or not chunks:
+            chunks.append(readme_repos[start:start + capacity])
+            start += capacity
+            capacity = min(MAX_NODES_PER_QUERY // per_readme, self.max_readme_aliases)
+        return chunks
+
+    async def execute(self, token: str, query: str, variables: dict) -> dict:
+        """POST a query and return its `data`, mapping failures to the typed GitHub errors"""
+        response = await http_clients.github.post(
+            self.url,
+            headers={"Authorization": f"bearer {token}"},
+            json={"query": query, "variables": variables},
+        )
+        if response.status_code != 200:
+            raise error_for_status(response.status_code, response.text[:200], response.status_code == 429)
+        try:
+            payload = response.json()
+        except json.JSONDecodeError:
+            raise GitHubResponseError("Invalid JSON response from GitHub API")
+
+        errors = payload.get("errors") or []
+        data = payload.get("data") or {}
+        for error in errors:
+            # Missing repositories only blank out their README alias; anything else is fatal
+            if error.get("type") == "NOT_FOUND" and (error.get("path") or [""])[0] != "user":
+                continue
+            status_code = {"NOT_FOUND": 404, "FORBIDDEN": 403, "RATE_LIMITED": 403}.get(error.get("type"), 502)
+            raise error_for_status(status_code, error.get("message", "GraphQL error"), error.get("type") == "RATE_LIMITED")
+        return data
+
+    @staticmethod
+    def to_rest_profile(user: dict, public_repos: int) -> dict:
+        return {
+            "login": user["login"],
+            "name": user.get("name"),
+            "bio": user.get("bio"),
+            "avatar_url": user.get("avatarUrl"),
+            "html_url": user.get("url"),
+            "location": user.get("location"),
+            "company": user.get("company"),
+            "blog": user.get("websiteUrl") or "",
+            "twitter_username": user.get("twitterUsername"),
+            "created_at": user.get("createdAt"),
+            "public_repos": public_repos,
+            "followers": (user.get("followers") or {}).get("totalCount", 0),
+            "following": (user.get("following") or {}).get("totalCount", 0),
+        }
+
+    @staticmethod
+    def to_rest_repository(node: dict) -> dict:
+        return {
+            "name": node["name"],
+            "full_name": node.get("nameWithOwner"),
+            "description": node.get("description"),
+            "language": (node.get("primaryLanguage") or {}).get("name"),
+            "stargazers_count": node.get("stargazerCount", 0),
+            "forks_count": node.get("forkCount", 0),
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "pushed_at": node.get("pushedAt"),
+            "html_url": node.get("url"),
+            "clone_url": f"{node.get('url')}.git",
+            "fork": node.get("isFork", False),
+            "topics": [t["topic"]["name"] for t in (node.get("repositoryTopics") or {}).get("nodes", [])],
+        }
+
+    @staticmethod
+    def readme_text(repository: Optional[dict]) -> str:
+        """
+        Pick the first README blob found, using the same markers and the same
+        GITHUB_README_MAX_BYTES cap as the REST path
+        """
+        for i in range(len(README_EXPRESSIONS)):
+            blob = (repository or {}).get(f"f{i}")
+            if blob and not blob.get("isBinary") and blob.get("text") is not None:
+                return cap_readme_text(blob["text"], settings.GITHUB_README_MAX_BYTES)
+        return "(README not found)"
+
+    # ---------- public API ----------
+
+    async def load(self, username: str, token: str, readme_repos: Optional[List[str]] = None) -> Tuple[dict, List[dict], Dict[str, str]]:
+        """
+        Load profile, every public repository and the READMEs of `readme_repos`.
+        The first query carries all three; extra queries are only issued for
+        repository pages beyond the first 100 or README batches over the limits.
+        """
+        readme_repos = list(readme_repos or [])
+        chunks = self.chunk_readme_repos(True, readme_repos)
+        first = self.execute(token, self.build_query(True, chunks[0]), {"login": username, "after": None})
+        others = [self.execute(token, self.build_query(False, chunk), {"login": username}) for chunk in chunks[1:]]
+        results = await asyncio.gather(first, *others)
+
+        user = results[0].get("user")
+        if not user:
+            raise error_for_status(404, "User not found")
+
+        connection = user["repositories"]
+        nodes = list(connection["nodes"])
+        while connection["pageInfo"]["hasNextPage"]:
+            data = await self.execute(
+                token,
+                f"query($login: String!, $after: String) {{ user(login: $login) {{ {self._repositories_field()} }} }}",
+                {"login": username, "after": connection["pageInfo"]["endCursor"]},
+            )
+            connection = data["user"]["repositories"]
+            nodes.extend(connection["nodes"])
+
+        readmes = {}
+        for chunk, data in zip(chunks, results):
+            for i, repo in enumerate(chunk):
+                readmes[repo] = self.readme_text(data.get(f"r{i}"))
+
+        profile = self.to_rest_profile(user, connection["totalCount"])
+        return profile, [self.to_rest_repository(node) for node in nodes], readmes
+
+    async def fetch_profile(self, username: str, token: str) -> Tuple[dict, List[dict]]:
+        """Profile and repositories in the shapes returned by /users/{username} and /users/{username}/repos"""
+        profile, repos, _ = await self.load(username, token)
+        return profile, repos
+
+    async def fetch_readmes(self, username: str, token: str, repos: List[str]) -> Dict[str, str]:
+        """README text per repository (selection order kept) without loading the profile"""
+        chunks = [chunk for chunk in self.chunk_readme_repos(False, list(repos)) if chunk]
+        results = await asyncio.gather(*(
+            self.execute(token, self.build_query(False, chunk), {"login": username})
+            for chunk in chunks
+        ))
+        readmes = {}
+        for chunk, data in zip(chunks, results):
+            for i, repo in enumerate(chunk):
+                readmes[repo] = self.readme_text(data.get(f"r{i}"))
+        return {repo: readmes.get(repo, "(README not found)") for repo in repos}
+
+
+# Global instance
+github_graphql = GitHubGraphQLLoader()
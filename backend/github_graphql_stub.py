@@ -0,0 +1,176 @@
+"""
+Local stand-in for GitHub's GraphQL API, for testing and load-testing the
+GITHUB_BACKEND=graphql path without spending a token's rate limit.
+
+Implements POST /graphql for the queries github_graphql builds: the user
+profile with a paginated repository listing, and `rN: repository(...)`
+aliases with README blob lookups. Every login is answered with a synthetic
+user owning --repos repositories; README text names a few skills from the
+taxonomy so the extraction stages have something to find. Latency follows
+the same distributions as llm_stub; RATE_LIMITED errors, missing READMEs
+and unknown users can be injected. GET /stats shows what was served.
+
+    python github_graphql_stub.py --port 8200 --repos 250 --latency lognormal:150,0.4
+
+Point the app at it with GITHUB_BACKEND=graphql and
+GITHUB_GRAPHQL_URL=http://127.0.0.1:8200/graphql. Repositories without a
+README still fall back to REST /readme on api.github.com, so keep
+--missing-readme-rate at 0 for fully offline runs.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from llm_stub import Latency
+from skill_taxonomy import local_skill_extractor
+
+USER_FIELD = re.compile(r"\buser\(login: \$login\)")
+PAGE_SIZE = re.compile(r"repositories\(first: (\d+)")
+REPOSITORY_ALIAS = re.compile(r"(r\d+): repository\(owner: \$login, name: (\"(?:[^\"\\]|\\.)*\")\) \{(.*?)\}\s*\}\s*\}")
+BLOB_ALIAS = re.compile(r"(f\d+): object\(expression: (\"(?:[^\"\\]|\\.)*\")\)")
+README_EXPRESSION = "HEAD:README.md"
+
+
+class StubGitHub:
+    """Synthetic users, repositories and READMEs, stable for a given seed"""
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.latency = Latency(options.latency)
+        self.rng = random.Random(options.seed)
+        self.skills = sorted(local_skill_extractor.categories)
+        self.started = time.monotonic()
+        self.counts = Counter()
+
+    def repository(self, login: str, index: int) -> dict:
+        name = f"project-{index:04d}"
+        return {
+            "name": name,
+            "nameWithOwner": f"{login}/{name}",
+            "description": f"Synthetic repository {index}",
+            "url": f"https://github.com/{login}/{name}",
+            "isFork": index % 7 == 0,
+            "stargazerCount": (index * 37) % 120,
+            "forkCount": (index * 11) % 30,
+            "createdAt": "2023-01-01T00:00:00Z",
+            "updatedAt": "2024-06-01T00:00:00Z",
+            "pushedAt": f"2024-06-{1 + index % 28:02d}T12:00:00Z",
+            "primaryLanguage": {"name": ["Python", "TypeScript", "Go", "Rust", "Java"][index % 5]},
+            "repositoryTopics": {"nodes": [{"topic": {"name": "stub"}}]},
+        }
+
+    def user(self, login: str, page_size: int, after: Optional[str]) -> dict:
+        start = int(after) if after else 0
+        end = min(start + page_size, self.options.repos)
+        return {
+            "login": login,
+            "name": login.title(),
+            "bio": "Synthetic user served by github_graphql_stub",
+            "avatarUrl": f"https://avatars.githubusercontent.com/{login}",
+            "url": f"https://github.com/{login}",
+            "location": None,
+            "company": None,
+            "websiteUrl": None,
+            "twitterUsername": None,
+            "createdAt": "2020-01-01T00:00:00Z",
+            "followers": {"totalCount": 42},
+            "following": {"totalCount": 7},
+            "repositories": {
+                "totalCount": self.options.repos,
+                "pageInfo": {"hasNextPage": end < self.options.repos, "endCursor": str(end)},
+                "nodes": [self.repository(login, index) for index in range(start, end)],
+            },
+        }
+
+    def readme(self, repo: str) -> Optional[str]:
+        """README text for a repository, or None when it has none"""
+        rng = random.Random(f"{self.options.seed}:{repo}")
+        if rng.random() < self.options.missing_readme_rate:
+            return None
+        skills = rng.sample(self.skills, min(len(self.skills), rng.randint(3, 8)))
+        sections = [f"# {repo}", "", "Built with " + ", ".join(skills) + ".", ""]
+        sections += [f"## Section {i}\n\n" + "Lorem ipsum dolor sit amet. " * 20 for i in range(self.options.readme_sections)]
+        return "\n".join(sections)
+
+    def blobs(self, repo: str, body: str) -> dict:
+        text = self.readme(repo)
+        result = {}
+        for alias, expression in BLOB_ALIAS.findall(body):
+            found = text is not None and json.loads(expression) == README_EXPRESSION
+            result[alias] = {"text": text, "isBinary": False} if found else None
+        return result
+
+    def failure(self) -> Optional[dict]:
+        """The injected GraphQL error for this request, if any"""
+        if self.rng.random() < self.options.rate_limit_rate:
+            self.counts["rate_limited"] += 1
+            return {"type": "RATE_LIMITED", "message": "API rate limit exceeded (stub)"}
+        return None
+
+
+def create_app(options: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="GitHub GraphQL stub")
+    stub = StubGitHub(options)
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        body = await request.json()
+        query = body.get("query") or ""
+        variables = body.get("variables") or {}
+        login = variables.get("login") or "stub"
+        stub.counts["requests"] += 1
+        await asyncio.sleep(stub.latency.sample(stub.rng))
+
+        error = stub.failure()
+        if error is not None:
+            return JSONResponse({"data": None, "errors": [error]})
+
+        data = {}
+        if USER_FIELD.search(query):
+            if login in options.unknown_users:
+                stub.counts["unknown_users"] += 1
+                return JSONResponse({"data": {"user": None}, "errors": [
+                    {"type": "NOT_FOUND", "path": ["user"], "message": f"Could not resolve to a User with the login of '{login}'."}
+                ]})
+            page_size = int((PAGE_SIZE.search(query) or [None, "100"])[1])
+            data["user"] = stub.user(login, page_size, variables.get("after"))
+            stub.counts["repository_pages"] += 1
+        for alias, name, fields in REPOSITORY_ALIAS.findall(query):
+            data[alias] = stub.blobs(json.loads(name), fields)
+            stub.counts["readme_aliases"] += 1
+        return {"data": data}
+
+    @app.get("/stats")
+    async def stats():
+        return {"latency": options.latency, "uptime": round(time.monotonic() - stub.started, 1), **stub.counts}
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--latency", default="lognormal:150,0.4", help="response time distribution in ms (see llm_stub.Latency)")
+    parser.add_argument("--repos", type=int, default=120, help="repositories owned by every synthetic user")
+    parser.add_argument("--readme-sections", type=int, default=4, help="filler sections per README")
+    parser.add_argument("--missing-readme-rate", type=float, default=0.0, help="share of repositories without a README")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with a RATE_LIMITED error")
+    parser.add_argument("--unknown-users", nargs="*", default=[], help="logins answered with NOT_FOUND")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    options = parse_args()
+    uvicorn.run(create_app(options), host=options.host, port=options.port, log_level="warning")
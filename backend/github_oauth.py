@@ -1,8 +1,9 @@
-import httpx
-from typing import Optional, Dict, Any
+from typing import Optional
 from config import settings
+from http_clients import http_clients
+from github_service import github_service
+from github_errors import GitHubError, GitHubNotFoundError
 from models import GitHubProfile, Repository
-import json
 
 class GitHubOAuth:
     def __init__(self):
@@ -25,22 +26,22 @@ class GitHubOAuth:
     async def exchange_code_for_token(self, code: str) -> Optional[str]:
         """Exchange authorization code for access token"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://github.com/login/oauth/access_token",
-                    data={
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                        "code": code,
-                        "redirect_uri": self.redirect_uri
-                    },
-                    headers={"Accept": "application/json"}
-                )
+            client = http_clients.github_web
+            response = await client.post(
+                "https://github.com/login/oauth/access_token",
+                data={
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "code": code,
+                    "redirect_uri": self.redirect_uri
+                },
+                headers={"Accept": "application/json"}
+            )
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("access_token")
-                return None
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("access_token")
+            return None
         except Exception as e:
             print(f"Error exchanging code for token: {e}")
             return None
@@ -48,100 +49,59 @@ class GitHubOAuth:
     async def get_user_profile(self, access_token: str) -> Optional[GitHubProfile]:
         """Get GitHub user profile using access token"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.github.com/user",
-                    headers={
-                        "Authorization": f"token {access_token}",
-                        "Accept": "application/vnd.github.v3+json"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return GitHubProfile(
-                        login=data["login"],
-                        name=data.get("name"),
-                        bio=data.get("bio"),
-                        avatar_url=data["avatar_url"],
-                        public_repos=data["public_repos"],
-                        followers=data["followers"],
-                        following=data["following"],
-                        location=data.get("location"),
-                        company=data.get("company"),
-                        blog=data.get("blog"),
-                        twitter_username=data.get("twitter_username")
-                    )
-                return None
+            data = await github_service.get_authenticated_user(access_token)
+            return GitHubProfile(
+                login=data["login"],
+                name=data.get("name"),
+                bio=data.get("bio"),
+                avatar_url=data["avatar_url"],
+                public_repos=data["public_repos"],
+                followers=data["followers"],
+                following=data["following"],
+                location=data.get("location"),
+                company=data.get("company"),
+                blog=data.get("blog"),
+                twitter_username=data.get("twitter_username")
+            )
         except Exception as e:
             print(f"Error getting user profile: {e}")
             return None
     
     async def get_user_repositories(self, access_token: str, username: str) -> list[Repository]:
-        """Get user repositories using access token"""
+        """Get all user repositories using access token (pages are fetched concurrently)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.github.com/users/{username}/repos",
-                    headers={
-                        "Authorization": f"token {access_token}",
-                        "Accept": "application/vnd.github.v3+json"
-                    },
-                    params={"sort": "updated", "per_page": 100}
-                )
+            repos_data = await github_service.fetch_user_repositories(
+                username, access_token, params={"sort": "updated"}
+            )
+            repositories = []
+                
+            for repo in repos_data:
+                repositories.append(Repository(
+                    name=repo["name"],
+                    description=repo.get("description"),
+                    language=repo.get("language"),
+                    stargazers_count=repo["stargazers_count"],
+                    forks_count=repo["forks_count"],
+                    created_at=repo["created_at"],
+                    updated_at=repo["updated_at"],
+                    html_url=repo["html_url"],
+                    clone_url=repo["clone_url"],
+                    topics=repo.get("topics", [])
+                ))
                 
-                if response.status_code == 200:
-                    repos_data = response.json()
-                    repositories = []
-                    
-                    for repo in repos_data:
-                        repositories.append(Repository(
-                            name=repo["name"],
-                            description=repo.get("description"),
-                            language=repo.get("language"),
-                            stargazers_count=repo["stargazers_count"],
-                            forks_count=repo["forks_count"],
-                            created_at=repo["created_at"],
-                            updated_at=repo["updated_at"],
-                            html_url=repo["html_url"],
-                            clone_url=repo["clone_url"],
-                            topics=repo.get("topics", [])
-                        ))
-                    
-                    return repositories
-                return []
+            return repositories
         except Exception as e:
             print(f"Error getting user repositories: {e}")
             return []
     
     async def get_repository_readme(self, access_token: str, username: str, repo_name: str) -> Optional[str]:
-        """Get repository README content"""
+        """Get repository README content (raw media, capped at GITHUB_README_MAX_BYTES)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.github.com/repos/{username}/{repo_name}/readme",
-                    headers={
-                        "Authorization": f"token {access_token}",
-                        "Accept": "application/vnd.github.v3+json"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data.get("content", "")
-                    encoding = data.get("encoding", "base64")
-                    
-                    if encoding == "base64":
-                        import base64
-                        try:
-                            return base64.b64decode(content).decode("utf-8")
-                        except (base64.binascii.Error, UnicodeDecodeError):
-                            return None
-                    else:
-                        return content
-                return None
-        except Exception as e:
-            print(f"Error getting repository README: {e}")
+            return await github_service.get_readme(username, repo_name, access_token)
+        except GitHubNotFoundError:
+            return None
+        except GitHubError as e:
+            print(f"Error getting repository README: {e.marker}")
             return None
 
 # Global instance
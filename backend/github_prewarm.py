@@ -0,0 +1,91 @@
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional, Set
+from config import settings
+from cache_service import cache_service
+from github_service import github_service
+from github_errors import GitHubError
+from github_rate_limiter import BACKGROUND, request_priority
+
+
+class GitHubPrewarmer:
+    """
+    Fetches a user's GitHub data in the background right after OAuth login,
+    so the profile, repository list and top READMEs are already cached when
+    they walk through the form flow. All calls run at BACKGROUND priority, so
+    the rate-limit scheduler serves interactive requests first and keeps its
+    reserve for them.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.counts = Counter()
+
+    @staticmethod
+    def rank_repositories(repos: List[dict], limit: int) -> List[dict]:
+        """Most recently pushed repositories first, stars breaking ties"""
+        return sorted(
+            repos,
+            key=lambda repo: (repo.get("pushed_at") or "", repo.get("stargazers_count") or 0),
+            reverse=True,
+        )[:limit]
+
+    async def prewarm(self, username: str, token: str):
+        """Cache profile, repositories, and READMEs/languages of the top repositories"""
+        request_priority.set(BACKGROUND)
+
+        profile, repos = await github_service.fetch_profile_and_repositories(username, token)
+        scope = github_service.token_scope(token)
+        await cache_service.set_github_profile(username, scope, profile)
+        await cache_service.set_github_repos(username, scope, repos)
+
+        top = self.rank_repositories(repos, settings.GITHUB_PREWARM_README_COUNT)
+        pushed_at = {repo["name"]: repo.get("pushed_at") for repo in top}
+        await asyncio.gather(
+            github_service.fetch_readmes(username, token, list(pushed_at), pushed_at),
+            github_service.fetch_languages(username, token, pushed_at),
+        )
+        return len(repos), len(top)
+
+    async def _run(self, username: str, token: str):
+        try:
+            repo_count, readme_count = await self.prewarm(username, token)
+            self.counts["completed"] += 1
+            print(f"Prewarmed GitHub data for {username}: {repo_count} repos, {readme_count} READMEs")
+        except asyncio.CancelledError:
+            self.counts["cancelled"] += 1
+            raise
+        except GitHubError as e:
+            self.counts["failed"] += 1
+            print(f"GitHub prewarm failed for {username}: {e.message}")
+        except Exception as e:
+            self.counts["failed"] += 1
+            print(f"GitHub prewarm failed for {username}: {e}")
+        finally:
+            self.tasks.pop(username, None)
+
+    def start(self, username: str, token: str) -> Optional[asyncio.Task]:
+        """Start prewarming in the background; at most one run per user at a time"""
+        if not settings.GITHUB_PREWARM_ENABLED:
+            return None
+        if username in self.tasks:
+            self.counts["skipped"] += 1
+            return self.tasks[username]
+        self.counts["started"] += 1
+        task = asyncio.create_task(self._run(username, token))
+        self.tasks[username] = task
+        return task
+
+    async def shutdown(self):
+        """Cancel runs still in flight (called from the app lifespan)"""
+        tasks: Set[asyncio.Task] = set(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"running": len(self.tasks), **self.counts}
+
+
+# Global instance
+github_prewarmer = GitHubPrewarmer()
@@ -0,0 +1,262 @@
+import asyncio
+import contextvars
+import hashlib
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional
+import httpx
+from config import settings
+from github_errors import GitHubRateLimitError
+
+# Request priorities: lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of GitHub calls made from the current task (background jobs set BACKGROUND)
+request_priority: contextvars.ContextVar = contextvars.ContextVar("github_request_priority", default=INTERACTIVE)
+
+# GitHub asks clients to wait at least a minute after hitting a secondary rate limit
+SECONDARY_LIMIT_BACKOFF = 60.0
+IDLE_BUDGET_EXPIRY = 3600.0
+
+
+class TokenBudget:
+    """Rate-limit state GitHub reported for one token"""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.next_slot = 0.0
+        self.in_flight = 0
+        self.queue: List[tuple] = []
+        self.condition = asyncio.Condition()
+        self.last_used = time.time()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.rate_limited_responses = 0
+        self.background_dropped = 0
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "token": self.fingerprint,
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in_seconds": round(self.reset_at - now, 1) if self.reset_at else None,
+            "blocked_for_seconds": round(max(0.0, self.blocked_until - now), 1),
+            "in_flight": self.in_flight,
+            "queued": len(self.queue),
+            "queued_background": sum(1 for priority, _ in self.queue if priority == BACKGROUND),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "rate_limited_responses": self.rate_limited_responses,
+            "background_dropped": self.background_dropped,
+        }
+
+
+class RateLimitScheduler:
+    """
+    Queues and paces GitHub requests per token using the X-RateLimit-*,
+    Retry-After and secondary-limit signals from previous responses.
+    Interactive requests are always dequeued before background ones.
+    """
+
+    def __init__(self):
+        self.budgets: Dict[str, TokenBudget] = {}
+        self.counter = itertools.count()
+        self.max_concurrency = max(1, settings.GITHUB_RATE_LIMIT_MAX_CONCURRENCY)
+        self.background_reserve = settings.GITHUB_RATE_LIMIT_BACKGROUND_RESERVE
+        self.pacing_threshold = settings.GITHUB_RATE_LIMIT_PACING_THRESHOLD
+        self.max_wait = {
+            INTERACTIVE: settings.GITHUB_RATE_LIMIT_MAX_WAIT,
+            BACKGROUND: settings.GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+        }
+        self.max_retries = settings.GITHUB_RATE_LIMIT_MAX_RETRIES
+
+    @staticmethod
+    def fingerprint(authorization: Optional[str]) -> str:
+        """Stable, non-reversible identifier for a token (never expose the token itself)"""
+        if not authorization:
+            return "anonymous"
+        return hashlib.sha256(authorization.encode()).hexdigest()[:12]
+
+    def budget_for(self, authorization: Optional[str]) -> TokenBudget:
+        key = self.fingerprint(authorization)
+        budget = self.budgets.get(key)
+        if budget is None:
+            self._prune()
+            budget = self.budgets[key] = TokenBudget(key)
+        budget.last_used = time.time()
+        return budget
+
+    def _prune(self):
+        cutoff = time.time() - IDLE_BUDGET_EXPIRY
+        for key, budget in list(self.budgets.items()):
+            if budget.last_used < cutoff and not budget.in_flight and not budget.queue:
+                del self.budgets[key]
+
+    def delay_for(self, budget: TokenBudget, priority: int, now: float) -> float:
+        """Seconds this request should wait before it may be sent"""
+        if budget.blocked_until > now:
+            return budget.blocked_until - now
+        if budget.remaining is None or budget.reset_at is None or budget.reset_at <= now:
+            return 0.0
+
+        reserve = self.background_reserve if priority == BACKGROUND else 0
+        if budget.remaining <= reserve:
+            return budget.reset_at - now
+
+        # Close to the limit: spread what is left evenly until the window resets
+        if budget.limit and budget.remaining < budget.limit * self.pacing_threshold:
+            return max(0.0, budget.next_slot - now)
+        return 0.0
+
+    def in_reserve(self, budget: TokenBudget, now: float) -> bool:
+        """Whether the token is blocked or down to the part of its quota kept for interactive requests"""
+        if budget.blocked_until > now:
+            return True
+        if budget.remaining is None or budget.reset_at is None or budget.reset_at <= now:
+            return False
+        return budget.remaining <= self.background_reserve
+
+    async def acquire(self, budget: TokenBudget, priority: int):
+        """
+        Wait for this request's turn; gives up waiting after the priority's max wait.
+        A background request that is still held back by the interactive reserve
+        at that point raises GitHubRateLimitError instead of being sent.
+        """
+        entry = (priority, next(self.counter))
+        heapq.heappush(budget.queue, entry)
+        deadline = time.monotonic() + self.max_wait[priority]
+        throttled = False
+        async with budget.condition:
+            try:
+                while True:
+                    now = time.time()
+                    timeout = None
+                    if budget.queue[0] == entry and budget.in_flight < self.max_concurrency:
+                        delay = self.delay_for(budget, priority, now)
+                        remaining_wait = deadline - time.monotonic()
+                        if delay <= 0:
+                            break
+                        if remaining_wait <= 0:
+                            if priority == BACKGROUND and self.in_reserve(budget, now):
+                                budget.background_dropped += 1
+                                raise GitHubRateLimitError("Background request gave up waiting for the rate-limit reserve")
+                            break
+                        timeout = min(delay, remaining_wait)
+                        throttled = True
+                    try:
+                        await asyncio.wait_for(budget.condition.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                # Cancelled while queued: leave the queue and let the next request re-check
+                budget.queue.remove(entry)
+                heapq.heapify(budget.queue)
+                budget.condition.notify_all()
+                raise
+
+            heapq.heappop(budget.queue)
+            budget.in_flight += 1
+            budget.requests += 1
+            if throttled:
+                budget.throttled += 1
+            if budget.remaining is not None:
+                if budget.limit and budget.reset_at and budget.remaining < budget.limit * self.pacing_threshold:
+                    interval = max(0.0, budget.reset_at - now) / max(1, budget.remaining)
+                    budget.next_slot = max(now, budget.next_slot) + interval
+                budget.remaining = max(0, budget.remaining - 1)
+            budget.condition.notify_all()
+
+    async def release(self, budget: TokenBudget):
+        async with budget.condition:
+            budget.in_flight -= 1
+            budget.condition.notify_all()
+
+    def update(self, budget: TokenBudget, response: httpx.Response, body: bytes = b"") -> Optional[float]:
+        """
+        Record the rate-limit headers of a response.
+        Returns how long to wait before retrying when the response was rate limited.
+        """
+        now = time.time()
+        headers = response.headers
+        try:
+            if "x-ratelimit-limit" in headers:
+                budget.limit = int(headers["x-ratelimit-limit"])
+            if "x-ratelimit-remaining" in headers:
+                budget.remaining = int(headers["x-ratelimit-remaining"])
+            if "x-ratelimit-reset" in headers:
+                budget.reset_at = float(headers["x-ratelimit-reset"])
+        except ValueError:
+            pass
+
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            wait = float(retry_after)
+        elif budget.remaining == 0 and budget.reset_at:
+            wait = max(0.0, budget.reset_at - now)
+        elif b"secondary rate limit" in body.lower():
+            wait = SECONDARY_LIMIT_BACKOFF
+        else:
+            return None  # a permissions 403, not a rate limit
+
+        budget.rate_limited_responses += 1
+        budget.blocked_until = max(budget.blocked_until, now + wait)
+        return wait
+
+    def snapshot(self) -> List[dict]:
+        return [budget.snapshot() for budget in self.budgets.values()]
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Routes every GitHub request through the scheduler and retries rate-limited responses"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: RateLimitScheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        budget = self.scheduler.budget_for(request.headers.get("authorization"))
+        priority = request_priority.get()
+
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(budget, priority)
+            try:
+                response = await self.transport.handle_async_request(request)
+            finally:
+                await self.scheduler.release(budget)
+
+            body = b""
+            if response.status_code in (403, 429):
+                # Small error bodies: read them to detect secondary limits, then rebuild the response
+                raw = b"".join([chunk async for chunk in response.stream])
+                await response.aclose()
+                response = httpx.Response(
+                    response.status_code, headers=response.headers, content=raw,
+                    request=request, extensions=response.extensions,
+                )
+                body = response.content
+
+            wait = self.scheduler.update(budget, response, body)
+            if wait is None or attempt >= self.scheduler.max_retries or wait > self.scheduler.max_wait[priority]:
+                return response
+            attempt += 1
+            budget.retries += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# Global instance shared by every GitHub API call
+github_rate_limiter = RateLimitScheduler()
@@ -0,0 +1,440 @@
+import asyncio
+import codecs
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Awaitable, Dict, List, Optional, Tuple
+import httpx
+from config import settings
+from http_clients import http_clients
+from github_graphql import github_graphql
+from cache_service import cache_service
+from github_rate_limiter import BACKGROUND, request_priority
+from github_errors import GitHubError, GitHubResponseError, error_for_exception, error_for_response
+
+REPOS_PER_PAGE = 100  # GitHub's maximum page size
+LAST_PAGE_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+API_MEDIA_TYPE = "application/vnd.github+json"
+# Returns the file itself instead of a JSON envelope with base64 content
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+
+class GitHubService:
+    """
+    Gateway for every GitHub API call made by the app.
+
+    All requests go through the shared pooled client (with its ETag cache and
+    rate-limit scheduler), and every failure is mapped to a typed GitHubError
+    in `_request`, so routes only deal with data or GitHubError.
+    """
+
+    def __init__(self):
+        self.per_page = REPOS_PER_PAGE
+        self.calls = Counter()
+        self.errors = Counter()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return http_clients.github
+
+    @staticmethod
+    def headers_for(token: Optional[str], accept: str = API_MEDIA_TYPE) -> dict:
+        headers = {"Accept": accept}
+        if token:
+            headers["Authorization"] = f"token {token}"
+        return headers
+
+    def _record(self, operation: str, error: GitHubError) -> GitHubError:
+        self.errors[f"{operation}:{type(error).__name__}"] += 1
+        return error
+
+    async def _request(self, operation: str, url: str, token: Optional[str], params: Optional[dict] = None) -> httpx.Response:
+        """GET a GitHub API URL; non-2xx responses and transport failures raise typed errors"""
+        self.calls[operation] += 1
+        try:
+            response = await self.client.get(url, headers=self.headers_for(token), params=params)
+        except httpx.HTTPError as e:
+            raise self._record(operation, error_for_exception(e))
+        if response.status_code >= 400:
+            raise self._record(operation, error_for_response(response))
+        return response
+
+    async def get_json(self, operation: str, url: str, token: Optional[str], params: Optional[dict] = None):
+        response = await self._request(operation, url, token, params)
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            raise self._record(operation, GitHubResponseError("Invalid JSON response from GitHub API"))
+
+    async def get_profile(self, username: str, token: Optional[str]) -> dict:
+        """GET /users/{username}"""
+        return await self.get_json("profile", f"https://api.github.com/users/{username}", token)
+
+    async def get_authenticated_user(self, token: str) -> dict:
+        """GET /user for the owner of `token`"""
+        return await self.get_json("profile", "https://api.github.com/user", token)
+
+    @staticmethod
+    def _discard(task: asyncio.Future):
+        """Cancel a request that is no longer needed (retrieving its error if it already failed)"""
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+    def page_count(self, total: int) -> int:
+        """Number of pages needed to list `total` repositories"""
+        return max(1, math.ceil(total / self.per_page))
+
+    @staticmethod
+    def last_page_from_link(link_header: Optional[str]) -> Optional[int]:
+        """Read the last page number from a GitHub `Link` header"""
+        if not link_header:
+            return None
+        match = LAST_PAGE_PATTERN.search(link_header)
+        return int(match.group(1)) if match else None
+
+    async def _get_repository_page(self, url: str, token: Optional[str], page: int, params: dict) -> Tuple[int, httpx.Response]:
+        """Fetch one page of a repository listing"""
+        response = await self._request(
+            "repositories", url, token, params={**params, "per_page": self.per_page, "page": page}
+        )
+        return page, response
+
+    async def fetch_all_repositories(
+        self,
+        url: str,
+        token: Optional[str],
+        total: Optional[int] = None,
+        params: Optional[dict] = None,
+        first_page: Optional[Awaitable[Tuple[int, httpx.Response]]] = None,
+    ) -> List[dict]:
+        """
+        Fetch every page of a repository listing concurrently and return them in page order.
+
+        When `total` is known (e.g. `public_repos` from the profile) every page is
+        requested at once. Otherwise page 1 is fetched first and the remaining pages
+        are requested concurrently based on its `Link` header. `first_page` lets a
+        caller pass a page-1 request that is already in flight.
+        """
+        params = dict(params or {})
+        pending: Dict[int, asyncio.Future] = {}
+        pages: Dict[int, List[dict]] = {}
+
+        def schedule(numbers):
+            for page in numbers:
+                pending[page] = asyncio.ensure_future(self._get_repository_page(url, token, page, params))
+
+        try:
+            if first_page is not None:
+                pending[1] = asyncio.ensure_future(first_page)
+            if total is None:
+                first_task = pending.pop(1, None) or asyncio.ensure_future(self._get_repository_page(url, token, 1, params))
+                _, first = await first_task
+                last_page = self.last_page_from_link(first.headers.get("link")) or 1
+                schedule(range(2, last_page + 1))
+                pages[1] = first.json()
+            else:
+                last_page = self.page_count(total)
+                schedule([page for page in range(1, last_page + 1) if page not in pending])
+
+            while pending:
+                done, _ = await asyncio.wait(pending.values(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page, response = task.result()
+                    del pending[page]
+                    pages[page] = response.json()
+                    # The count we planned with can be stale: keep going while the last page is full
+                    if page == last_page and len(pages[page]) >= self.per_page:
+                        last_page += 1
+                        schedule([last_page])
+        finally:
+            for task in pending.values():
+                self._discard(task)
+
+        return [repo for page in sorted(pages) for repo in pages[page]]
+
+    async def fetch_profile_and_repositories(self, username: str, token: Optional[str]) -> Tuple[dict, List[dict]]:
+        """
+        Profile plus every public repository of `username`.
+        The profile and the first repository page are requested concurrently;
+        remaining pages follow at once from the profile's public_repos count.
+        """
+        if settings.GITHUB_BACKEND == "graphql":
+            try:
+                return await github_graphql.fetch_profile(username, token)
+            except httpx.HTTPError as e:
+                raise self._record("graphql", error_for_exception(e))
+
+        url = f"https://api.github.com/users/{username}/repos"
+        first_page = asyncio.ensure_future(self._get_repository_page(url, token, 1, {}))
+        try:
+            profile = await self.get_profile(username, token)
+        except BaseException:
+            self._discard(first_page)
+            raise
+        repos = await self.fetch_all_repositories(url, token, total=profile.get("public_repos") or 0, first_page=first_page)
+        return profile, repos
+
+    async def read_profile_and_repositories(self, username: str, token: Optional[str]) -> Tuple[dict, List[dict], str]:
+        """
+        `fetch_profile_and_repositories` through the cache (stale-while-revalidate).
+        Returns (profile, repos, cache status); background refreshes run at BACKGROUND priority.
+        Entries are scoped to the token (see token_scope), so a hit is only ever
+        served to the token that loaded it.
+        """
+        scope = self.token_scope(token)
+
+        async def load():
+            return list(await self.fetch_profile_and_repositories(username, token))
+
+        async def refresh():
+            request_priority.set(BACKGROUND)
+            return await load()
+
+        (profile, repos), status = await cache_service.read_through_many(
+            [cache_service.github_profile_key(username, scope), cache_service.github_repos_key(username, scope)],
+            load,
+            refresh_loader=refresh,
+        )
+        return profile, repos, status
+
+    async def fetch_user_repositories(self, username: str, token: Optional[str], params: Optional[dict] = None) -> List[dict]:
+        """Every repository of `username`, following the `Link` header concurrently"""
+        return await self.fetch_all_repositories(f"https://api.github.com/users/{username}/repos", token, params=params)
+
+    @staticmethod
+    async def read_capped_text(response: httpx.Response, max_bytes: int) -> Tuple[str, bool]:
+        """
+        Decode a streamed UTF-8 body, stopping after `max_bytes`.
+        Returns (text, truncated); raises UnicodeDecodeError for invalid UTF-8.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            if size + len(chunk) > max_bytes:
+                # A multi-byte character cut at the cap stays buffered in the decoder
+                parts.append(decoder.decode(chunk[:max_bytes - size]))
+                return "".join(parts), True
+            size += len(chunk)
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts), False
+
+    async def get_readme(self, owner: str, repo: str, token: Optional[str], max_bytes: Optional[int] = None) -> str:
+        """
+        Stream a repository README as raw media, truncated at `max_bytes`
+        (GITHUB_README_MAX_BYTES) while downloading. Raises GitHubError.
+        """
+        max_bytes = max_bytes or settings.GITHUB_README_MAX_BYTES
+        self.calls["readme"] += 1
+        try:
+            async with self.client.stream(
+                "GET",
+                f"https://api.github.com/repos/{owner}/{repo}/readme",
+                headers=self.headers_for(token, accept=RAW_MEDIA_TYPE),
+            ) as resp:
+                if resp.status_code != 200:
+                    await resp.aread()
+                    raise error_for_response(resp)
+                try:
+                    content, truncated = await self.read_capped_text(resp, max_bytes)
+                except UnicodeDecodeError as e:
+                    raise GitHubResponseError(f"Error decoding README: {str(e)}")
+        except httpx.HTTPError as e:
+            raise self._record("readme", error_for_exception(e))
+        except GitHubError as e:
+            raise self._record("readme", e)
+
+        if truncated:
+            content += f"\n\n(README truncated after {max_bytes} bytes)"
+        return content
+
+    @staticmethod
+    def token_scope(token: Optional[str]) -> str:
+        """Cache scope for data that may depend on what a token can see (never the token itself)"""
+        if not token:
+            return "anonymous"
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    async def repo_versions(self, owner: str, token: Optional[str], pushed_at: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """
+        Cache version (README, language breakdown) per repository. Repositories
+        in the cached public listing (at the same push) share one entry whatever
+        the token; anything else is scoped to the token, so private repository
+        data is never served to another token.
+        """
+        scope = self.token_scope(token)
+        listing = await cache_service.get_github_repos(owner, scope) or []
+        public = {repo.get("name"): repo.get("pushed_at") for repo in listing if not repo.get("private")}
+        return {
+            repo: f"{'public' if public.get(repo) == pushed else scope}:{pushed}"
+            for repo, pushed in pushed_at.items() if pushed
+        }
+
+    async def _download_rest_readmes(self, owner: str, token: Optional[str], repos: List[str]) -> Tuple[Dict[str, str], Dict[str, GitHubError]]:
+        """README text (or error marker) per repository through REST /readme, bounded by GITHUB_README_CONCURRENCY"""
+        semaphore = asyncio.Semaphore(max(1, settings.GITHUB_README_CONCURRENCY))
+        errors: Dict[str, GitHubError] = {}
+
+        async def fetch(repo: str) -> str:
+            async with semaphore:
+                try:
+                    return await self.get_readme(owner, repo, token)
+                except Exception as e:
+                    errors[repo] = error_for_exception(e)
+                    return errors[repo].marker
+
+        contents = await asyncio.gather(*(fetch(repo) for repo in repos))
+        return dict(zip(repos, contents)), errors
+
+    async def _download_readmes(
+        self, owner: str, token: Optional[str], repos: List[str], with_profile: bool = False
+    ) -> Tuple[Dict[str, str], Dict[str, GitHubError]]:
+        """
+        README text (or error marker) per repository, plus the error of each repository that failed.
+        With the GraphQL backend and `with_profile`, the profile and repository listing
+        come back in the same round trip and refresh their cache entries.
+        """
+        if settings.GITHUB_BACKEND != "graphql":
+            return await self._download_rest_readmes(owner, token, repos)
+
+        try:
+            if with_profile:
+                profile, listing, readmes = await github_graphql.load(owner, token, repos)
+                scope = self.token_scope(token)
+                await cache_service.set_github_profile(owner, scope, profile)
+                await cache_service.set_github_repos(owner, scope, listing)
+            else:
+                readmes = await github_graphql.fetch_readmes(owner, token, repos)
+        except Exception as e:
+            error = self._record("graphql", error_for_exception(e))
+            return {repo: error.marker for repo in repos}, {repo: error for repo in repos}
+
+        # REST /readme resolves names the blob expressions miss (any case, other extensions)
+        not_found = [repo for repo in repos if readmes.get(repo) == "(README not found)"]
+        errors: Dict[str, GitHubError] = {}
+        if not_found:
+            fetched, errors = await self._download_rest_readmes(owner, token, not_found)
+            readmes.update(fetched)
+        return readmes, errors
+
+    async def load_readmes(
+        self,
+        owner: str,
+        token: Optional[str],
+        repos: List[str],
+        pushed_at: Optional[Dict[str, Optional[str]]] = None,
+        with_profile: bool = False,
+    ) -> Tuple[Dict[str, str], Dict[str, GitHubError], List[str]]:
+        """
+        README text for each repository, in the given order, the error of each
+        repository that could not be loaded (its text is then the "(...)" marker
+        shown on the README page) and the repositories served from the cache.
+        Requests run concurrently (bounded by GITHUB_README_CONCURRENCY).
+
+        When `pushed_at` (name -> pushed_at) is given, READMEs are read from and
+        stored in the cache for that push and token, so a prewarmed or repeated
+        selection is served without calling GitHub.
+
+        `with_profile` (GraphQL backend only) loads the profile and repository
+        listing in the same query as the READMEs and refreshes their cache entries.
+        """
+        versions = await self.repo_versions(owner, token, pushed_at or {})
+        readmes: Dict[str, str] = {}
+        for repo in repos:
+            if versions.get(repo):
+                cached = await cache_service.get_repository_readme(owner, repo, versions[repo])
+                if cached is not None:
+                    self.calls["readme_cached"] += 1
+                    readmes[repo] = cached
+
+        errors: Dict[str, GitHubError] = {}
+        missing = [repo for repo in repos if repo not in readmes]
+        if missing:
+            fetched, errors = await self._download_readmes(owner, token, missing, with_profile)
+            readmes.update(fetched)
+            for repo in missing:
+                if repo not in errors and versions.get(repo):
+                    await cache_service.set_repository_readme(
+                        owner, repo, fetched[repo], versions[repo], settings.GITHUB_README_CACHE_TTL
+                    )
+        cached_repos = [repo for repo in repos if repo not in missing]
+        return {repo: readmes[repo] for repo in repos}, errors, cached_repos
+
+    async def fetch_readmes(
+        self,
+        owner: str,
+        token: Optional[str],
+        repos: List[str],
+        pushed_at: Optional[Dict[str, Optional[str]]] = None,
+    ) -> Dict[str, str]:
+        """README text per repository; failures become "(...)" markers instead of raising"""
+        readmes, _, _ = await self.load_readmes(owner, token, repos, pushed_at)
+        return readmes
+
+    async def get_languages(self, owner: str, repo: str, token: Optional[str]) -> Dict[str, int]:
+        """GET /repos/{owner}/{repo}/languages: bytes of code per language"""
+        return await self.get_json("languages", f"https://api.github.com/repos/{owner}/{repo}/languages", token)
+
+    async def fetch_languages(self, owner: str, token: Optional[str], repos: Dict[str, Optional[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Language byte counts for each repository in `repos` (name -> pushed_at).
+        Requests run concurrently (bounded by GITHUB_LANGUAGES_CONCURRENCY); results
+        are cached per repository and version (see repo_versions), so a breakdown is
+        only fetched again after a push. A repository that fails contributes an
+        empty breakdown.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.GITHUB_LANGUAGES_CONCURRENCY))
+        versions = await self.repo_versions(owner, token, repos)
+
+        async def fetch(repo: str, version: Optional[str]) -> Dict[str, int]:
+            if version:
+                cached = await cache_service.get_repository_languages(owner, repo, version)
+                if cached is not None:
+                    self.calls["languages_cached"] += 1
+                    return cached
+            async with semaphore:
+                try:
+                    languages = await self.get_languages(owner, repo, token)
+                except GitHubError as e:
+                    print(f"Error getting languages for {owner}/{repo} ({e.status_code}): {e}")
+                    return {}
+            if version:
+                await cache_service.set_repository_languages(
+                    owner, repo, version, languages, settings.GITHUB_LANGUAGES_CACHE_TTL
+                )
+            return languages
+
+        breakdowns = await asyncio.gather(*(fetch(repo, versions.get(repo)) for repo in repos))
+        return dict(zip(repos, breakdowns))
+
+    @staticmethod
+    def language_profile(breakdowns: Dict[str, Dict[str, int]]) -> List[dict]:
+        """
+        Aggregate per-repository breakdowns into one byte-weighted profile:
+        [{"name", "bytes", "percent", "repos"}] sorted by bytes, largest first.
+        """
+        totals: Counter = Counter()
+        repo_counts: Counter = Counter()
+        for languages in breakdowns.values():
+            for name, size in languages.items():
+                totals[name] += size
+                repo_counts[name] += 1
+        total = sum(totals.values())
+        if not total:
+            return []
+        return [
+            {"name": name, "bytes": size, "percent": round(size * 100 / total, 1), "repos": repo_counts[name]}
+            for name, size in totals.most_common()
+        ]
+
+    def stats(self) -> dict:
+        return {"calls": dict(self.calls), "errors": dict(self.errors)}
+
+
+# Global instance
+github_service = GitHubService()
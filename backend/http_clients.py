@@ -0,0 +1,174 @@
+import time
+import httpx
+from typing import Dict, Any
+from config import settings
+from conditional_cache import ConditionalCacheTransport, github_conditional_cache
+from github_rate_limiter import RateLimitedTransport, github_rate_limiter
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One long-lived client per upstream host
+UPSTREAMS = {
+    "github": {"base_url": "https://api.github.com", "timeout": 30.0, "conditional_cache": True, "rate_limited": True},
+    "github_web": {"base_url": "https://github.com", "timeout": 30.0},
+    "openrouter": {"base_url": settings.OPENROUTER_BASE_URL, "timeout": settings.LLM_TIMEOUT},
+}
+
+
+class PoolStats:
+    """Request counters and connection-pool wait times for one client"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_wait_avg_ms": round(self.wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+            "pool_wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the raw pooled transport and measures how long requests wait for a
+    connection. It sits below the ETag cache and the rate limiter, so the stats
+    cover requests that actually went upstream and exclude rate-limit queueing.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, stats: PoolStats):
+        self.transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        acquired = []
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict):
+            # httpcore emits its first trace event once the pool has handed out a connection
+            if not acquired:
+                acquired.append(time.perf_counter())
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        self.stats.requests += 1
+        try:
+            return await self.transport.handle_async_request(request)
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.stats.record_wait((acquired[0] if acquired else time.perf_counter()) - started)
+            # Retries (rate limiter) send the same request again: do not chain traces
+            if previous_trace is None:
+                request.extensions.pop("trace", None)
+            else:
+                request.extensions["trace"] = previous_trace
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HTTPClientPool:
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self.stats: Dict[str, PoolStats] = {name: PoolStats() for name in UPSTREAMS}
+
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        """Create the pooled client for an upstream"""
+        upstream = UPSTREAMS[name]
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            print("⚠️  HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        self.transports[name] = transport
+        wrapped: httpx.AsyncBaseTransport = InstrumentedTransport(transport, self.stats[name])
+        if upstream.get("rate_limited"):
+            wrapped = RateLimitedTransport(wrapped, github_rate_limiter)
+        if upstream.get("conditional_cache") and settings.GITHUB_CONDITIONAL_CACHE_ENABLED:
+            wrapped = ConditionalCacheTransport(wrapped, github_conditional_cache)
+        return httpx.AsyncClient(
+            base_url=upstream["base_url"],
+            timeout=httpx.Timeout(upstream["timeout"], pool=settings.HTTP_POOL_TIMEOUT),
+            transport=wrapped,
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get the shared client for an upstream, creating it on first use"""
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name)
+            self.clients[name] = client
+        return client
+
+    @property
+    def github(self) -> httpx.AsyncClient:
+        return self.get("github")
+
+    @property
+    def github_web(self) -> httpx.AsyncClient:
+        return self.get("github_web")
+
+    @property
+    def openrouter(self) -> httpx.AsyncClient:
+        return self.get("openrouter")
+
+    async def startup(self):
+        """Open one client per upstream (called from the app lifespan)"""
+        for name in UPSTREAMS:
+            self.get(name)
+
+    async def shutdown(self):
+        """Close all clients and their pooled connections"""
+        for name, client in list(self.clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"Error closing HTTP client '{name}': {e}")
+        self.clients.clear()
+        self.transports.clear()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection-pool statistics per upstream"""
+        result = {}
+        for name in UPSTREAMS:
+            entry: Dict[str, Any] = {"open": name in self.clients, **self.stats[name].as_dict()}
+            pool = getattr(self.transports.get(name), "_pool", None)
+            if pool is not None:
+                connections = list(getattr(pool, "connections", []))
+                idle = sum(1 for conn in connections if conn.is_idle())
+                entry.update({
+                    "connections": len(connections),
+                    "connections_in_use": len(connections) - idle,
+                    "connections_idle": idle,
+                    "requests_waiting": sum(
+                        1 for req in getattr(pool, "_requests", []) if not getattr(req, "connection", None)
+                    ),
+                })
+            result[name] = entry
+        return result
+
+
+# Global instance
+http_clients = HTTPClientPool()
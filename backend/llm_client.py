@@ -0,0 +1,503 @@
+import asyncio
+import contextvars
+import json
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+from config import settings
+from http_clients import http_clients
+from singleflight import llm_singleflight
+from llm_metrics import llm_metrics
+
+# Statuses worth another attempt: throttling, timeouts and upstream/provider failures
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 520, 522, 524}
+
+# Monotonic time by which the current inbound request must have its answer
+request_deadline: contextvars.ContextVar = contextvars.ContextVar("llm_request_deadline", default=None)
+
+
+@contextmanager
+def deadline_after(seconds: float):
+    """Give every LLM call made inside this block a shared deadline `seconds` from now"""
+    token = request_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+
+class LLMResult:
+    """A completed chat completion"""
+
+    def __init__(
+        self,
+        content: str,
+        model: str,
+        usage: dict,
+        latency: float,
+        attempts: int,
+        raw: dict,
+        shared: bool = False,
+        ttfb: Optional[float] = None,
+    ):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+        self.latency = latency
+        # Seconds until OpenRouter's response headers arrived (last attempt)
+        self.ttfb = ttfb
+        self.attempts = attempts
+        self.raw = raw
+        # Answer of an identical call already in flight (no OpenRouter request of our own)
+        self.shared = shared
+
+
+class LLMError(Exception):
+    """
+    Base error for LLM calls.
+    `message` is shown on the page; `retryable` tells the client whether another attempt may succeed.
+    """
+
+    status_code = 502
+    retryable = False
+
+    def __init__(self, detail: str = "", status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        self.detail = detail
+        if status_code is not None:
+            self.status_code = status_code
+        self.retry_after = retry_after
+        self.attempts = 1
+        super().__init__(detail or self.message)
+
+    @property
+    def message(self) -> str:
+        return f"OpenRouter API error (Status {self.status_code}): {self.detail}"
+
+
+class LLMConfigError(LLMError):
+    status_code = 500
+
+    @property
+    def message(self) -> str:
+        return "OpenRouter API key not configured. Please set OPENROUTER_API_KEY environment variable."
+
+
+class LLMRateLimitError(LLMError):
+    status_code = 429
+    retryable = True
+
+
+class LLMServerError(LLMError):
+    retryable = True
+
+
+class LLMTimeoutError(LLMError):
+    status_code = 504
+    retryable = True
+
+    @property
+    def message(self) -> str:
+        return "Request timeout. The AI service took too long to respond."
+
+
+class LLMDeadlineExceeded(LLMTimeoutError):
+    """The inbound request's budget ran out; never retried"""
+
+    retryable = False
+
+
+class LLMNetworkError(LLMError):
+    status_code = 503
+    retryable = True
+
+    @property
+    def message(self) -> str:
+        return f"Network error: {self.detail}"
+
+
+class LLMResponseError(LLMError):
+    """OpenRouter answered, but without a usable completion"""
+
+    @property
+    def message(self) -> str:
+        return f"Invalid response from AI: {self.detail}"
+
+
+def error_for_status(status_code: int, detail: str, retry_after: Optional[float] = None) -> LLMError:
+    """Map an HTTP (or OpenRouter error-body) status to its typed error"""
+    if status_code == 429:
+        return LLMRateLimitError(detail, status_code, retry_after)
+    if status_code in (408, 504, 524):
+        return LLMTimeoutError(detail, status_code, retry_after)
+    if status_code in RETRYABLE_STATUSES:
+        return LLMServerError(detail, status_code, retry_after)
+    return LLMError(detail, status_code)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenRouterClient:
+    """
+    Single entry point for OpenRouter chat completions.
+
+    Uses the pooled `openrouter` client, retries transient failures (429, 5xx,
+    timeouts, connection errors) with exponential backoff and full jitter while
+    honouring Retry-After, and never runs past the deadline of the inbound
+    request (see `deadline_after`). Every failure surfaces as an LLMError.
+    Identical calls in flight at the same time share one request (see
+    `singleflight.SingleFlight`).
+    """
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or settings.OPENROUTER_API_KEY
+        self.model = settings.LLM_MODEL
+        self.timeout = settings.LLM_TIMEOUT
+        self.max_retries = settings.LLM_MAX_RETRIES
+        self.backoff_base = settings.LLM_BACKOFF_BASE
+        self.backoff_max = settings.LLM_BACKOFF_MAX
+        self.singleflight = settings.LLM_SINGLEFLIGHT_ENABLED
+        self.counts = Counter()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    @staticmethod
+    def remaining() -> Optional[float]:
+        """Seconds left before the inbound request's deadline (None when there is none)"""
+        deadline = request_deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    async def _attempt(self, payload: dict, timeout: float) -> Tuple[dict, float]:
+        """(completion body, seconds until the response headers arrived)"""
+        request = http_clients.openrouter.build_request(
+            "POST",
+            "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=timeout,
+        )
+        started = time.perf_counter()
+        try:
+            # Headers first, then the body: the gap is the model's time to first byte
+            response = await asyncio.wait_for(http_clients.openrouter.send(request, stream=True), timeout=timeout)
+            ttfb = time.perf_counter() - started
+            try:
+                await asyncio.wait_for(response.aread(), timeout=max(0.001, timeout - ttfb))
+            finally:
+                await response.aclose()
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            raise LLMTimeoutError(str(e) or "timed out")
+        except httpx.RequestError as e:
+            raise LLMNetworkError(str(e))
+
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if response.status_code != 200:
+            raise error_for_status(response.status_code, response.text[:500], retry_after)
+        try:
+            result = response.json()
+        except ValueError:
+            raise LLMResponseError("response is not JSON")
+
+        # OpenRouter reports provider failures in a 200 body as well
+        if isinstance(result, dict) and result.get("error"):
+            error = result["error"]
+            code = error.get("code") if isinstance(error, dict) else None
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            raise error_for_status(code if isinstance(code, int) else 502, message, retry_after)
+        if not isinstance(result, dict) or not result.get("choices"):
+            raise LLMResponseError(f"no choices in {str(result)[:200]}")
+        return result, ttfb
+
+    async def _complete(self, payload: dict, timeout: Optional[float], max_retries: int) -> dict:
+        """The completion body for `payload`, retried until it succeeds or retries/deadline run out"""
+        attempt = 0
+        while True:
+            self.counts["attempts"] += 1
+            attempt_timeout = timeout or self.timeout
+            remaining = self.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    self.counts["deadline_exceeded"] += 1
+                    raise LLMDeadlineExceeded("request deadline exceeded before the AI call")
+                attempt_timeout = min(attempt_timeout, remaining)
+
+            try:
+                result, ttfb = await self._attempt(payload, attempt_timeout)
+            except LLMError as e:
+                e.attempts = attempt + 1
+                self.counts[f"error:{type(e).__name__}"] += 1
+                if not e.retryable or attempt >= max_retries:
+                    raise
+                wait = self.backoff(attempt, e.retry_after)
+                remaining = self.remaining()
+                if remaining is not None and wait >= remaining:
+                    # Sleeping would run past the deadline: fail now instead of wasting the wait
+                    raise
+                attempt += 1
+                self.counts["retries"] += 1
+                await asyncio.sleep(wait)
+                continue
+
+            self.counts["success"] += 1
+            return {"result": result, "attempts": attempt + 1, "ttfb": ttfb}
+
+    @staticmethod
+    def _rerun_after(error: Exception) -> bool:
+        """Whether a caller that joined a failed call should try on its own (the leader's deadline is not ours)"""
+        return isinstance(error, LLMError) and (error.retryable or isinstance(error, LLMTimeoutError))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        model: str = None,
+        response_format: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+    ) -> LLMResult:
+        """Run one chat completion; raises LLMError once retries or the deadline are exhausted"""
+        if not self.api_key:
+            raise LLMConfigError("missing API key")
+
+        payload = {"model": model or self.model, "messages": messages, "temperature": temperature}
+        if response_format:
+            payload["response_format"] = response_format
+        max_retries = self.max_retries if max_retries is None else max_retries
+        started = time.perf_counter()
+
+        shared = False
+        try:
+            if self.singleflight:
+                try:
+                    completion, shared = await llm_singleflight.do(
+                        llm_singleflight.key_for(payload),
+                        lambda: self._complete(payload, timeout, max_retries),
+                        rerun_on=self._rerun_after,
+                        wait_timeout=self.remaining(),
+                    )
+                except asyncio.TimeoutError:
+                    self.counts["deadline_exceeded"] += 1
+                    raise LLMDeadlineExceeded("request deadline exceeded while waiting for an identical AI call")
+            else:
+                completion = await self._complete(payload, timeout, max_retries)
+        except LLMError as e:
+            llm_metrics.record_call(
+                payload["model"], "chat", time.perf_counter() - started, type(e).__name__, attempts=getattr(e, "attempts", 1)
+            )
+            raise
+
+        if shared:
+            self.counts["shared"] += 1
+        if self.singleflight:
+            llm_metrics.record_cache("singleflight", shared)
+        result = completion["result"]
+        choice = result["choices"][0]
+        content = (choice.get("message") or {}).get("content") or ""
+        llm_result = LLMResult(
+            content=content,
+            model=result.get("model") or payload["model"],
+            usage=result.get("usage") or {},
+            latency=time.perf_counter() - started,
+            attempts=0 if shared else completion["attempts"],
+            raw=result,
+            shared=shared,
+            ttfb=completion.get("ttfb"),
+        )
+        llm_metrics.record_call(
+            payload["model"],
+            "chat",
+            llm_result.latency,
+            "shared" if shared else "ok",
+            ttfb=None if shared else llm_result.ttfb,
+            usage=result.get("usage"),
+            attempts=llm_result.attempts,
+        )
+        return llm_result
+
+    async def _open_stream(self, payload: dict, timeout: float):
+        """Send a streaming request; returns the open response once OpenRouter accepted it"""
+        request = http_clients.openrouter.build_request(
+            "POST",
+            "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream",
+            },
+            json=payload,
+            timeout=timeout,
+        )
+        try:
+            response = await asyncio.wait_for(http_clients.openrouter.send(request, stream=True), timeout=timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            raise LLMTimeoutError(str(e) or "timed out")
+        except httpx.RequestError as e:
+            raise LLMNetworkError(str(e))
+
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            raise error_for_status(response.status_code, response.text[:500], retry_after)
+        return response
+
+    @staticmethod
+    def _stream_delta(line: str) -> Optional[str]:
+        """Content of one `data:` line of the event stream ("" for keep-alives and role-only deltas)"""
+        if not line.startswith("data:"):
+            # Blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+            return ""
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            raise LLMResponseError("stream chunk is not JSON")
+        if isinstance(chunk, dict) and chunk.get("error"):
+            error = chunk["error"]
+            code = error.get("code") if isinstance(error, dict) else None
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            raise error_for_status(code if isinstance(code, int) else 502, message)
+        choices = chunk.get("choices") if isinstance(chunk, dict) else None
+        if not choices:
+            return ""
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+    @staticmethod
+    def _stream_usage(line: str) -> Optional[dict]:
+        """Token usage sent with the last chunk of a stream, if any"""
+        try:
+            chunk = json.loads(line[5:])
+        except ValueError:
+            return None
+        usage = chunk.get("usage") if isinstance(chunk, dict) else None
+        return usage if isinstance(usage, dict) else None
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        model: str = None,
+        response_format: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Run one chat completion with `stream: true`, yielding content deltas as
+        they arrive. Failures before the first delta are retried like `chat`;
+        once text has been yielded an error is raised as is, since the caller
+        has already used part of the answer.
+        """
+        if not self.api_key:
+            raise LLMConfigError("missing API key")
+
+        payload = {"model": model or self.model, "messages": messages, "temperature": temperature, "stream": True}
+        if response_format:
+            payload["response_format"] = response_format
+        max_retries = self.max_retries if max_retries is None else max_retries
+        self.counts["streams"] += 1
+
+        call_started = time.perf_counter()
+        ttfb = first_token = usage = None
+        # Stays "cancelled" when the caller stops reading before the end
+        outcome = "cancelled"
+        attempt = 0
+        try:
+            while True:
+                self.counts["attempts"] += 1
+                attempt_timeout = timeout or self.timeout
+                remaining = self.remaining()
+                if remaining is not None:
+                    if remaining <= 0:
+                        self.counts["deadline_exceeded"] += 1
+                        raise LLMDeadlineExceeded("request deadline exceeded before the AI call")
+                    attempt_timeout = min(attempt_timeout, remaining)
+
+                started = False
+                try:
+                    attempt_started = time.perf_counter()
+                    response = await self._open_stream(payload, attempt_timeout)
+                    ttfb = time.perf_counter() - attempt_started
+                    try:
+                        async for line in response.aiter_lines():
+                            if '"usage"' in line:
+                                usage = self._stream_usage(line) or usage
+                            delta = self._stream_delta(line)
+                            if delta is None:
+                                break
+                            if delta:
+                                if not started:
+                                    first_token = time.perf_counter() - call_started
+                                started = True
+                                yield delta
+                            remaining = self.remaining()
+                            if remaining is not None and remaining <= 0:
+                                self.counts["deadline_exceeded"] += 1
+                                raise LLMDeadlineExceeded("request deadline exceeded while streaming")
+                    except httpx.TimeoutException as e:
+                        raise LLMTimeoutError(str(e) or "timed out")
+                    except httpx.RequestError as e:
+                        raise LLMNetworkError(str(e))
+                    finally:
+                        await response.aclose()
+                except LLMError as e:
+                    e.attempts = attempt + 1
+                    self.counts[f"error:{type(e).__name__}"] += 1
+                    if started or not e.retryable or attempt >= max_retries:
+                        raise
+                    wait = self.backoff(attempt, e.retry_after)
+                    remaining = self.remaining()
+                    if remaining is not None and wait >= remaining:
+                        raise
+                    attempt += 1
+                    self.counts["retries"] += 1
+                    await asyncio.sleep(wait)
+                    continue
+
+                self.counts["success"] += 1
+                outcome = "ok"
+                return
+        except LLMError as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            llm_metrics.record_call(
+                payload["model"],
+                "stream",
+                time.perf_counter() - call_started,
+                outcome,
+                ttfb=ttfb,
+                first_token=first_token,
+                usage=usage,
+                attempts=attempt + 1,
+            )
+
+    def stats(self) -> dict:
+        return dict(self.counts)
+
+
+# Global instance shared by every LLM call
+llm_client = OpenRouterClient()
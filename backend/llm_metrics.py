@@ -0,0 +1,184 @@
+import bisect
+import contextvars
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# Endpoint the current LLM work is done for (set per inbound request by main's middleware)
+current_endpoint: contextvars.ContextVar = contextvars.ContextVar("llm_endpoint", default="background")
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+RETRY_BUCKETS = (0, 1, 2, 3, 5)
+PARSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+
+@contextmanager
+def endpoint_label(endpoint: str):
+    """Attribute every LLM call, cache lookup and parse inside this block to `endpoint`"""
+    token = current_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        current_endpoint.reset(token)
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are read as the upper bound of the bucket they fall in"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, share: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank, seen = share * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.bounds + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class CallMetrics:
+    """Histograms and outcomes of the LLM calls of one endpoint and model"""
+
+    def __init__(self):
+        self.outcomes = Counter()
+        self.latency = Histogram(SECONDS_BUCKETS)
+        self.ttfb = Histogram(SECONDS_BUCKETS)
+        self.first_token = Histogram(SECONDS_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+        self.retries = Histogram(RETRY_BUCKETS)
+
+    def snapshot(self) -> dict:
+        return {
+            "outcomes": dict(self.outcomes),
+            "latency_seconds": self.latency.snapshot(),
+            "ttfb_seconds": self.ttfb.snapshot(),
+            "first_token_seconds": self.first_token.snapshot(),
+            "prompt_tokens": self.prompt_tokens.snapshot(),
+            "completion_tokens": self.completion_tokens.snapshot(),
+            "retries": self.retries.snapshot(),
+        }
+
+
+class LLMMetrics:
+    """
+    Aggregates every OpenRouter call per endpoint and model: total latency,
+    time to first byte (response headers; streams also time their first
+    token), prompt/completion tokens from `usage`, retries and outcome. Cache
+    lookups in front of the model and the parsing of its answers are recorded
+    per endpoint too, so a slow page can be pinned on GitHub (not here), the
+    model, or our own parsing.
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, Dict[str, CallMetrics]] = {}
+        self.caches: Dict[str, Dict[str, Counter]] = {}
+        self.parses: Dict[str, Dict[str, dict]] = {}
+
+    def record_call(
+        self,
+        model: str,
+        mode: str,
+        latency: float,
+        outcome: str = "ok",
+        ttfb: Optional[float] = None,
+        first_token: Optional[float] = None,
+        usage: Optional[dict] = None,
+        attempts: int = 1,
+    ):
+        """One chat() or stream_chat() call; `outcome` is "ok", "shared" or the error class name"""
+        metrics = self.calls.setdefault(current_endpoint.get(), {}).setdefault(model, CallMetrics())
+        metrics.outcomes[f"{mode}:{outcome}"] += 1
+        metrics.latency.observe(latency)
+        if ttfb is not None:
+            metrics.ttfb.observe(ttfb)
+        if first_token is not None:
+            metrics.first_token.observe(first_token)
+        if outcome == "shared":
+            # Another caller's request: no tokens or retries of our own
+            return
+        usage = usage or {}
+        if usage.get("prompt_tokens") is not None:
+            metrics.prompt_tokens.observe(usage["prompt_tokens"])
+        if usage.get("completion_tokens") is not None:
+            metrics.completion_tokens.observe(usage["completion_tokens"])
+        metrics.retries.observe(max(0, attempts - 1))
+
+    def record_cache(self, cache: str, hit: bool, count: int = 1):
+        """Lookups of a cache that saves LLM calls"""
+        if count:
+            counts = self.caches.setdefault(current_endpoint.get(), {}).setdefault(cache, Counter())
+            counts["hits" if hit else "misses"] += count
+
+    def record_parse(self, parser: str, ok: bool, seconds: Optional[float] = None):
+        entry = self.parses.setdefault(current_endpoint.get(), {}).setdefault(
+            parser, {"ok": 0, "failed": 0, "seconds": Histogram(PARSE_BUCKETS)}
+        )
+        entry["ok" if ok else "failed"] += 1
+        if seconds is not None:
+            entry["seconds"].observe(seconds)
+
+    def parse(self, parser: str, parse: Callable[..., Any], *args) -> Any:
+        """Run `parse(*args)`, recording its duration and whether it produced anything"""
+        started = time.perf_counter()
+        result = parse(*args)
+        self.record_parse(parser, bool(result), time.perf_counter() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        caches = {}
+        for endpoint, by_cache in self.caches.items():
+            caches[endpoint] = {}
+            for cache, counts in by_cache.items():
+                lookups = counts["hits"] + counts["misses"]
+                caches[endpoint][cache] = {
+                    "hits": counts["hits"],
+                    "misses": counts["misses"],
+                    "hit_ratio": round(counts["hits"] / lookups, 3) if lookups else 0.0,
+                }
+        return {
+            "calls": {
+                endpoint: {model: metrics.snapshot() for model, metrics in by_model.items()}
+                for endpoint, by_model in self.calls.items()
+            },
+            "caches": caches,
+            "parsing": {
+                endpoint: {
+                    parser: {"ok": entry["ok"], "failed": entry["failed"], "seconds": entry["seconds"].snapshot()}
+                    for parser, entry in by_parser.items()
+                }
+                for endpoint, by_parser in self.parses.items()
+            },
+        }
+
+
+# Global instance
+llm_metrics = LLMMetrics()
@@ -0,0 +1,258 @@
+"""
+Local stand-in for OpenRouter's chat completions API, for load tests that
+should not pay for completions or depend on network variance.
+
+Implements POST /api/v1/chat/completions, plain and streaming (SSE), and
+answers in the formats the app's prompts ask for: a JSON array of skills,
+`Skill:/Search:` suggestions, {"jobs": [...]} and the fused analysis object.
+Answers are built from the skills named in the prompt (skill taxonomy), or
+taken from a file of canned answers. Latency follows a configurable
+distribution; errors, random 429s and periodic 429 bursts can be injected.
+GET /stats shows what was served.
+
+    python llm_stub.py --port 8100 --latency lognormal:800,0.5 --error-rate 0.02 \\
+        --burst-every 60 --burst-length 5
+
+Point the app at it with OPENROUTER_BASE_URL=http://127.0.0.1:8100/api/v1.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from skill_taxonomy import local_skill_extractor
+
+# Where the subject of each prompt starts and ends: the instructions around it
+# mention skills of their own ("Skill: Redis") that must not be echoed back
+PROMPT_KINDS = [
+    ("analysis", "ONE JSON object", "### Repository", None),
+    ("jobs", "job roles", "skills were extracted", "List 4 job roles"),
+    ("suggestions", "Search:", "already has", "Suggest 3"),
+    ("skills", "JSON array of strings", "README content", None),
+]
+
+COMPANIES = ["Netflix", "Stripe", "Shopify", "Spotify", "Atlassian", "GitLab", "Datadog", "Canonical"]
+ROLES = ["Backend Engineer", "Full Stack Developer", "DevOps Engineer", "Data Engineer", "Platform Engineer"]
+LEARNABLE = ["Redis", "PostgreSQL", "Docker", "Kubernetes", "Kafka", "GraphQL", "Terraform", "RabbitMQ", "Celery", "gRPC"]
+
+
+class Latency:
+    """
+    Response time distribution in milliseconds, from a spec such as
+    `fixed:500`, `uniform:200,1500`, `normal:800,200`, `lognormal:800,0.5`
+    (median, sigma) or `exponential:800` (mean).
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        name, _, args = spec.partition(":")
+        self.name = name
+        self.args = [float(arg) for arg in args.split(",") if arg]
+        if name not in ("fixed", "uniform", "normal", "lognormal", "exponential"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds"""
+        a = self.args
+        if self.name == "fixed":
+            ms = a[0]
+        elif self.name == "uniform":
+            ms = rng.uniform(a[0], a[1])
+        elif self.name == "normal":
+            ms = rng.gauss(a[0], a[1])
+        elif self.name == "lognormal":
+            ms = a[0] * rng.lognormvariate(0, a[1])
+        else:
+            ms = rng.expovariate(1 / a[0])
+        return max(0.0, ms) / 1000
+
+
+def prompt_kind(messages: List[dict]) -> Tuple[str, str]:
+    """(kind of answer the prompt asks for, the part of it naming skills or READMEs)"""
+    text = "\n".join(str(message.get("content", "")) for message in messages if isinstance(message, dict))
+    for kind, marker, start, end in PROMPT_KINDS:
+        if marker in text:
+            subject = text.split(start, 1)[-1]
+            return kind, subject.split(end, 1)[0] if end else subject
+    return "chat", text
+
+
+class StubCompletions:
+    """Builds and times the stub's answers"""
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.latency = Latency(options.latency)
+        self.rng = random.Random(options.seed)
+        self.canned: Dict[str, List[str]] = {}
+        if options.responses:
+            with open(options.responses, encoding="utf-8") as file:
+                self.canned = {kind: [answers] if isinstance(answers, str) else answers for kind, answers in json.load(file).items()}
+        self.started = time.monotonic()
+        self.counts = Counter()
+
+    def answer(self, kind: str, subject: str) -> str:
+        skills = local_skill_extractor.extract(subject)
+        if kind in self.canned:
+            return self.rng.choice(self.canned[kind]).replace("{skills}", ", ".join(skills))
+        if kind == "skills":
+            return json.dumps(skills or ["Git"])
+        if kind == "suggestions":
+            return "\n\n".join(f"Skill: {skill}\nSearch: {skill} Crash Course" for skill in self._missing(skills))
+        if kind == "jobs":
+            return json.dumps({"jobs": self._jobs(skills)}, indent=2)
+        if kind == "analysis":
+            return json.dumps({
+                "skills": skills,
+                "jobs": [
+                    {"title": job["title"], "description": job["description"], "company": job["company"],
+                     "matched_skills": job["skills"], "experience_level": "mid", "remote": True}
+                    for job in self._jobs(skills)
+                ],
+                "suggestions": [
+                    {"skill_name": skill, "reason": f"{skill} is widely used in backend services.", "search": f"{skill} Crash Course",
+                     "difficulty": "intermediate", "estimated_time": "2 weeks"}
+                    for skill in self._missing(skills)
+                ],
+            })
+        return "OK"
+
+    def _missing(self, skills: List[str]) -> List[str]:
+        missing = [skill for skill in LEARNABLE if skill not in skills]
+        return self.rng.sample(missing, min(len(missing), self.rng.randint(3, 5)))
+
+    def _jobs(self, skills: List[str]) -> List[dict]:
+        skills = skills or ["Git"]
+        return [
+            {
+                "title": self.rng.choice(ROLES),
+                "description": f"Build and run services with {', '.join(skills[:2])}.",
+                "skills": self.rng.sample(skills, min(len(skills), self.rng.randint(3, 5))),
+                "company": self.rng.choice(COMPANIES),
+            }
+            for _ in range(4)
+        ]
+
+    def failure(self) -> Optional[JSONResponse]:
+        """The injected error for this request, if any"""
+        options = self.options
+        elapsed = time.monotonic() - self.started
+        if options.burst_every and elapsed % options.burst_every < options.burst_length:
+            status = 429
+        elif self.rng.random() < options.throttle_rate:
+            status = 429
+        elif self.rng.random() < options.error_rate:
+            status = self.rng.choice([500, 502, 503])
+        else:
+            return None
+        self.counts[f"status_{status}"] += 1
+        headers = {"Retry-After": str(options.retry_after)} if status == 429 else {}
+        message = "Rate limit exceeded" if status == 429 else "Upstream provider error"
+        return JSONResponse({"error": {"code": status, "message": f"{message} (stub)"}}, status_code=status, headers=headers)
+
+    @staticmethod
+    def usage(messages: List[dict], content: str) -> dict:
+        prompt = sum(len(str(message.get("content", ""))) for message in messages if isinstance(message, dict)) // 4
+        completion = len(content) // 4
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def create_app(options: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="OpenRouter stub")
+    stub = StubCompletions(options)
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        model = body.get("model", "stub")
+        stub.counts["requests"] += 1
+
+        failure = stub.failure()
+        if failure is not None:
+            await asyncio.sleep(stub.latency.sample(stub.rng) * options.error_latency_share)
+            return failure
+
+        kind, subject = prompt_kind(messages)
+        stub.counts[kind] += 1
+        content = stub.answer(kind, subject)
+        latency = stub.latency.sample(stub.rng)
+        completion_id = f"gen-{uuid.uuid4().hex[:24]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            stub.counts["status_200"] += 1
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": stub.usage(messages, content),
+            }
+
+        midstream_error = stub.rng.random() < options.midstream_error_rate
+
+        async def events():
+            def chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
+                data = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                return f"data: {json.dumps(data)}\n\n"
+
+            # Time to first token, then the rest spread over the deltas
+            await asyncio.sleep(latency * options.ttfb_share)
+            yield ": OPENROUTER PROCESSING\n\n"
+            yield chunk({"role": "assistant", "content": ""})
+            pieces = [content[i:i + options.chunk_chars] for i in range(0, len(content), options.chunk_chars)] or [""]
+            pause = latency * (1 - options.ttfb_share) / len(pieces)
+            for index, piece in enumerate(pieces):
+                if midstream_error and index == len(pieces) // 2:
+                    stub.counts["midstream_errors"] += 1
+                    yield f"data: {json.dumps({'error': {'code': 502, 'message': 'Provider disconnected (stub)'}})}\n\n"
+                    return
+                yield chunk({"content": piece})
+                await asyncio.sleep(pause)
+            yield chunk({}, "stop")
+            stub.counts["status_200"] += 1
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"latency": options.latency, "uptime": round(time.monotonic() - stub.started, 1), **stub.counts}
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:800,0.5", help="response time distribution in ms (see Latency)")
+    parser.add_argument("--ttfb-share", type=float, default=0.3, help="share of the latency before the first streamed token")
+    parser.add_argument("--chunk-chars", type=int, default=12, help="characters per streamed delta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 5xx")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0, help="share of streams that fail halfway")
+    parser.add_argument("--error-latency-share", type=float, default=0.1, help="errors come back after this share of a latency sample")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="seconds between 429 bursts (0: no bursts)")
+    parser.add_argument("--burst-length", type=float, default=5.0, help="seconds each 429 burst lasts")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--responses", help='JSON file of canned answers: {"skills" | "jobs" | "suggestions" | "analysis": text or [texts]}; "{skills}" is filled in')
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    options = parse_args()
+    uvicorn.run(create_app(options), host=options.host, port=options.port, log_level="warning")
@@ -0,0 +1,239 @@
+"""
+Load driver for the AI endpoints, meant to run against the local OpenRouter
+stub (llm_stub.py) so results depend neither on paid completions nor on the
+network.
+
+With --spawn it starts the stub and the app itself, the app's
+OPENROUTER_BASE_URL pointing at the stub (Redis and Supabase settings come
+from the environment as usual). Otherwise start them yourself:
+
+    python llm_stub.py --port 8100 --latency lognormal:800,0.5
+    OPENROUTER_BASE_URL=http://127.0.0.1:8100/api/v1 uvicorn main:app --port 8000
+    python load_test.py --app-url http://127.0.0.1:8000 --concurrency 20 --requests 200
+
+    python load_test.py --spawn --stub-args "--error-rate 0.05 --burst-every 30"
+
+Each endpoint is loaded in turn with --concurrency requests in flight.
+Payloads are built from the skill taxonomy. --distinct sets how many
+different skill sets and READMEs are cycled, which controls how much the
+caches can help. For each endpoint the report gives throughput, errors and
+p50/p95/p99 latency. Streaming endpoints also get time to first event.
+Error pages count as errors: the app renders AI failures with status 200.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from skill_taxonomy import local_skill_extractor
+
+ENDPOINTS = ["extract-skills", "suggest-skills", "match-jobs", "suggest-skills/stream", "match-jobs/stream", "analyze-skills", "analyze"]
+DEFAULT_ENDPOINTS = "extract-skills,suggest-skills,match-jobs"
+ERROR_MARKERS = ("⚠️", "API Error", "event: error")
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile of sorted `values`"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(share * len(values)) - 1))]
+
+
+class Payloads:
+    """Form bodies for each endpoint, cycling through `distinct` skill sets"""
+
+    def __init__(self, distinct: int, seed: int):
+        rng = random.Random(seed)
+        names = sorted(local_skill_extractor.categories)
+        self.skill_sets = [rng.sample(names, rng.randint(4, 12)) for _ in range(max(1, distinct))]
+        self.index = 0
+
+    def readme(self, skills: List[str]) -> str:
+        return "\n\n".join([
+            f"# {skills[0].lower().replace(' ', '-')}-service",
+            f"A service built with {', '.join(skills[:-1])} and {skills[-1]}.",
+            "## Installation\n\n```bash\npip install -r requirements.txt\n```",
+            "## Usage\n\n" + "\n".join(f"- Uses {skill} for part of the stack." for skill in skills),
+            "## License\n\nMIT",
+        ])
+
+    def next(self, endpoint: str) -> Dict[str, str]:
+        skills = self.skill_sets[self.index % len(self.skill_sets)]
+        self.index += 1
+        form = {"username": "loadtest", "token": ""}
+        if endpoint in ("extract-skills", "analyze"):
+            half = max(1, len(skills) // 2)
+            form["readme_app"] = self.readme(skills[:half])
+            form["readme_lib"] = self.readme(skills[half:] or skills)
+        else:
+            form["skills"] = ", ".join(skills)
+        return form
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: str, payloads: Payloads, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    first_events: List[float] = []
+    errors: Dict[str, int] = {}
+    queue = list(range(requests))
+    streaming = endpoint.endswith("/stream")
+
+    async def one():
+        form = payloads.next(endpoint)
+        started = time.perf_counter()
+        try:
+            if streaming:
+                body, first = "", None
+                async with client.stream("POST", f"/{endpoint}", data=form) as response:
+                    async for text in response.aiter_text():
+                        if first is None and "event:" in text:
+                            first = time.perf_counter() - started
+                        body += text
+                status = response.status_code
+                if first is not None:
+                    first_events.append(first)
+            else:
+                response = await client.post(f"/{endpoint}", data=form)
+                status, body = response.status_code, response.text
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors[f"HTTP {status}"] = errors.get(f"HTTP {status}", 0) + 1
+        elif any(marker in body for marker in ERROR_MARKERS):
+            errors["error page"] = errors.get("error page", 0) + 1
+
+    async def worker():
+        while queue:
+            queue.pop()
+            await one()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    first_events.sort()
+    return {
+        "endpoint": endpoint,
+        "requests": requests,
+        "elapsed": elapsed,
+        "throughput": requests / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "first_event_p50": percentile(first_events, 0.50) if streaming else None,
+    }
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"{url} did not come up within {timeout:g}s")
+
+
+def spawn(args: argparse.Namespace) -> List[subprocess.Popen]:
+    """Start the stub and the app, the app talking to the stub"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    stub = subprocess.Popen(
+        [sys.executable, "llm_stub.py", "--port", str(args.stub_port)] + shlex.split(args.stub_args), cwd=here
+    )
+    env = {
+        **os.environ,
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{args.stub_port}/api/v1",
+        "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "sk-stub"),
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"], cwd=here, env=env
+    )
+    processes = [stub, app]
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.stub_port}/stats")
+        wait_until_up(f"http://127.0.0.1:{args.app_port}/health")
+    except RuntimeError:
+        for process in processes:
+            process.terminate()
+        raise
+    return processes
+
+
+def print_report(results: List[dict], stub_stats: Optional[dict]):
+    print(f"\n{'endpoint':<24}{'requests':>9}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'first event p50':>17}")
+    for result in results:
+        first = f"{result['first_event_p50'] * 1000:.0f} ms" if result["first_event_p50"] is not None else "-"
+        print(f"{result['endpoint']:<24}{result['requests']:>9}{result['throughput']:>9.1f}{sum(result['errors'].values()):>8}"
+              f"{result['p50'] * 1000:>9.0f}{result['p95'] * 1000:>9.0f}{result['p99'] * 1000:>9.0f}{first:>17}")
+        for kind, count in sorted(result["errors"].items()):
+            print(f"{'':<24}  {count} x {kind}")
+    if stub_stats:
+        print(f"\nStub: {stub_stats}")
+
+
+async def main_async(args: argparse.Namespace):
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    unknown = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+
+    payloads = Payloads(args.distinct, args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.app_url, timeout=args.timeout, limits=limits) as client:
+        results = []
+        for endpoint in endpoints:
+            results.append(await run_endpoint(client, endpoint, payloads, args.requests, args.concurrency))
+            print(f"✅ {endpoint}: {args.requests} requests in {results[-1]['elapsed']:.1f}s")
+
+    stub_stats = None
+    if args.stub_url:
+        try:
+            stub_stats = httpx.get(f"{args.stub_url}/stats", timeout=5).json()
+        except httpx.HTTPError:
+            pass
+    print_report(results, stub_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-url", default=None, help="running app (default: the spawned one, or http://127.0.0.1:8000)")
+    parser.add_argument("--stub-url", default=None, help="stub whose /stats are reported (default: the spawned one)")
+    parser.add_argument("--endpoints", default=DEFAULT_ENDPOINTS, help=f"comma list of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--distinct", type=int, default=50, help="distinct skill sets/READMEs cycled")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="start llm_stub.py and the app for the run")
+    parser.add_argument("--stub-port", type=int, default=8100)
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--stub-args", default="", help="extra llm_stub.py arguments, e.g. \"--error-rate 0.05\"")
+    args = parser.parse_args()
+
+    processes = spawn(args) if args.spawn else []
+    if args.spawn:
+        args.app_url = args.app_url or f"http://127.0.0.1:{args.app_port}"
+        args.stub_url = args.stub_url or f"http://127.0.0.1:{args.stub_port}"
+    args.app_url = args.app_url or "http://127.0.0.1:8000"
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
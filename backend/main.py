@@ -1,31 +1,64 @@
 import os
 import re
 import json
+import asyncio
+import time
 import urllib.parse
 from dotenv import load_dotenv
 import httpx
 import requests
-from typing import List, Optional
+from typing import Awaitable, Dict, List, Optional, Tuple
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, status
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.security import HTTPBearer
 from fastapi.staticfiles import StaticFiles
+from starlette.routing import Match
 from datetime import datetime, timedelta
 import hashlib
 
 # Import our new modules
 from config import settings
-from models import User, UserCreate, UserLogin, Analysis, AnalysisCreate
-from auth import authenticate_user, create_user_token, get_current_active_user, get_password_hash
-from database import db, cache_service
+from models import User, UserCreate, UserLogin, Analysis, AnalysisCreate, UserRole
+from auth import authenticate_user, create_user_token, get_current_active_user, get_password_hash, set_session_cookie
+from database import db
+from cache_service import cache_service
 from github_oauth import github_oauth
+from github_service import github_service
+from github_prewarm import github_prewarmer
+from reanalysis_service import reanalysis_service
+from github_errors import GitHubError
 from pdf_service import pdf_service
 from portfolio_service import portfolio_service
+from http_clients import http_clients
+from conditional_cache import github_conditional_cache
+from github_rate_limiter import github_rate_limiter
+from llm_client import llm_client, LLMError, deadline_after
+from singleflight import llm_singleflight
+from llm_metrics import llm_metrics, endpoint_label
+from skill_extraction import skill_extractor
+from readme_preprocessing import readme_preprocessor
+from fused_analysis import fused_analyzer
+from skill_set_cache import skill_set_cache
+from stream_parsing import JsonItemStream, SuggestionStream, SUGGESTION_PATTERN, parse_json_items
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared upstream HTTP clients on startup; stop background prewarms/refreshes and close the clients on shutdown."""
+    await http_clients.startup()
+    try:
+        yield
+    finally:
+        await github_prewarmer.shutdown()
+        await cache_service.shutdown()
+        await http_clients.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 load_dotenv()
 
 app.add_middleware(
@@ -37,6 +70,30 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def llm_request_deadline(request: Request, call_next):
+    """
+    Every AI call made while handling a request shares one deadline: LLM_REQUEST_BUDGET
+    seconds, or less when the client sends X-Request-Timeout (seconds). Its AI calls,
+    cache lookups and parses are counted under the request's route in /metrics.
+    """
+    budget = settings.LLM_REQUEST_BUDGET
+    try:
+        budget = min(budget, float(request.headers.get("x-request-timeout", budget)))
+    except ValueError:
+        pass
+    with deadline_after(budget), endpoint_label(route_label(request)):
+        return await call_next(request)
+
+
+def route_label(request: Request) -> str:
+    """Path template of the route serving `request` ("/analyses/{analysis_id}/reanalyze", not the id)"""
+    for route in request.app.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint.
@@ -44,6 +101,28 @@ async def health():
     """
     return {"status": "ok", "message": "DevProfile backend running"}
 
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime statistics for the shared upstream HTTP clients, the GitHub gateway, its caches and the LLM client.
+    `llm_calls` breaks the AI calls down per endpoint and model (latency, time to first byte and token,
+    tokens, retries, outcomes) next to the hit ratios of the caches in front of them and parse outcomes.
+    """
+    return {
+        "http_pools": http_clients.pool_stats(),
+        "github_gateway": github_service.stats(),
+        "github_prewarm": github_prewarmer.stats(),
+        "cache": cache_service.stats(),
+        "llm": llm_client.stats(),
+        "llm_singleflight": llm_singleflight.stats(),
+        "skill_extraction": skill_extractor.stats(),
+        "readme_preprocessing": readme_preprocessor.stats(),
+        "skill_set_cache": skill_set_cache.stats(),
+        "llm_calls": llm_metrics.snapshot(),
+        "github_conditional_cache": github_conditional_cache.stats(),
+    }
+
 # Initialize FastAPI application
 
 # Initialize Jinja2 templates with correct directory path
@@ -51,14 +130,17 @@ async def health():
 template_dir = os.path.join(os.path.dirname(__file__), "templates")
 templates = Jinja2Templates(directory=template_dir)
 
-# Get OpenRouter API key from environment variables
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
+# OpenRouter API key (the same one llm_client sends)
+OPENROUTER_API_KEY = settings.OPENROUTER_API_KEY
 
 # Validate environment variables on startup
 def validate_environment():
     """Validate required environment variables and configuration."""
-    if OPENROUTER_API_KEY == "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":
+    if os.getenv("OPENROUTER_API_KEY"):
         print("✅ OpenRouter API key configured")
+    elif OPENROUTER_API_KEY:
+        print("⚠️  WARNING: OPENROUTER_API_KEY not set. Falling back to the default key from config.py.")
+        print("   Set it with: export OPENROUTER_API_KEY='your-key-here'")
     else:
         print("⚠️  WARNING: OPENROUTER_API_KEY not set. AI features will not work.")
         print("   Set it with: export OPENROUTER_API_KEY='your-key-here'")
@@ -83,44 +165,12 @@ async def fetch_profile(request: Request, username: str = Form(...), token: str
     Handles authentication errors and displays appropriate error messages.
     """
     try:
-        # Set up GitHub API headers with the provided token
-        headers = {"Authorization": f"token {token}"}
-        
-        # Make concurrent requests to GitHub API for profile and repositories
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            profile_resp = await client.get(
-                f"https://api.github.com/users/{username}", headers=headers
-            )
-            repos_resp = await client.get(
-                f"https://api.github.com/users/{username}/repos", headers=headers
-            )
-
-        # Check if profile fetch was successful
-        if profile_resp.status_code != 200:
-            error_message = "Invalid credentials or user not found"
-            if profile_resp.status_code == 404:
-                error_message = "User not found. Please check the username."
-            elif profile_resp.status_code == 401:
-                error_message = "Invalid GitHub token. Please check your token."
-            elif profile_resp.status_code == 403:
-                error_message = "API rate limit exceeded. Please try again later."
-            
-            return templates.TemplateResponse(
-                "index.html",
-                {"request": request, "error": error_message},
-            )
-
-        # Parse JSON responses
-        try:
-            profile_data = profile_resp.json()
-            repos_data = repos_resp.json()
-        except json.JSONDecodeError:
-            return templates.TemplateResponse(
-                "index.html",
-                {"request": request, "error": "Invalid response from GitHub API"},
-            )
+        # Served from the cache when possible (stale entries are refreshed in the
+        # background); on a miss the profile and the first repository page are
+        # requested together and the remaining pages follow concurrently
+        profile_data, repos_data, cache_status = await github_service.read_profile_and_repositories(username, token)
 
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             "index.html",
             {
                 "request": request,
@@ -129,16 +179,13 @@ async def fetch_profile(request: Request, username: str = Form(...), token: str
                 "token": token,  # Pass token to next step
             },
         )
-    
-    except httpx.TimeoutException:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "error": "Request timeout. Please try again."},
-        )
-    except httpx.RequestError as e:
+        response.headers["X-Cache"] = cache_status
+        return response
+
+    except GitHubError as e:
         return templates.TemplateResponse(
             "index.html",
-            {"request": request, "error": f"Network error: {str(e)}"},
+            {"request": request, "error": e.message},
         )
     except Exception as e:
         return templates.TemplateResponse(
@@ -155,65 +202,39 @@ async def analyze_readmes(
     selected_repos: List[str] = Form(...),
 ):
     """
-    Fetches README files from selected GitHub repositories.
-    Handles base64 decoding and various error conditions.
+    Fetches README files and language breakdowns from selected GitHub repositories.
+    Requests run concurrently (bounded by GITHUB_README_CONCURRENCY) and
+    results keep the order in which the repositories were selected.
     """
     try:
-        # Set up GitHub API headers
-        headers = {"Authorization": f"token {token}"}
-        readmes = {}
-
-        # Fetch README files for each selected repository
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for repo in selected_repos:
-                try:
-                    readme_url = f"https://api.github.com/repos/{username}/{repo}/readme"
-                    resp = await client.get(readme_url, headers=headers)
-                    
-                    if resp.status_code == 200:
-                        # Parse the response JSON
-                        try:
-                            readme_data = resp.json()
-                            content = readme_data.get("content", "")
-                            encoding = readme_data.get("encoding", "base64")
-                            
-                            # Decode content based on encoding type
-                            if encoding == "base64":
-                                import base64
-                                try:
-                                    decoded = base64.b64decode(content).decode("utf-8")
-                                    readmes[repo] = decoded
-                                except (base64.binascii.Error, UnicodeDecodeError) as e:
-                                    readmes[repo] = f"(Error decoding README: {str(e)})"
-                            else:
-                                readmes[repo] = content
-                        except json.JSONDecodeError:
-                            readmes[repo] = "(Invalid JSON response from GitHub API)"
-                    elif resp.status_code == 404:
-                        readmes[repo] = "(README not found)"
-                    elif resp.status_code == 401:
-                        readmes[repo] = "(Authentication failed)"
-                    elif resp.status_code == 403:
-                        readmes[repo] = "(Access forbidden - rate limit or permissions)"
-                    else:
-                        readmes[repo] = f"(Error {resp.status_code}: {resp.text[:100]})"
-                        
-                except httpx.TimeoutException:
-                    readmes[repo] = "(Request timeout)"
-                except httpx.RequestError as e:
-                    readmes[repo] = f"(Network error: {str(e)})"
-                except Exception as e:
-                    readmes[repo] = f"(Unexpected error: {str(e)})"
+        # pushed_at of each repository (from the selection form) keys the README and
+        # language caches, which the login prewarm may already have filled
+        form = await request.form()
+        pushed_at = {repo: form.get(f"pushed_at_{repo}") or None for repo in selected_repos}
+
+        # Failed READMEs come back as "(...)" markers shown next to the repository;
+        # language breakdowns are fetched alongside them. With the GraphQL backend the
+        # profile and repository listing are refreshed in the same query as the READMEs
+        (readmes, _, cached_repos), languages = await asyncio.gather(
+            github_service.load_readmes(username, token, selected_repos, pushed_at, with_profile=True),
+            github_service.fetch_languages(username, token, pushed_at),
+        )
 
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             "readmes.html",
             {
                 "request": request,
                 "readmes": readmes,
+                "pushed_at": pushed_at,
+                "language_profile": github_service.language_profile(languages),
                 "username": username,
                 "token": token,
             },
         )
+        # README entries are per push, so a cached one is never stale
+        response.headers["X-Cache"] = "fresh" if len(cached_repos) == len(selected_repos) else "miss"
+        response.headers["X-Cache-Hits"] = f"{len(cached_repos)}/{len(selected_repos)}"
+        return response
     
     except Exception as e:
         return templates.TemplateResponse(
@@ -227,6 +248,62 @@ async def analyze_readmes(
         )
 
 
+def parse_language_profile(raw: Optional[str]) -> list:
+    """Read the language profile posted back by the README page (JSON list)"""
+    try:
+        profile = json.loads(raw or "[]")
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(profile, list):
+        return []
+    return [entry for entry in profile if isinstance(entry, dict) and entry.get("name")]
+
+
+def add_language_skills(skills: List[str], language_profile: list) -> List[str]:
+    """Append measured languages the AI did not already list"""
+    known = {skill.lower() for skill in skills}
+    return skills + [entry["name"] for entry in language_profile if entry["name"].lower() not in known]
+
+
+def readmes_from_form(form) -> Dict[str, str]:
+    """{repo: README text} from the `readme_{repo}` fields, empty READMEs left out"""
+    readmes = {}
+    for key in form.keys():
+        if key.startswith("readme_"):
+            readme_content = form.get(key)
+            if readme_content and readme_content.strip():
+                readmes[key[len("readme_"):]] = readme_content
+    return readmes
+
+
+def saved_state_for(form, readmes: Dict[str, str], repo_skills: Dict[str, List[str]]) -> dict:
+    """
+    Per-repository fingerprints and skills posted back by the skills page when
+    the analysis is saved, so a later re-analysis only redoes what changed
+    """
+    pushed_at = {repo: form.get(f"pushed_at_{repo}") or None for repo in readmes}
+    return {
+        "selected_repos": list(readmes),
+        "repo_fingerprints": reanalysis_service.fingerprints(readmes, pushed_at),
+        "repo_skills": repo_skills,
+    }
+
+
+def language_summary_for(language_profile: list) -> str:
+    """Prompt hint listing the measured languages"""
+    if not language_profile:
+        return ""
+    return "Languages measured from the repositories' code (share of bytes): " + ", ".join(
+        f"{entry['name']} {entry.get('percent', 0)}%" for entry in language_profile
+    )
+
+
+async def extract_repo_skills(readmes: Dict[str, str]) -> Dict[str, List[str]]:
+    """Extract technical skills per repository (map-reduce over README chunks)"""
+    result = await skill_extractor.extract(readmes)
+    return result.repo_skills
+
+
 @app.post("/extract-skills", response_class=HTMLResponse)
 async def extract_skills(request: Request):
     """
@@ -240,158 +317,97 @@ async def extract_skills(request: Request):
         token = form.get("token")
 
         # Extract README contents from form data
-        readmes = []
-        for key in form.keys():
-            if key.startswith("readme_"):
-                readme_content = form.get(key)
-                if readme_content and readme_content.strip():
-                    readmes.append(readme_content)
+        readmes = readmes_from_form(form)
+
+        # Byte-weighted language profile measured from the repositories' code
+        language_profile = parse_language_profile(form.get("languages"))
 
         # Check if we have any README content to process
-        if not readmes:
+        if not readmes and language_profile:
+            # Languages alone still give accurate skills, without an AI call
             return templates.TemplateResponse(
                 "skills.html",
                 {
                     "request": request,
-                    "skills": "⚠️ No README content found to analyze.",
+                    "skills": add_language_skills([], language_profile),
+                    "skills_raw": "No README content found; skills come from the repository language breakdown.",
+                    "language_profile": language_profile,
                     "username": username,
                     "token": token,
                 },
             )
-
-        # Combine all README contents
-        combined_readmes = "\n\n".join(readmes)
-
-        # Debug logging (can be removed in production)
-        print("----- SENDING TO AI FOR SKILL EXTRACTION -----")
-        for i, r in enumerate(readmes, 1):
-            print(f"README {i}:\n{r[:200]}...")  # Print first 200 chars
-        print("------ END ------")
-
-        # Validate API key
-        if not OPENROUTER_API_KEY:
+        if not readmes:
             return templates.TemplateResponse(
                 "skills.html",
                 {
                     "request": request,
-                    "skills": "⚠️ OpenRouter API key not configured. Please set OPENROUTER_API_KEY environment variable.",
+                    "skills": "⚠️ No README content found to analyze.",
                     "username": username,
                     "token": token,
                 },
             )
 
-        # Prepare AI prompt for skill extraction
-        messages = [
-            {"role": "system", "content": "You are an assistant that extracts only technical skills from README files."},
-            {
-                "role": "user",
-                "content": f"""
-                Extract the technical skills (languages, frameworks, tools, libraries) from the README content below.
-                Return them as a **JSON array of strings**, nothing else.
-
-                Example:
-                ["Python", "FastAPI", "Git"]
-
-                README content:
-                {combined_readmes}
-                """
-            },
-        ]
-
+        # Debug logging (can be removed in production)
+        print("----- SENDING TO AI FOR SKILL EXTRACTION -----")
+        for repo, r in readmes.items():
+            print(f"README {repo}:\n{r[:200]}...")  # Print first 200 chars
+        print("------ END ------")
 
-        # Make request to OpenRouter API
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "meta-llama/llama-3-8b-instruct",  # Free model option
-                    "messages": messages,
-                    "temperature": 0.3,
-                },
-            )
+        # "local" (fast mode) uses the skill taxonomy only; otherwise SKILL_EXTRACTION_MODE applies
+        mode = form.get("mode") or skill_extractor.mode
 
-        # Check if API request was successful
-        if response.status_code != 200:
-            error_msg = f"OpenRouter API error (Status {response.status_code}): {response.text}"
-            print(f"OpenRouter ERROR: {error_msg}")
+        # Validate API key
+        if not OPENROUTER_API_KEY and mode != "local":
             return templates.TemplateResponse(
                 "skills.html",
                 {
                     "request": request,
-                    "skills": f"⚠️ API Error: {error_msg}",
+                    "skills": "⚠️ OpenRouter API key not configured. Please set OPENROUTER_API_KEY environment variable.",
                     "username": username,
                     "token": token,
                 },
             )
 
-        # Parse AI response
-        skills_list = []
+        language_summary = language_summary_for(language_profile)
+
+        # Each README is chunked to the token budget and the chunks are extracted
+        # concurrently; per-chunk skill lists are merged and de-duplicated locally
         try:
-            result = response.json()
-            if "choices" in result and len(result["choices"]) > 0:
-                skills_raw = result["choices"][0]["message"]["content"]
-                
-                # Attempt to parse as JSON
-                try:
-                    # Remove markdown code blocks if they exist
-                    clean_content = re.sub(r'```(?:json)?\n(.*?)\n```', r'\1', skills_raw, flags=re.DOTALL).strip()
-                    skills_list = json.loads(clean_content)
-                except json.JSONDecodeError:
-                    # Fallback: look for a JSON-like array in the text
-                    match = re.search(r'\[.*\]', clean_content, re.DOTALL)
-                    if match:
-                        try:
-                            skills_list = json.loads(match.group(0))
-                        except json.JSONDecodeError:
-                            # Final fallback: split by commas or newlines if it doesn't look like JSON
-                            skills_list = [s.strip(" \"'-,") for s in clean_content.split('\n') if s.strip()]
-                    else:
-                        skills_list = [s.strip(" \"'-,") for s in clean_content.split('\n') if s.strip()]
-                
-                # Ensure skills_list is actually a list and contains strings
-                if not isinstance(skills_list, list):
-                    skills_list = [str(skills_list)]
-                skills_list = [str(s) for s in skills_list if s]
-
-            else:
-                print("OpenRouter ERROR: Invalid response format:", result)
-                return templates.TemplateResponse(
-                    "skills.html",
-                    {
-                        "request": request,
-                        "skills": [],
-                        "skills_raw": f"⚠️ Invalid response from AI:\n{result}",
-                        "username": username,
-                        "token": token,
-                    },
-                )
-        except Exception as e:
-            print(f"Extraction Error: {str(e)}")
+            extraction = await skill_extractor.extract(readmes, language_summary, mode)
+        except LLMError as e:
+            print(f"OpenRouter ERROR: {e.message}")
             return templates.TemplateResponse(
                 "skills.html",
                 {
                     "request": request,
-                    "skills": [],
-                    "skills_raw": f"⚠️ Parsing error: {str(e)}",
+                    "skills": f"⚠️ API Error: {e.message}",
                     "username": username,
                     "token": token,
                 },
             )
 
-        return templates.TemplateResponse(
+        skills_raw = extraction.raw
+        skills_list = add_language_skills(extraction.skills, language_profile)
+
+        response = templates.TemplateResponse(
             "skills.html",
             {
                 "request": request,
                 "skills": skills_list,
                 "skills_raw": skills_raw,
+                "skills_warning": extraction.warning,
+                "language_profile": language_profile,
+                "saved_state": saved_state_for(form, readmes, extraction.repo_skills),
                 "username": username,
                 "token": token,
             },
         )
+        # READMEs whose skills came from the content-hash cache instead of the LLM
+        response.headers["X-Skill-Cache-Hits"] = f"{extraction.cache_hits}/{extraction.cache_hits + extraction.cache_misses}"
+        response.headers["X-Skill-Cache-Hit-Ratio"] = f"{extraction.cache_hit_ratio:.2f}"
+        # Estimated README tokens prompted, before and after preprocessing
+        response.headers["X-Readme-Tokens"] = f"{extraction.tokens_before}->{extraction.tokens_after}"
+        return response
 
     except httpx.TimeoutException:
         return templates.TemplateResponse(
@@ -425,6 +441,183 @@ async def extract_skills(request: Request):
         )
 
 
+@app.post("/analyze", response_class=HTMLResponse)
+async def analyze(request: Request):
+    """
+    Full analysis in a single AI call: skills, job matches and skill suggestions
+    come back together (see fused_analysis). Renders the skills page; the
+    suggestions and job pages then read the same analysis via `analysis_id`.
+    """
+    form = await request.form()
+    username = form.get("username")
+    token = form.get("token")
+    readmes = readmes_from_form(form)
+    language_profile = parse_language_profile(form.get("languages"))
+
+    if not readmes or not OPENROUTER_API_KEY:
+        # Nothing to analyse in one call: the skills-only flow handles these cases
+        return await extract_skills(request)
+
+    try:
+        analysis = await fused_analyzer.analyze(readmes, language_summary_for(language_profile))
+    except LLMError as e:
+        print(f"OpenRouter ERROR: {e.message}")
+        error = f"⚠️ API Error: {e.message}"
+    except ValueError as e:
+        error = f"⚠️ {str(e)}"
+    else:
+        repo_skills = reanalysis_service.attribute_skills(analysis.skills, readmes)
+        response = templates.TemplateResponse(
+            "skills.html",
+            {
+                "request": request,
+                "skills": add_language_skills(analysis.skills, language_profile),
+                "skills_raw": analysis.raw,
+                "language_profile": language_profile,
+                "saved_state": saved_state_for(form, readmes, repo_skills),
+                "analysis_id": analysis.analysis_id,
+                "username": username,
+                "token": token,
+            },
+        )
+        response.headers["X-Analysis-Cache"] = "hit" if analysis.cached else "miss"
+        return response
+
+    return templates.TemplateResponse(
+        "skills.html",
+        {
+            "request": request,
+            "skills": error,
+            "username": username,
+            "token": token,
+        },
+    )
+
+
+async def suggestion_resources(suggestions) -> list:
+    """Template resources for SkillSuggestions, YouTube lookups run concurrently"""
+    searches = [s.learning_resources[0]["title"] if s.learning_resources else s.skill_name for s in suggestions]
+    urls = await asyncio.gather(*(asyncio.to_thread(get_real_youtube_link, search) for search in searches))
+    return [
+        {
+            "skill": suggestion.skill_name,
+            "title": search,
+            "url": url,
+            "reason": suggestion.reason,
+            "difficulty": suggestion.difficulty,
+            "estimated_time": suggestion.estimated_time,
+        }
+        for suggestion, search, url in zip(suggestions, searches, urls)
+    ]
+
+
+def job_cards(matches) -> list:
+    """Template jobs for JobMatch models"""
+    jobs = []
+    for match in matches:
+        job = prepare_job({
+            "title": match.title,
+            "description": match.description,
+            "company": match.company,
+            "skills": match.matched_skills,
+            "experience_level": match.experience_level,
+            "remote": match.remote,
+        })
+        if job:
+            jobs.append(job)
+    return jobs
+
+
+def skill_suggestion_messages(extracted_skills: str) -> list:
+    """Prompt for 3–5 missing skills, each with a YouTube search title"""
+    return [
+        {"role": "system", "content": "You are a helpful backend development mentor."},
+        {
+            "role": "user",
+            "content": f"""
+        These are the skills the developer already has:
+
+        {extracted_skills}
+
+        Suggest 3–5 missing backend development skills. For each, give a **searchable YouTube title**, not a made-up link.
+        Format:
+
+        Skill: Redis  
+        Search: Redis Crash Course
+
+        Skill: PostgreSQL  
+        Search: PostgreSQL Full Tutorial
+
+        """,
+        },
+    ]
+
+
+def job_match_messages(skills: str) -> list:
+    """Prompt for 4 job roles as {"jobs": [...]} JSON"""
+    return [
+        {
+            "role": "system",
+            "content": "You are a career advisor that maps skills to job opportunities.",
+        },
+        {
+            "role": "user",
+            "content": f"""
+            The following skills were extracted from a developer's GitHub:
+            {skills}
+
+            List 4 job roles that fit this skillset. For each, include:
+
+            - Job Title
+            - Short Description
+            - 3–5 matched skills from above
+            - A company that typically hires for it
+
+            Return as JSON in this format:
+
+            {{
+              "jobs": [
+                {{
+                  "title": "Backend Engineer",
+                  "description": "Build REST APIs using FastAPI and SQLAlchemy.",
+                  "skills": ["FastAPI", "SQLAlchemy", "Git"],
+                  "company": "Netflix"
+                }}
+              ]
+            }}
+            """,
+        },
+    ]
+
+
+def prepare_job(job) -> Optional[dict]:
+    """Normalize one AI job entry for jobmatch.html (None when it is unusable)"""
+    if not isinstance(job, dict) or not job.get("title"):
+        return None
+
+    # Align keys with template expectations
+    # AI might return 'skills' but template wants 'matching_skills'
+    if "skills" in job and "matching_skills" not in job:
+        job["matching_skills"] = job["skills"]
+
+    # Ensure match_score exists for the progress bar/badge
+    if "match_score" not in job:
+        # Generic score if AI didn't provide one
+        import random
+        job["match_score"] = random.randint(75, 95)
+
+    # Generate a real-world search URL for "internet proof"
+    query = f"{job['title']} {job.get('company', '')}".strip()
+    encoded_query = urllib.parse.quote_plus(query)
+    job["verification_url"] = f"https://www.linkedin.com/jobs/search/?keywords={encoded_query}"
+
+    # Add company logo
+    if "company" in job:
+        company_name = job["company"].lower().replace(" ", "").replace(".", "")
+        job["logo"] = f"https://www.google.com/s2/favicons?sz=128&domain={company_name}.com"
+    return job
+
+
 @app.post("/suggest-skills", response_class=HTMLResponse)
 async def suggest_skills(request: Request):
     """
@@ -466,73 +659,73 @@ async def suggest_skills(request: Request):
                 },
             )
 
-        # Prepare AI prompt for skill suggestions
-        messages = [
-            {"role": "system", "content": "You are a helpful backend development mentor."},
-            {
-                "role": "user",
-                "content": f"""
-            These are the skills the developer already has:
-
-            {extracted_skills}
-
-            Suggest 3–5 missing backend development skills. For each, give a **searchable YouTube title**, not a made-up link.
-            Format:
-
-            Skill: Redis  
-            Search: Redis Crash Course
-
-            Skill: PostgreSQL  
-            Search: PostgreSQL Full Tutorial
-
-            """,
-            },
-        ]
-
-        # Make request to OpenRouter API
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
+        # Suggestions already produced by the single-call /analyze
+        analysis = await fused_analyzer.load(form.get("analysis_id"))
+        if analysis is not None:
+            return templates.TemplateResponse(
+                "suggestions.html",
+                {
+                    "request": request,
+                    "suggestions": analysis.raw,
+                    "resources": await suggestion_resources(analysis.suggestions),
+                    "analysis_id": analysis.analysis_id,
+                    "username": username,
+                    "token": token,
+                    "skills": extracted_skills,
                 },
-                json={
-                    "model": "meta-llama/llama-3-8b-instruct",
-                    "messages": messages,
-                    "temperature": 0.3,
+            )
+
+        # An equivalent skill set was answered recently
+        cached = await skill_set_cache.get_suggestions(extracted_skills)
+        if cached:
+            return templates.TemplateResponse(
+                "suggestions.html",
+                {
+                    "request": request,
+                    "suggestions": cached["suggestions"],
+                    "resources": cached["resources"],
+                    "username": username,
+                    "token": token,
+                    "skills": extracted_skills,
                 },
             )
 
-        # Check if API request was successful
-        if response.status_code != 200:
-            error_msg = f"OpenRouter API error (Status {response.status_code}): {response.text}"
-            print(f"OpenRouter ERROR: {error_msg}")
+        # Streaming page: render it right away, cards arrive from /suggest-skills/stream
+        if form.get("stream"):
             return templates.TemplateResponse(
                 "suggestions.html",
                 {
                     "request": request,
-                    "suggestions": f"⚠️ API Error: {error_msg}",
+                    "suggestions": "",
                     "resources": [],
+                    "streaming": True,
                     "username": username,
                     "token": token,
                     "skills": extracted_skills,
                 },
             )
 
-        # Parse AI response
+        # Prepare AI prompt for skill suggestions
+        messages = skill_suggestion_messages(extracted_skills)
+
+        # Make request to OpenRouter API (retries transient failures within the request deadline)
         try:
-            result = response.json()
-            print("📦 Full OpenRouter Response:\n", json.dumps(result, indent=2))
-            
-            if "choices" in result and len(result["choices"]) > 0:
-                suggestions = result["choices"][0]["message"]["content"].strip()
-            else:
-                suggestions = ""
-                print("❌ GPT response is malformed or empty.")
-        except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
-            suggestions = ""
-            print(f"❌ Error parsing AI response: {e}")
+            result = await llm_client.chat(messages, temperature=0.3)
+        except LLMError as e:
+            print(f"OpenRouter ERROR: {e.message}")
+            return templates.TemplateResponse(
+                "suggestions.html",
+                {
+                    "request": request,
+                    "suggestions": f"⚠️ API Error: {e.message}",
+                    "resources": [],
+                    "username": username,
+                    "token": token,
+                    "skills": extracted_skills,
+                },
+            )
+
+        suggestions = result.content.strip()
 
         # Process suggestions and extract resources
         if not suggestions:
@@ -540,6 +733,7 @@ async def suggest_skills(request: Request):
             resources = []
         else:
             resources = extract_resources_from_gpt(suggestions)
+            await skill_set_cache.set_suggestions(extracted_skills, {"suggestions": suggestions, "resources": resources})
 
         return templates.TemplateResponse(
             "suggestions.html",
@@ -607,7 +801,7 @@ def extract_resources_from_gpt(content: str):
     """
     # Regex pattern to match skill and search term pairs
     pattern = r"Skill\s*:\s*(.*?)\s*Search\s*:\s*(.*?)\s*(?=\n|$)"
-    matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+    matches = llm_metrics.parse("suggestions", re.findall, pattern, content, re.DOTALL | re.IGNORECASE)
     resources = []
 
     # Process each matched skill-search pair
@@ -887,117 +1081,63 @@ async def match_jobs(request: Request):
                 },
             )
 
-        # Prepare AI prompt
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a career advisor that maps skills to job opportunities.",
-            },
-            {
-                "role": "user",
-                "content": f"""
-                The following skills were extracted from a developer's GitHub:
-                {skills}
-
-                List 4 job roles that fit this skillset. For each, include:
-
-                - Job Title
-                - Short Description
-                - 3–5 matched skills from above
-                - A company that typically hires for it
-
-                Return as JSON in this format:
+        # Job matches already produced by the single-call /analyze
+        analysis = await fused_analyzer.load(form.get("analysis_id"))
+        if analysis is not None:
+            return templates.TemplateResponse(
+                "jobmatch.html", {"request": request, "jobs": job_cards(analysis.jobs), "username": username}
+            )
 
-                {{
-                  "jobs": [
-                    {{
-                      "title": "Backend Engineer",
-                      "description": "Build REST APIs using FastAPI and SQLAlchemy.",
-                      "skills": ["FastAPI", "SQLAlchemy", "Git"],
-                      "company": "Netflix"
-                    }}
-                  ]
-                }}
-                """,
-            },
-        ]
-
-        # Call OpenRouter
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "meta-llama/llama-3-8b-instruct",
-                    "messages": messages,
-                    "temperature": 0.4,
-                    "response_format": {"type": "json_object"},  # ✅ enforce JSON
-                },
+        # An equivalent skill set was matched recently
+        cached = await skill_set_cache.get_jobs(skills)
+        if cached:
+            return templates.TemplateResponse(
+                "jobmatch.html", {"request": request, "jobs": cached, "username": username}
             )
 
-        # Check API response
-        if response.status_code != 200:
-            error_msg = f"OpenRouter API error (Status {response.status_code}): {response.text}"
-            print(f"OpenRouter ERROR: {error_msg}")
+        # Streaming page: render it right away, cards arrive from /match-jobs/stream
+        if form.get("stream"):
             return templates.TemplateResponse(
                 "jobmatch.html",
                 {
                     "request": request,
                     "jobs": [],
+                    "streaming": True,
                     "username": username,
-                    "error": f"API Error: {error_msg}",
+                    "token": token,
+                    "skills": skills,
                 },
             )
 
-        # Parse AI response safely
-        result = response.json()
-        jobs = []
+        # Prepare AI prompt
+        messages = job_match_messages(skills)
+
+        # Call OpenRouter (retries transient failures within the request deadline)
         try:
-            ai_content = result["choices"][0]["message"]["content"].strip()
-
-            # Strip markdown code blocks if present
-            ai_content = re.sub(r'```(?:json)?\n(.*?)\n```', r'\1', ai_content, flags=re.DOTALL).strip()
-            # If still starts with ```, try a simpler regex
-            ai_content = re.sub(r"^```json|```$", "", ai_content, flags=re.MULTILINE).strip()
-
-            parsed = json.loads(ai_content)
-            raw_jobs = parsed.get("jobs", [])
-            
-            # Filter and normalize jobs
-            for job in raw_jobs:
-                if not isinstance(job, dict) or not job.get("title"):
-                    continue
-                
-                # Align keys with template expectations
-                # AI might return 'skills' but template wants 'matching_skills'
-                if "skills" in job and "matching_skills" not in job:
-                    job["matching_skills"] = job["skills"]
-                
-                # Ensure match_score exists for the progress bar/badge
-                if "match_score" not in job:
-                    # Generic score if AI didn't provide one
-                    import random
-                    job["match_score"] = random.randint(75, 95)
-                
-                # Generate a real-world search URL for "internet proof"
-                query = f"{job['title']} {job.get('company', '')}".strip()
-                encoded_query = urllib.parse.quote_plus(query)
-                job["verification_url"] = f"https://www.linkedin.com/jobs/search/?keywords={encoded_query}"
-                
-                jobs.append(job)
+            result = await llm_client.chat(
+                messages, temperature=0.4, response_format={"type": "json_object"}  # ✅ enforce JSON
+            )
+        except LLMError as e:
+            print(f"OpenRouter ERROR: {e.message}")
+            return templates.TemplateResponse(
+                "jobmatch.html",
+                {
+                    "request": request,
+                    "jobs": [],
+                    "username": username,
+                    "error": f"API Error: {e.message}",
+                },
+            )
 
-        except Exception as e:
-            print(f"❌ Error parsing Job Match response: {e}")
-            print("Raw AI response content:", ai_content if 'ai_content' in locals() else "N/A")
+        # Parse AI response safely (code fences, trailing commas and chatter are tolerated)
+        raw_jobs = llm_metrics.parse("jobs", parse_json_items, result.content, "jobs")
+        if raw_jobs is None:
+            print("❌ Error parsing Job Match response: no jobs array")
+            print("Raw AI response content:", result.content)
 
-        # Add company logos
-        for job in jobs:
-            if "company" in job:
-                company_name = job["company"].lower().replace(" ", "").replace(".", "")
-                job["logo"] = f"https://www.google.com/s2/favicons?sz=128&domain={company_name}.com"
+        # Filter and normalize jobs
+        jobs = [job for job in map(prepare_job, raw_jobs or []) if job]
+        await skill_set_cache.set_jobs(skills, jobs)
 
         return templates.TemplateResponse(
             "jobmatch.html", {"request": request, "jobs": jobs, "username": username}
@@ -1035,6 +1175,242 @@ async def match_jobs(request: Request):
         )
 
 
+# ==================== STREAMING VARIANTS ====================
+
+def sse_event(event: str, data) -> str:
+    """One server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # No caching, and no proxy buffering that would hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def suggestion_events(extracted_skills: str):
+    """
+    Suggestion cards as server-sent events. Each `Skill/Search` pair is emitted
+    as soon as the model finishes it; its YouTube lookup runs while the rest of
+    the answer is still streaming, so cards may arrive out of order.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    card = templates.get_template("partials/suggestion_card.html")
+
+    async def lookup(index: int, skill: str, search: str):
+        url = await asyncio.to_thread(get_real_youtube_link, search)
+        item = {"skill": skill, "title": search, "url": url}
+        await queue.put(sse_event("suggestion", {"index": index, "item": item, "html": card.render(item=item, index=index)}))
+        return item
+
+    async def read():
+        lookups = []
+        answer = []
+        try:
+            parser = SuggestionStream()
+            async for delta in llm_client.stream_chat(skill_suggestion_messages(extracted_skills), temperature=0.3):
+                answer.append(delta)
+                for skill, search in parser.feed(delta):
+                    lookups.append(asyncio.create_task(lookup(len(lookups), skill, search)))
+            for skill, search in parser.close():
+                lookups.append(asyncio.create_task(lookup(len(lookups), skill, search)))
+            resources = await asyncio.gather(*lookups)
+            llm_metrics.record_parse("suggestions_stream", bool(lookups))
+            if not lookups:
+                print("⚠️ No skill suggestions found in streamed AI response.")
+            await skill_set_cache.set_suggestions(extracted_skills, {"suggestions": "".join(answer), "resources": resources})
+            await queue.put(sse_event("done", {"count": len(lookups)}))
+        except LLMError as e:
+            print(f"OpenRouter ERROR: {e.message}")
+            await asyncio.gather(*lookups, return_exceptions=True)
+            await queue.put(sse_event("error", {"message": f"API Error: {e.message}"}))
+        except Exception as e:
+            await queue.put(sse_event("error", {"message": f"Unexpected error: {str(e)}"}))
+        finally:
+            await queue.put(None)
+
+    reader = asyncio.create_task(read())
+    try:
+        # Sent at once so the browser sees the response before the first token
+        yield ": stream open\n\n"
+        while (event := await queue.get()) is not None:
+            yield event
+    finally:
+        # Client went away: stop reading the completion
+        reader.cancel()
+
+
+async def job_match_events(skills: str):
+    """Job cards as server-sent events, each emitted as soon as its JSON object is complete"""
+    card = templates.get_template("partials/job_card.html")
+    yield ": stream open\n\n"
+    jobs = []
+    try:
+        parser = JsonItemStream("jobs")
+        async for delta in llm_client.stream_chat(
+            job_match_messages(skills), temperature=0.4, response_format={"type": "json_object"}
+        ):
+            for item in parser.feed(delta):
+                job = prepare_job(item)
+                if job:
+                    yield sse_event("job", {"index": len(jobs), "job": job, "html": card.render(job=job, index=len(jobs))})
+                    jobs.append(job)
+        llm_metrics.record_parse("jobs_stream", bool(jobs))
+        await skill_set_cache.set_jobs(skills, jobs)
+        yield sse_event("done", {"count": len(jobs)})
+    except LLMError as e:
+        print(f"OpenRouter ERROR: {e.message}")
+        yield sse_event("error", {"message": f"API Error: {e.message}"})
+    except Exception as e:
+        yield sse_event("error", {"message": f"Unexpected error: {str(e)}"})
+
+
+@app.post("/suggest-skills/stream")
+async def suggest_skills_stream(request: Request):
+    """
+    Streaming variant of /suggest-skills: `suggestion` events carry one rendered
+    card each, followed by `done` (or `error`).
+    Only the skill list is read: no GitHub token is needed.
+    """
+    form = await request.form()
+    extracted_skills = form.get("skills")
+    if not extracted_skills or not extracted_skills.strip():
+        return sse_response(iter([sse_event("error", {"message": "No skills provided for analysis."})]))
+    return sse_response(suggestion_events(extracted_skills))
+
+
+@app.post("/match-jobs/stream")
+async def match_jobs_stream(request: Request):
+    """
+    Streaming variant of /match-jobs: `job` events carry one rendered card each,
+    followed by `done` (or `error`).
+    Only the skill list is read: no GitHub token is needed.
+    """
+    form = await request.form()
+    skills = form.get("skills")
+    if not skills or not skills.strip():
+        return sse_response(iter([sse_event("error", {"message": "No skills provided for job matching"})]))
+    return sse_response(job_match_events(skills))
+
+
+# ==================== PARALLEL ANALYSIS ====================
+
+async def suggestion_branch(extracted_skills: str) -> dict:
+    """Skill suggestions with all their YouTube lookups running at once"""
+    cached = await skill_set_cache.get_suggestions(extracted_skills)
+    if cached:
+        return cached
+    result = await llm_client.chat(skill_suggestion_messages(extracted_skills), temperature=0.3)
+    suggestions = result.content.strip()
+    matches = llm_metrics.parse("suggestions", SUGGESTION_PATTERN.findall, suggestions)
+    pairs = [(skill.strip(), search.strip()) for skill, search in matches]
+    urls = await asyncio.gather(*(asyncio.to_thread(get_real_youtube_link, search) for _, search in pairs))
+    if not pairs:
+        print("⚠️ No skill suggestions found in AI response.")
+    generated = {
+        "suggestions": suggestions,
+        "resources": [{"skill": skill, "title": search, "url": url} for (skill, search), url in zip(pairs, urls)],
+    }
+    await skill_set_cache.set_suggestions(extracted_skills, generated)
+    return generated
+
+
+async def job_match_branch(skills: str) -> dict:
+    """Job matches, read with the same tolerant parser as the streaming variant"""
+    cached = await skill_set_cache.get_jobs(skills)
+    if cached:
+        return {"jobs": cached}
+    result = await llm_client.chat(job_match_messages(skills), temperature=0.4, response_format={"type": "json_object"})
+    jobs = [job for job in map(prepare_job, llm_metrics.parse("jobs", parse_json_items, result.content, "jobs") or []) if job]
+    if not jobs:
+        print("Raw AI response content:", result.content[:1000])
+    await skill_set_cache.set_jobs(skills, jobs)
+    return {"jobs": jobs}
+
+
+async def run_branch(name: str, branch: Awaitable[dict], timeout: float) -> Tuple[Optional[dict], Optional[str], float]:
+    """
+    (result, error, seconds) of one branch. Its AI calls get a deadline of
+    `timeout` (never past the request's own), and the whole branch is cut off
+    there, so one slow or failing branch cannot hold up or sink the other.
+    """
+    started = time.perf_counter()
+    remaining = llm_client.remaining()
+    timeout = timeout if remaining is None else max(0.0, min(timeout, remaining))
+    try:
+        with deadline_after(timeout):
+            result = await asyncio.wait_for(branch, timeout)
+        return result, None, time.perf_counter() - started
+    except asyncio.TimeoutError:
+        error = f"took longer than {timeout:g}s"
+    except LLMError as e:
+        print(f"OpenRouter ERROR ({name}): {e.message}")
+        error = f"API Error: {e.message}"
+    except Exception as e:
+        error = f"Unexpected error: {str(e)}"
+    print(f"⚠️ /analyze-skills {name} branch failed: {error}")
+    return None, error, time.perf_counter() - started
+
+
+@app.post("/analyze-skills", response_class=HTMLResponse)
+async def analyze_skills(request: Request):
+    """
+    Skill suggestions and job matches for one skill list on one page. Both AI
+    calls (and the suggestions' YouTube lookups) run concurrently, each with
+    its own timeout; a branch that fails or times out leaves the other's
+    result on the page. Branch timings are sent as a Server-Timing header.
+    """
+    form = await request.form()
+    username = form.get("username")
+    token = form.get("token")
+    skills = form.get("skills")
+    context = {"request": request, "username": username, "token": token, "skills": skills}
+
+    if not skills or not skills.strip():
+        return templates.TemplateResponse(
+            "analysis.html",
+            {**context, "resources": [], "jobs": [], "suggestions_error": "No skills provided for analysis.",
+             "jobs_error": "No skills provided for job matching"},
+        )
+
+    # Both halves already produced by the single-call /analyze
+    analysis = await fused_analyzer.load(form.get("analysis_id"))
+    if analysis is not None:
+        return templates.TemplateResponse(
+            "analysis.html",
+            {**context, "resources": await suggestion_resources(analysis.suggestions), "jobs": job_cards(analysis.jobs)},
+        )
+
+    if not OPENROUTER_API_KEY:
+        return templates.TemplateResponse(
+            "analysis.html",
+            {**context, "resources": [], "jobs": [], "suggestions_error": "OpenRouter API key not configured.",
+             "jobs_error": "OpenRouter API key not configured"},
+        )
+
+    (suggested, suggestions_error, suggestions_time), (matched, jobs_error, jobs_time) = await asyncio.gather(
+        run_branch("suggestions", suggestion_branch(skills), settings.ANALYZE_SUGGESTIONS_TIMEOUT),
+        run_branch("jobs", job_match_branch(skills), settings.ANALYZE_JOBS_TIMEOUT),
+    )
+
+    response = templates.TemplateResponse(
+        "analysis.html",
+        {
+            **context,
+            "suggestions": suggested["suggestions"] if suggested else "",
+            "resources": suggested["resources"] if suggested else [],
+            "suggestions_error": suggestions_error,
+            "jobs": matched["jobs"] if matched else [],
+            "jobs_error": jobs_error,
+        },
+    )
+    response.headers["Server-Timing"] = f"suggestions;dur={suggestions_time * 1000:.0f}, jobs;dur={jobs_time * 1000:.0f}"
+    return response
+
+
 # ==================== NEW AUTHENTICATION ROUTES ====================
 
 @app.post("/auth/register", response_class=HTMLResponse)
@@ -1093,11 +1469,12 @@ async def login_user(request: Request, email: str = Form(...), password: str = F
         # Create access token
         access_token = create_user_token(user)
         
-        # Store token in session (you might want to use cookies instead)
+        # Store token in the session cookie
         response = templates.TemplateResponse(
             "dashboard.html",
             {"request": request, "user": user.dict(), "token": access_token}
         )
+        set_session_cookie(response, access_token)
         
         return response
     
@@ -1140,6 +1517,9 @@ async def github_callback(request: Request, code: str = None, state: str = None)
                 {"request": request, "error": "Failed to get GitHub profile"}
             )
         
+        # Fetch profile, repositories and top READMEs into the cache in the background
+        github_prewarmer.start(github_profile.login, access_token)
+
         # Check if user exists in our database
         user = await db.get_user_by_email(f"{github_profile.login}@github.com")
         
@@ -1178,7 +1558,7 @@ async def github_callback(request: Request, code: str = None, state: str = None)
             )
         access_token_jwt = create_user_token(user_obj)
         
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             "dashboard.html",
             {
                 "request": request,
@@ -1187,6 +1567,8 @@ async def github_callback(request: Request, code: str = None, state: str = None)
                 "github_profile": github_profile.dict()
             }
         )
+        set_session_cookie(response, access_token_jwt)
+        return response
     
     except Exception as e:
         return templates.TemplateResponse(
@@ -1232,6 +1614,8 @@ async def save_analysis(
             "extracted_skills": analysis_data.get("extracted_skills", []),
             "job_matches": analysis_data.get("job_matches", []),
             "skill_suggestions": analysis_data.get("skill_suggestions", []),
+            "repo_fingerprints": analysis_data.get("repo_fingerprints", {}),
+            "repo_skills": analysis_data.get("repo_skills", {}),
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat(),
             "is_public": False
@@ -1243,6 +1627,32 @@ async def save_analysis(
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.post("/analyses/{analysis_id}/reanalyze", response_class=JSONResponse)
+async def reanalyze_analysis(
+    analysis_id: str,
+    options: Optional[dict] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Refresh a saved analysis, re-fetching and re-extracting only the repositories
+    whose pushed_at / README changed since it was stored.
+    Body (optional): {"token": "<GitHub token>"}
+    """
+    analysis = await db.get_analysis_by_id(analysis_id)
+    if not analysis or str(analysis.get("user_id")) != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    try:
+        result = await reanalysis_service.reanalyze(analysis, (options or {}).get("token"), extract_repo_skills)
+        summary = result.pop("summary")
+        await db.update_analysis(analysis_id, {**result, "updated_at": datetime.utcnow().isoformat()})
+        return {"success": True, "analysis_id": analysis_id, "extracted_skills": result["extracted_skills"], **summary}
+
+    except (GitHubError, LLMError) as e:
+        return {"success": False, "error": e.message}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 # ==================== EXPORT ROUTES ====================
 
 @app.post("/export/pdf", response_class=FileResponse)
@@ -1338,96 +1748,14 @@ async def export_react_portfolio(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# ==================== UPDATED EXISTING ROUTES WITH CACHING ====================
-
-@app.post("/fetch-profile", response_class=HTMLResponse)
-async def fetch_profile(request: Request, username: str = Form(...), token: str = Form(...)):
-    """
-    Fetches GitHub profile and repository data for the given username and token.
-    Now includes caching for better performance.
-    """
-    try:
-        # Check cache first
-        cached_profile = await cache_service.get_github_profile(username)
-        cached_repos = await cache_service.get_github_repos(username)
-        
-        if cached_profile and cached_repos:
-            return templates.TemplateResponse(
-                "index.html",
-                {
-                    "request": request,
-                    "profile": cached_profile,
-                    "repos": cached_repos,
-                    "token": token,
-                },
-            )
-        
-        # Set up GitHub API headers with the provided token
-        headers = {"Authorization": f"token {token}"}
-        
-        # Make concurrent requests to GitHub API for profile and repositories
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            profile_resp = await client.get(
-                f"https://api.github.com/users/{username}", headers=headers
-            )
-            repos_resp = await client.get(
-                f"https://api.github.com/users/{username}/repos", headers=headers
-            )
-
-        # Check if profile fetch was successful
-        if profile_resp.status_code != 200:
-            error_message = "Invalid credentials or user not found"
-            if profile_resp.status_code == 404:
-                error_message = "User not found. Please check the username."
-            elif profile_resp.status_code == 401:
-                error_message = "Invalid GitHub token. Please check your token."
-            elif profile_resp.status_code == 403:
-                error_message = "API rate limit exceeded. Please try again later."
-            
-            return templates.TemplateResponse(
-                "index.html",
-                {"request": request, "error": error_message},
-            )
-
-        # Parse JSON responses
-        try:
-            profile_data = profile_resp.json()
-            repos_data = repos_resp.json()
-        except json.JSONDecodeError:
-            return templates.TemplateResponse(
-                "index.html",
-                {"request": request, "error": "Invalid response from GitHub API"},
-            )
-
-        # Cache the results
-        await cache_service.set_github_profile(username, profile_data)
-        await cache_service.set_github_repos(username, repos_data)
+# ==================== ADMIN ROUTES ====================
 
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                "profile": profile_data,
-                "repos": repos_data,
-                "token": token,  # Pass token to next step
-            },
-        )
-    
-    except httpx.TimeoutException:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "error": "Request timeout. Please try again."},
-        )
-    except httpx.RequestError as e:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "error": f"Network error: {str(e)}"},
-        )
-    except Exception as e:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "error": f"An unexpected error occurred: {str(e)}"},
-        )
+@app.get("/admin/github/rate-limits", response_class=JSONResponse)
+async def github_rate_limits(current_user: User = Depends(get_current_active_user)):
+    """Per-token GitHub rate-limit budgets tracked by the request scheduler"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return {"tokens": github_rate_limiter.snapshot()}
 
 # Main execution block - starts the FastAPI server
 if __name__ == "__main__":
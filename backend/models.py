@@ -42,6 +42,8 @@ class AnalysisBase(BaseModel):
     extracted_skills: List[str]
     job_matches: List[Dict[str, Any]]
     skill_suggestions: List[Dict[str, Any]]
+    repo_fingerprints: Dict[str, Dict[str, Any]] = {}  # repo -> {"pushed_at", "readme_sha"}
+    repo_skills: Dict[str, List[str]] = {}  # repo -> skills extracted from its README
 
 class AnalysisCreate(AnalysisBase):
     pass
@@ -0,0 +1,192 @@
+"""
+Benchmark the incremental JSON parser (stream_parsing) against the regex
+cascade it replaced, on recorded LLM completions.
+
+A corpus is JSONL, one completion per line: {"kind": "skills" | "jobs",
+"content": "..."} (kind defaults to "jobs" when the content mentions a "jobs"
+key). Without files, --synthetic builds one from the shapes models actually
+answer with: fenced, chatty, trailing commas, bare words, plain lines.
+
+For each parser it reports throughput, how many completions yield items and
+how many items, and how far into a streamed completion (fed in --delta-sized
+pieces) the first item is available; the cascade always needs all of it.
+
+    python parser_benchmark.py recorded.jsonl
+    python parser_benchmark.py --synthetic 2000 --delta 16
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from skill_taxonomy import local_skill_extractor
+from stream_parsing import JsonItemStream, parse_json_items
+
+
+def regex_skill_list(content: str) -> List:
+    """The cascade parse_skill_list used before: strip fences, json.loads, `\\[.*\\]`, then lines"""
+    clean_content = re.sub(r'```(?:json)?\n(.*?)\n```', r'\1', content, flags=re.DOTALL).strip()
+    try:
+        skills = json.loads(clean_content)
+    except json.JSONDecodeError:
+        match = re.search(r'\[.*\]', clean_content, re.DOTALL)
+        try:
+            skills = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            skills = None
+        if skills is None:
+            skills = [s.strip(" \"'-,") for s in clean_content.split('\n') if s.strip()]
+    if not isinstance(skills, list):
+        skills = [skills]
+    return [skill for skill in skills if skill]
+
+
+def regex_jobs(content: str) -> List:
+    """What match_jobs did before: strip fences twice, json.loads, take "jobs" (nothing on failure)"""
+    try:
+        ai_content = re.sub(r'```(?:json)?\n(.*?)\n```', r'\1', content.strip(), flags=re.DOTALL).strip()
+        ai_content = re.sub(r"^```json|```$", "", ai_content, flags=re.MULTILINE).strip()
+        return [job for job in json.loads(ai_content).get("jobs", []) if isinstance(job, dict)]
+    except Exception:
+        return []
+
+
+def incremental_skill_list(content: str) -> List:
+    items = parse_json_items(content)
+    if items is None:
+        items = [s.strip(" \"'-,") for s in content.split("\n") if s.strip() and not s.strip().startswith("```")]
+    return [item for item in items if item]
+
+
+def incremental_jobs(content: str) -> List:
+    return [job for job in parse_json_items(content, "jobs") or [] if isinstance(job, dict)]
+
+
+PARSERS: Dict[str, Dict[str, Callable[[str], List]]] = {
+    "skills": {"regex cascade": regex_skill_list, "incremental": incremental_skill_list},
+    "jobs": {"regex cascade": regex_jobs, "incremental": incremental_jobs},
+}
+
+
+def load_corpus(paths: List[str]) -> List[dict]:
+    corpus = []
+    for path in paths:
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            content = record.get("content", "")
+            kind = record.get("kind") or ("jobs" if '"jobs"' in content else "skills")
+            corpus.append({"kind": kind, "content": content})
+    return corpus
+
+
+def synthetic_corpus(size: int, seed: int = 7) -> List[dict]:
+    """Completions in the shapes models answer with, built from taxonomy skills"""
+    rng = random.Random(seed)
+    names = sorted(local_skill_extractor.categories)
+    companies = ["Netflix", "Stripe", "Shopify", "Spotify", "Atlassian", "GitLab", "Canonical", "Datadog"]
+    titles = ["Backend Engineer", "Data Engineer", "DevOps Engineer", "Full Stack Developer", "ML Engineer"]
+
+    def wrap(body: str) -> str:
+        shape = rng.choice(["plain", "fenced", "chatty", "chatty_fenced", "trailing_commas"])
+        if shape == "fenced":
+            return f"```json\n{body}\n```"
+        if shape == "chatty":
+            return f"Sure! Here is the result:\n\n{body}\n\nLet me know if you need anything else."
+        if shape == "chatty_fenced":
+            return f"Based on the READMEs, here you go:\n```json\n{body}\n```\nThese reflect the projects' stacks."
+        if shape == "trailing_commas":
+            return re.sub(r"(\S)(\n\s*[\]}])", r"\1,\2", body)
+        return body
+
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.5:
+            skills = rng.sample(names, rng.randint(5, 40))
+            shape = rng.random()
+            if shape < 0.1:
+                content = "\n".join(f"- {skill}" for skill in skills)
+            elif shape < 0.2:
+                content = "[" + ", ".join(skills) + "]"
+            else:
+                content = wrap(json.dumps(skills, indent=rng.choice([None, 2])))
+            corpus.append({"kind": "skills", "content": content})
+        else:
+            jobs = [
+                {
+                    "title": rng.choice(titles),
+                    "description": f"Build services with {', '.join(rng.sample(names, 2))}.",
+                    "skills": rng.sample(names, rng.randint(3, 5)),
+                    "company": rng.choice(companies),
+                }
+                for _ in range(4)
+            ]
+            corpus.append({"kind": "jobs", "content": wrap(json.dumps({"jobs": jobs}, indent=2))})
+    return corpus
+
+
+def first_item_at(content: str, kind: str, delta: int) -> Optional[float]:
+    """Share of the completion streamed before the incremental parser has its first item"""
+    stream = JsonItemStream("jobs" if kind == "jobs" else None)
+    for start in range(0, len(content), delta):
+        if stream.feed(content[start:start + delta]):
+            return min(1.0, (start + delta) / len(content))
+    return 1.0 if stream.close() else None
+
+
+def chunked(content: str, kind: str, delta: int) -> Optional[List]:
+    stream = JsonItemStream("jobs" if kind == "jobs" else None)
+    items = []
+    for start in range(0, len(content), delta):
+        items += stream.feed(content[start:start + delta])
+    items += stream.close()
+    return items if stream.found else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="JSONL files of recorded completions")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N", help="add N generated completions")
+    parser.add_argument("--delta", type=int, default=16, help="characters per streamed delta")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.paths) + synthetic_corpus(args.synthetic or (0 if args.paths else 2000))
+    if not corpus:
+        parser.error("no completions")
+
+    for kind, parsers in PARSERS.items():
+        completions = [record["content"] for record in corpus if record["kind"] == kind]
+        if not completions:
+            continue
+        size = sum(map(len, completions))
+        print(f"\n{kind}: {len(completions)} completions ({size / 1e3:.0f} KB)")
+        for name, parse in parsers.items():
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                results = [parse(content) for content in completions]
+            elapsed = (time.perf_counter() - started) / args.repeat
+            parsed = sum(1 for items in results if items)
+            print(f"  {name:<14} {len(completions) / elapsed:>9.0f} completions/s  "
+                  f"{size / elapsed / 1e6:>6.1f} MB/s  parsed {parsed}/{len(completions)}  "
+                  f"items {sum(map(len, results))}")
+
+        started = time.perf_counter()
+        streamed = [chunked(content, kind, args.delta) for content in completions]
+        elapsed = time.perf_counter() - started
+        same = sum(1 for content, items in zip(completions, streamed) if items == parse_json_items(content, "jobs" if kind == "jobs" else None))
+        print(f"  {'streamed':<14} {len(completions) / elapsed:>9.0f} completions/s  "
+              f"{size / elapsed / 1e6:>6.1f} MB/s  ({args.delta}-char deltas, same items as one pass: {same}/{len(completions)})")
+
+        shares = sorted(share for share in (first_item_at(c, kind, args.delta) for c in completions) if share is not None)
+        if shares:
+            print(f"  first item after {shares[len(shares) // 2] * 100:.0f}% of the completion (median), "
+                  f"p90 {shares[int(len(shares) * 0.9)] * 100:.0f}%; the cascade needs 100%")
+
+
+if __name__ == "__main__":
+    main()
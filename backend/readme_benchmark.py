@@ -0,0 +1,108 @@
+"""
+Benchmark README preprocessing on a corpus of real READMEs.
+
+Reports the estimated prompt tokens before and after preprocessing, how much
+each rule contributes (the corpus re-run without it), how many taxonomy skills
+survive, and the throughput.
+
+    python readme_benchmark.py path/to/readmes/ other/README.md
+    python readme_benchmark.py --github fastapi/fastapi pallets/flask vercel/next.js
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from readme_preprocessing import ReadmePreprocessor
+from skill_extraction import estimate_tokens
+from skill_taxonomy import local_skill_extractor
+
+
+def load_files(paths: List[str]) -> Dict[str, str]:
+    """README*.md files under the given files/directories"""
+    corpus = {}
+    for path in map(Path, paths):
+        files = [path] if path.is_file() else sorted(path.rglob("README*.md")) + sorted(path.rglob("readme*.md"))
+        for file in files:
+            try:
+                corpus[str(file)] = file.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+    return corpus
+
+
+def load_github(repos: List[str]) -> Dict[str, str]:
+    """READMEs of public repositories (owner/name), downloaded as raw markdown"""
+    corpus = {}
+    with httpx.Client(timeout=20, follow_redirects=True) as client:
+        for repo in repos:
+            response = client.get(
+                f"https://api.github.com/repos/{repo}/readme",
+                headers={"Accept": "application/vnd.github.raw+json"},
+            )
+            if response.status_code == 200:
+                corpus[repo] = response.text
+            else:
+                print(f"⚠️ {repo}: HTTP {response.status_code}", file=sys.stderr)
+    return corpus
+
+
+def run(preprocessor: ReadmePreprocessor, corpus: Dict[str, str]) -> Dict[str, str]:
+    return {name: preprocessor.preprocess(text) for name, text in corpus.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="README files or directories searched for README*.md")
+    parser.add_argument("--github", nargs="*", default=[], metavar="OWNER/REPO", help="download these READMEs")
+    parser.add_argument("--code-lines", type=int, default=None, help="README_CODE_BLOCK_LINES to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_files(args.paths)
+    corpus.update(load_github(args.github))
+    corpus = {name: text for name, text in corpus.items() if text.strip()}
+    if not corpus:
+        parser.error("no READMEs found")
+
+    full = ReadmePreprocessor(["all"], args.code_lines)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        prepared = run(full, corpus)
+    elapsed = (time.perf_counter() - started) / args.repeat
+
+    before = {name: estimate_tokens(text) for name, text in corpus.items()}
+    after = {name: estimate_tokens(text) for name, text in prepared.items()}
+    total_before, total_after = sum(before.values()), sum(after.values())
+    per_readme = [1 - after[name] / before[name] for name in corpus if before[name]]
+
+    print(f"READMEs:              {len(corpus)} ({sum(map(len, corpus.values())) / 1e6:.1f} MB)")
+    print(f"Estimated tokens:     {total_before} -> {total_after} ({(1 - total_after / total_before) * 100:.1f}% fewer)")
+    print(f"Per README reduction: median {statistics.median(per_readme) * 100:.1f}%, "
+          f"p90 {sorted(per_readme)[int(len(per_readme) * 0.9)] * 100:.1f}%")
+    print(f"Throughput:           {len(corpus) / elapsed:.0f} READMEs/s ({elapsed * 1000:.1f} ms per corpus run)")
+
+    # Skill signal: taxonomy hits that survive preprocessing
+    kept = found = 0
+    for name, text in corpus.items():
+        skills = set(local_skill_extractor.extract(text))
+        found += len(skills)
+        kept += len(skills & set(local_skill_extractor.extract(prepared[name])))
+    if found:
+        print(f"Taxonomy skills kept: {kept}/{found} ({kept / found * 100:.1f}%)")
+
+    # What each rule is worth: tokens that come back when it is left out
+    print("\nRule contributions (extra tokens without the rule):")
+    rules = list(ReadmePreprocessor.RULES) + ["code"]
+    for rule in rules:
+        without = ReadmePreprocessor([r for r in rules if r != rule], args.code_lines)
+        tokens = sum(estimate_tokens(text) for text in run(without, corpus).values())
+        print(f"  {rule:<14} +{tokens - total_after:>9} ({(tokens - total_after) / total_before * 100:.1f}% of input)")
+
+
+if __name__ == "__main__":
+    main()
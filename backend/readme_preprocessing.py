@@ -0,0 +1,169 @@
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+from config import settings
+
+FENCE_PATTERN = re.compile(r"^(?P<fence>```+|~~~+)[ \t]*(?P<lang>[\w+#.-]*)[^\n]*\n(?P<body>.*?)^(?P=fence)[ \t]*$", re.MULTILINE | re.DOTALL)
+BASE64_PATTERN = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=\s]{16,}")
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+BADGE_HOSTS = r"(?:shields\.io|badge|badgen\.net|travis-ci|circleci|codecov|coveralls|github\.com/[^)\s]+/(?:workflows|actions)/|pepy\.tech|badge\.fury\.io|img\.shields|ci\.appveyor|sonarcloud)"
+# [![alt](badge image)](link) and bare ![alt](badge image)
+LINKED_BADGE_PATTERN = re.compile(r"\[!\[([^\]]*)\]\([^)]*\)\]\([^)]*\)")
+BADGE_PATTERN = re.compile(r"!\[([^\]]*)\]\([^)]*" + BADGE_HOSTS + r"[^)]*\)", re.IGNORECASE)
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+HTML_IMG_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+HTML_ALT_PATTERN = re.compile(r"\balt\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+HTML_TAG_PATTERN = re.compile(r"</?[a-zA-Z][^>]*>")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\]]+)\]\((?:[^()\s]|\([^)]*\))+\)")
+REFERENCE_LINK_PATTERN = re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$", re.MULTILINE)
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$", re.MULTILINE)
+# The whole heading must name the license ("License", "📄 License & Credits"), not merely contain the word
+LICENSE_HEADING = re.compile(r"^\W*(?:licen[cs]e|copyright)(?:\s+(?:and|&)\s+\w+)?\W*$", re.IGNORECASE)
+LICENSE_TEXT_PATTERN = re.compile(
+    r"(?:Permission is hereby granted|THE SOFTWARE IS PROVIDED \"AS IS\"|Licensed under the Apache License"
+    r"|This program is free software|GNU GENERAL PUBLIC LICENSE).*?(?:\n\s*\n|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+TABLE_RULE_PATTERN = re.compile(r"^[ \t]*\|?[ \t]*:?-{3,}:?[ \t]*(?:\|[ \t]*:?-{3,}:?[ \t]*)*\|?[ \t]*\n", re.MULTILINE)
+SEPARATOR_PATTERN = re.compile(r"^\s*([-*_=])\1{2,}\s*$", re.MULTILINE)
+
+
+def _alt_text(alt: Optional[str]) -> str:
+    """Alt text worth keeping ("Python 3.11", "Docker") as a short marker"""
+    alt = (alt or "").strip()
+    return f"[{alt}]" if alt and len(alt) <= 60 else ""
+
+
+def strip_base64(text: str) -> str:
+    return BASE64_PATTERN.sub("", text)
+
+
+def strip_html_comments(text: str) -> str:
+    return HTML_COMMENT_PATTERN.sub("", text)
+
+
+def summarize_badges(text: str) -> str:
+    """Badges become their alt text: "[![Python 3.11](shields...)](...)" -> "[Python 3.11]" """
+    text = LINKED_BADGE_PATTERN.sub(lambda m: _alt_text(m.group(1)), text)
+    return BADGE_PATTERN.sub(lambda m: _alt_text(m.group(1)), text)
+
+
+def summarize_images(text: str) -> str:
+    return IMAGE_PATTERN.sub(lambda m: _alt_text(m.group(1)), text)
+
+
+def strip_html(text: str) -> str:
+    """HTML tags go, their text stays (`<img>` keeps its alt text)"""
+    def alt(match: re.Match) -> str:
+        found = HTML_ALT_PATTERN.search(match.group(0))
+        return _alt_text(found.group(1) if found else None)
+
+    text = HTML_IMG_PATTERN.sub(alt, text)
+    return HTML_TAG_PATTERN.sub("", text)
+
+
+def strip_link_targets(text: str) -> str:
+    """`[FastAPI](https://...)` -> `FastAPI`; reference-style link definitions are dropped"""
+    text = LINK_PATTERN.sub(r"\1", text)
+    return REFERENCE_LINK_PATTERN.sub("", text)
+
+
+def strip_license(text: str) -> str:
+    """License sections and pasted license texts carry no skills; keep only the heading"""
+    headings = list(HEADING_PATTERN.finditer(text))
+    for i in reversed(range(len(headings))):
+        heading = headings[i]
+        if not LICENSE_HEADING.search(heading.group(2)):
+            continue
+        level = len(heading.group(1))
+        end = len(text)
+        for following in headings[i + 1:]:
+            if len(following.group(1)) <= level:
+                end = following.start()
+                break
+        text = text[:heading.end()] + "\n\n" + text[end:]
+    return LICENSE_TEXT_PATTERN.sub("", text)
+
+
+def tidy_whitespace(text: str) -> str:
+    """Drop table rules and separators, trailing spaces and runs of blank lines"""
+    text = TABLE_RULE_PATTERN.sub("", text)
+    text = SEPARATOR_PATTERN.sub("", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+class ReadmePreprocessor:
+    """
+    Shrinks README markdown before it is prompted: drops or summarizes what
+    costs tokens but carries no skill signal (badges, images, base64 data,
+    HTML, link targets, license text) and cuts long code listings down to
+    their first lines, keeping the fence language as a hint
+    ("```python ... (120 more lines)").
+
+    Rules run in a fixed order; README_PREPROCESS_RULES picks which of them run.
+    Fenced code is set aside first so no rule rewrites code.
+    """
+
+    RULES: Dict[str, Callable[[str], str]] = {
+        "base64": strip_base64,
+        "html_comments": strip_html_comments,
+        "badges": summarize_badges,
+        "images": summarize_images,
+        "html": strip_html,
+        "links": strip_link_targets,
+        "license": strip_license,
+    }
+
+    def __init__(self, rules: Optional[Iterable[str]] = None, code_block_lines: Optional[int] = None):
+        if rules is None:
+            rules = [rule.strip() for rule in settings.README_PREPROCESS_RULES.split(",") if rule.strip()]
+        rules = list(rules)
+        self.rules = [rule for rule in self.RULES if rule in rules or "all" in rules]
+        self.trim_code = "code" in rules or "all" in rules
+        self.code_block_lines = settings.README_CODE_BLOCK_LINES if code_block_lines is None else code_block_lines
+        self.enabled = bool(self.rules or self.trim_code)
+        self.counts = Counter()
+
+    @property
+    def signature(self) -> str:
+        """Identifies the rule set, so results of different settings never share a cache entry"""
+        code = f"code{self.code_block_lines}" if self.trim_code else ""
+        return ",".join(self.rules + ([code] if code else []))
+
+    def _code_block(self, match: re.Match) -> str:
+        lang = match.group("lang")
+        lines = match.group("body").rstrip("\n").split("\n")
+        if self.trim_code and len(lines) > self.code_block_lines:
+            self.counts["code_blocks_trimmed"] += 1
+            more = len(lines) - self.code_block_lines
+            lines = lines[:self.code_block_lines] + [f"... ({more} more lines{' of ' + lang if lang else ''})"]
+        return f"```{lang}\n" + "\n".join(lines) + "\n```"
+
+    def preprocess(self, text: str) -> str:
+        if not self.enabled or not text:
+            return text
+        self.counts["readmes"] += 1
+
+        # Set fenced code aside (placeholders survive every rule untouched)
+        blocks: List[str] = []
+
+        def stash(match: re.Match) -> str:
+            blocks.append(self._code_block(match))
+            return f"\n\x00{len(blocks) - 1}\x00\n"
+
+        text = FENCE_PATTERN.sub(stash, text)
+        for rule in self.rules:
+            text = self.RULES[rule](text)
+        text = tidy_whitespace(text)
+        return re.sub(r"\x00(\d+)\x00", lambda m: blocks[int(m.group(1))], text)
+
+    def preprocess_many(self, readmes: Dict[str, str]) -> Dict[str, str]:
+        return {repo: self.preprocess(text) for repo, text in readmes.items()}
+
+    def stats(self) -> dict:
+        return {"rules": self.signature, **self.counts}
+
+
+# Global instance
+readme_preprocessor = ReadmePreprocessor()
@@ -0,0 +1,150 @@
+import hashlib
+import re
+from typing import Awaitable, Callable, Dict, List, Optional
+from github_service import github_service
+from github_errors import GitHubNotFoundError
+from skill_taxonomy import local_skill_extractor
+
+# Extracts skills per repository from {repo: README text}
+SkillExtractor = Callable[[Dict[str, str]], Awaitable[Dict[str, List[str]]]]
+
+
+class ReanalysisService:
+    """
+    Refreshes a saved analysis by reprocessing only the repositories that
+    changed since it was stored.
+
+    Each analysis keeps a fingerprint per repository (`pushed_at` and the git
+    blob SHA of its README) and the skills extracted from it. A repository is
+    re-fetched only when its pushed_at moved, and re-extracted only when its
+    README content changed too.
+    """
+
+    @staticmethod
+    def readme_sha(content: str) -> str:
+        """Git blob SHA of the README text (the `sha` GitHub reports for the file)"""
+        data = content.encode("utf-8")
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+    def fingerprints(self, readmes: Dict[str, str], pushed_at: Dict[str, Optional[str]]) -> Dict[str, dict]:
+        """Fingerprint per analysed repository, stored with a new analysis"""
+        return {
+            repo: {"pushed_at": pushed_at.get(repo), "readme_sha": self.readme_sha(text)}
+            for repo, text in readmes.items()
+        }
+
+    @staticmethod
+    def attribute_skills(skills: List[str], readmes: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Per-repository skills for an analysis that only produced one merged list
+        (the fused call): each skill goes to the READMEs that mention it, by name
+        or through a taxonomy alias. Unattributed skills stay on the analysis and
+        survive re-analysis.
+        """
+        patterns = {skill: re.compile(rf"(?<![\w+#]){re.escape(skill)}(?![\w+#])", re.IGNORECASE) for skill in skills}
+        attributed = {}
+        for repo, text in readmes.items():
+            known = set(local_skill_extractor.extract(text))
+            attributed[repo] = [skill for skill, pattern in patterns.items() if skill in known or pattern.search(text)]
+        return attributed
+
+    @staticmethod
+    def merge_skills(
+        previous: List[str],
+        previous_repo_skills: Dict[str, List[str]],
+        repo_skills: Dict[str, List[str]],
+    ) -> List[str]:
+        """
+        Merge refreshed per-repository skills into the earlier skill list.
+        Skills no repository produced before (e.g. measured languages) are kept;
+        skills that only came from changed repositories are dropped when those
+        repositories no longer mention them. Earlier order is preserved.
+        """
+        old_attributed = {skill.lower() for skills in previous_repo_skills.values() for skill in skills}
+        new_attributed = {skill.lower() for skills in repo_skills.values() for skill in skills}
+
+        merged, seen = [], set()
+        for skill in previous:
+            key = skill.lower()
+            if key in seen or (key in old_attributed and key not in new_attributed):
+                continue
+            merged.append(skill)
+            seen.add(key)
+        for skills in repo_skills.values():
+            for skill in skills:
+                if skill.lower() not in seen:
+                    merged.append(skill)
+                    seen.add(skill.lower())
+        return merged
+
+    async def reanalyze(self, analysis: dict, token: Optional[str], extract: SkillExtractor) -> dict:
+        """
+        Re-run skill extraction for a saved `analyses` row.
+        Returns the fields to store back on the row plus a per-repository summary.
+        """
+        username = analysis["github_username"]
+        selected = list(analysis.get("selected_repos") or [])
+        old_fingerprints: Dict[str, dict] = analysis.get("repo_fingerprints") or {}
+        old_repo_skills: Dict[str, List[str]] = analysis.get("repo_skills") or {}
+
+        # One (ETag-revalidated) listing gives every repository's pushed_at
+        listing = await github_service.fetch_user_repositories(username, token)
+        pushed_at = {repo["name"]: repo.get("pushed_at") for repo in listing}
+
+        removed = [repo for repo in selected if repo not in pushed_at]
+        pushed = [
+            repo for repo in selected
+            if repo in pushed_at
+            and (repo not in old_fingerprints or repo not in old_repo_skills
+                 or old_fingerprints[repo].get("pushed_at") != pushed_at[repo])
+        ]
+        unchanged = [repo for repo in selected if repo in pushed_at and repo not in pushed]
+
+        readmes, errors, _ = await github_service.load_readmes(username, token, pushed, pushed_at) if pushed else ({}, {}, [])
+
+        fingerprints = {repo: old_fingerprints[repo] for repo in unchanged}
+        repo_skills = {repo: old_repo_skills[repo] for repo in unchanged}
+        to_extract: Dict[str, str] = {}
+        readme_unchanged, failed = [], []
+        for repo in pushed:
+            error = errors.get(repo)
+            if error is not None and not isinstance(error, GitHubNotFoundError):
+                # Transient failure: keep what we had and try again next time
+                failed.append(repo)
+                if repo in old_fingerprints:
+                    fingerprints[repo] = old_fingerprints[repo]
+                    repo_skills[repo] = old_repo_skills.get(repo, [])
+                continue
+
+            sha = None if error is not None else self.readme_sha(readmes[repo])
+            fingerprints[repo] = {"pushed_at": pushed_at[repo], "readme_sha": sha}
+            if sha is None:
+                repo_skills[repo] = []
+            elif sha == old_fingerprints.get(repo, {}).get("readme_sha") and repo in old_repo_skills:
+                readme_unchanged.append(repo)
+                repo_skills[repo] = old_repo_skills[repo]
+            else:
+                to_extract[repo] = readmes[repo]
+
+        if to_extract:
+            extracted = await extract(to_extract)
+            for repo in to_extract:
+                repo_skills[repo] = list(extracted.get(repo, []))
+
+        return {
+            "extracted_skills": self.merge_skills(analysis.get("extracted_skills") or [], old_repo_skills, repo_skills),
+            "repo_fingerprints": fingerprints,
+            "repo_skills": repo_skills,
+            "summary": {
+                "unchanged": unchanged,
+                "readme_unchanged": readme_unchanged,
+                "reextracted": list(to_extract),
+                "removed": removed,
+                "failed": failed,
+                "readmes_fetched": len(pushed),
+            },
+        }
+
+
+# Global instance
+reanalysis_service = ReanalysisService()
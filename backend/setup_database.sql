@@ -28,12 +28,18 @@ CREATE TABLE IF NOT EXISTS analyses (
     extracted_skills JSONB DEFAULT '[]',
     job_matches JSONB DEFAULT '[]',
     skill_suggestions JSONB DEFAULT '[]',
+    repo_fingerprints JSONB DEFAULT '{}',
+    repo_skills JSONB DEFAULT '{}',
     is_public BOOLEAN DEFAULT false,
     public_link VARCHAR(255) UNIQUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Per-repository fingerprints and skills for incremental re-analysis (existing installs)
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS repo_fingerprints JSONB DEFAULT '{}';
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS repo_skills JSONB DEFAULT '{}';
+
 -- Portfolio exports table
 CREATE TABLE IF NOT EXISTS portfolio_exports (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
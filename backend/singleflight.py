@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from database import cache
+from config import settings
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same time.
+
+    Within one process, concurrent callers with the same key await the same
+    task. Across worker processes the first caller takes a Redis lease
+    (`SET NX`) and publishes its result under the key for a few seconds; the
+    others poll for it instead of calling upstream themselves. Only results are
+    shared: when the leader fails, or its lease lapses, a waiting caller runs
+    the call itself. If Redis is unavailable every process simply runs its own
+    call.
+    """
+
+    def __init__(self, prefix: str, lease: float, result_ttl: int, poll_interval: float = 0.5):
+        self.redis = cache.redis
+        self.prefix = prefix
+        self.lease = max(1, int(lease))
+        self.result_ttl = max(1, result_ttl)
+        self.poll_interval = poll_interval
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.counts = Counter()
+
+    @staticmethod
+    def key_for(data: Any) -> str:
+        """Stable hash of any JSON-serializable call description"""
+        return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    async def do(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        rerun_on: Callable[[Exception], bool] = lambda e: True,
+        wait_timeout: Optional[float] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Run `call()` unless an identical call is already in flight; returns
+        (result, shared). When the call we joined fails with an error for which
+        `rerun_on` is true, run it again instead of passing that error on.
+        Waiting on another process longer than `wait_timeout` raises
+        asyncio.TimeoutError.
+        """
+        while True:
+            task = self.inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._lead(key, call, wait_timeout))
+                self.inflight[key] = task
+                task.add_done_callback(lambda done: self._finished(key, done))
+                # Shielded: a caller giving up must not cancel the call for the others
+                return await asyncio.shield(task)
+
+            try:
+                result, _ = await asyncio.shield(task)
+            except Exception as e:
+                if not rerun_on(e):
+                    raise
+                self.counts["reruns"] += 1
+                continue
+            self.counts["coalesced_local"] += 1
+            return result, True
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            self.inflight.pop(key, None)
+        # Every caller may have given up (timeouts): mark the error as seen so it is not logged as lost
+        if not task.cancelled():
+            task.exception()
+
+    async def _lead(self, key: str, call: Callable[[], Awaitable[Any]], wait_timeout: Optional[float]) -> Tuple[Any, bool]:
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+        started = time.monotonic()
+        delay = 0.05
+        while True:
+            published = self._get(result_key)
+            if published is not None:
+                self.counts["coalesced_remote"] += 1
+                return published, True
+
+            owner = self._acquire(lock_key)
+            if owner:
+                break
+            if wait_timeout is not None and time.monotonic() - started + delay > wait_timeout:
+                raise asyncio.TimeoutError()
+            # Another process is running it: wait for its result or for its lease to lapse
+            await asyncio.sleep(delay)
+            delay = min(self.poll_interval, delay * 2)
+
+        self.counts["leaders"] += 1
+        try:
+            result = await call()
+            self._publish(result_key, result)
+            return result, False
+        finally:
+            self._release(lock_key, owner)
+
+    def _get(self, result_key: str) -> Optional[Any]:
+        try:
+            value = self.redis.get(result_key)
+            return json.loads(value) if value else None
+        except Exception as e:
+            self.counts["redis_errors"] += 1
+            print(f"Error reading singleflight result: {e}")
+            return None
+
+    def _acquire(self, lock_key: str) -> Optional[str]:
+        """Owner token when we hold the lease (also when Redis is down: run the call locally)"""
+        owner = uuid.uuid4().hex
+        try:
+            return owner if self.redis.set(lock_key, owner, nx=True, ex=self.lease) else None
+        except Exception as e:
+            self.counts["redis_errors"] += 1
+            print(f"Error taking singleflight lease: {e}")
+            return owner
+
+    def _publish(self, result_key: str, result: Any):
+        try:
+            self.redis.setex(result_key, self.result_ttl, json.dumps(result, default=str))
+        except Exception as e:
+            self.counts["redis_errors"] += 1
+            print(f"Error publishing singleflight result: {e}")
+
+    def _release(self, lock_key: str, owner: str):
+        try:
+            if self.redis.get(lock_key) == owner:
+                self.redis.delete(lock_key)
+        except Exception as e:
+            self.counts["redis_errors"] += 1
+            print(f"Error releasing singleflight lease: {e}")
+
+    def stats(self) -> dict:
+        return {
+            **self.counts,
+            "in_flight": len(self.inflight),
+            "duplicates_absorbed": self.counts["coalesced_local"] + self.counts["coalesced_remote"],
+        }
+
+
+# Shared by every OpenRouter chat completion; a lease never outlives one request's budget
+llm_singleflight = SingleFlight(
+    "llm_inflight",
+    lease=settings.LLM_REQUEST_BUDGET + 5,
+    result_ttl=settings.LLM_SINGLEFLIGHT_RESULT_TTL,
+)
@@ -0,0 +1,347 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from llm_client import llm_client, LLMError
+from llm_metrics import llm_metrics
+from cache_service import cache_service
+from skill_taxonomy import local_skill_extractor
+from readme_preprocessing import readme_preprocessor
+from stream_parsing import parse_json_items
+
+# Words, numbers and single punctuation marks: roughly what a BPE tokenizer splits on
+TOKEN_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+# Instructions and example around each chunk
+PROMPT_OVERHEAD_TOKENS = 120
+# Bump when the extraction prompt changes so cached skill lists are not reused
+SKILL_CACHE_VERSION = "skills-v2"
+# "local": taxonomy only, no LLM; "hybrid": taxonomy hits seed the prompt, the LLM adds the rest; "llm": LLM only
+EXTRACTION_MODES = ("local", "hybrid", "llm")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (no tokenizer download): long words count as one
+    token per ~4 characters, numbers per ~3 digits, punctuation as one each.
+    Tends to overestimate slightly, which keeps chunks on the safe side.
+    """
+    tokens = 0
+    for piece in TOKEN_PIECE_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += max(1, math.ceil(len(piece) / 4))
+        elif piece[0].isdigit():
+            tokens += max(1, math.ceil(len(piece) / 3))
+        else:
+            tokens += 1
+    return tokens
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Split a block that alone exceeds the budget: by lines first, then by characters"""
+    pieces, current, current_tokens = [], [], 0
+    for line in block.split("\n"):
+        line_tokens = estimate_tokens(line) + 1
+        if line_tokens > max_tokens:
+            if current:
+                pieces.append("\n".join(current))
+                current, current_tokens = [], 0
+            # ~4 characters per token
+            step = max_tokens * 4
+            pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if current and current_tokens + line_tokens > max_tokens:
+            pieces.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Pack paragraphs (blank-line separated blocks) into chunks of at most `max_tokens`"""
+    chunks, current, current_tokens = [], [], 0
+    for block in re.split(r"\n\s*\n", text):
+        if not block.strip():
+            continue
+        block_tokens = estimate_tokens(block) + 2
+        parts = [block] if block_tokens <= max_tokens else _split_oversized(block, max_tokens)
+        for part in parts:
+            part_tokens = estimate_tokens(part) + 2
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def parse_skill_list(content: str) -> List[str]:
+    """Read a JSON array of skills from a completion, tolerating code fences, trailing commas and chatter"""
+    skills = parse_json_items(content)
+    if skills is None:
+        # No JSON array at all: one skill per line
+        skills = [s.strip(" \"'-,") for s in content.split("\n") if s.strip() and not s.strip().startswith("```")]
+    return [str(skill) for skill in skills if skill]
+
+
+def normalize_skill(skill: str) -> str:
+    """Key used to de-duplicate skills: case, spacing and trailing punctuation ignored"""
+    return re.sub(r"\s+", " ", skill.strip().strip(".,;:*`\"'")).lower()
+
+
+def reduce_skills(skill_lists: List[List[str]]) -> List[str]:
+    """
+    Merge per-chunk skill lists: duplicates collapse to their first spelling and
+    skills found in more chunks come first (ties keep first-seen order).
+    """
+    counts: Counter = Counter()
+    spelling: Dict[str, str] = {}
+    for skills in skill_lists:
+        for skill in skills:
+            key = normalize_skill(skill)
+            if not key:
+                continue
+            spelling.setdefault(key, re.sub(r"\s+", " ", skill.strip().strip(".,;:*`\"'")))
+            counts[key] += 1
+    order = {key: i for i, key in enumerate(spelling)}
+    return [spelling[key] for key in sorted(spelling, key=lambda key: (-counts[key], order[key]))]
+
+
+def normalize_readme(text: str) -> str:
+    """Canonical README text for hashing: line endings, trailing spaces and blank runs don't matter"""
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def content_hash(text: str, model: str, mode: str = "llm") -> str:
+    """Cache key of a README's skill list: same normalized text, model and mode, same skills"""
+    data = f"{SKILL_CACHE_VERSION}\n{model}\n{mode}\n{normalize_readme(text)}"
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ExtractionResult:
+    """Merged skills of one extraction, plus what each repository and chunk produced"""
+
+    def __init__(
+        self,
+        skills: List[str],
+        repo_skills: Dict[str, List[str]],
+        raw: str,
+        chunks: int,
+        failed: int,
+        cache_hits: int = 0,
+        cache_misses: int = 0,
+        tokens_before: int = 0,
+        tokens_after: int = 0,
+        warning: str = "",
+    ):
+        self.skills = skills
+        self.repo_skills = repo_skills
+        self.raw = raw
+        self.chunks = chunks
+        self.failed = failed
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        # Estimated prompt tokens of the READMEs sent to the LLM, before and after preprocessing
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        # Set when some (not all) chunks failed and the skills may be incomplete
+        self.warning = warning
+
+    @property
+    def token_reduction(self) -> float:
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else 0.0
+
+
+class SkillExtractor:
+    """
+    Map-reduce skill extraction: every README is split into chunks that fit
+    SKILL_CHUNK_TOKENS, each chunk is sent to the LLM concurrently (at most
+    SKILL_EXTRACTION_CONCURRENCY at a time), and the per-chunk lists are merged
+    locally. Latency follows the slowest chunk instead of the total input size.
+
+    Each README's skill list is cached by the hash of its normalized text, so
+    forks, templates and unchanged READMEs are never sent to the LLM twice.
+
+    READMEs are preprocessed (readme_preprocessing) before they are hashed and
+    prompted, so badges, images and license text cost no tokens.
+
+    The local taxonomy (skill_taxonomy) finds the well-known skills first: in
+    "hybrid" mode the LLM is only asked for what it missed, in "local" mode it
+    is not called at all. Every skill is normalized to its canonical name.
+    """
+
+    def __init__(self):
+        self.chunk_tokens = settings.SKILL_CHUNK_TOKENS
+        self.concurrency = max(1, settings.SKILL_EXTRACTION_CONCURRENCY)
+        self.cache_ttl = settings.SKILL_CACHE_TTL
+        self.mode = settings.SKILL_EXTRACTION_MODE if settings.SKILL_EXTRACTION_MODE in EXTRACTION_MODES else "hybrid"
+        self.counts = Counter()
+
+    def plan(self, readmes: Dict[str, str], context: str = "") -> List[Tuple[str, int, int, str]]:
+        """(key, part, parts, text) for every chunk, sized to leave room for the prompt"""
+        budget = max(200, self.chunk_tokens - PROMPT_OVERHEAD_TOKENS - estimate_tokens(context))
+        plan = []
+        for key, content in readmes.items():
+            chunks = chunk_text(content, budget)
+            plan.extend((key, i + 1, len(chunks), chunk) for i, chunk in enumerate(chunks))
+        return plan
+
+    @staticmethod
+    def messages_for(
+        repo: str, part: int, parts: int, text: str, context: str = "", known: Optional[List[str]] = None
+    ) -> List[dict]:
+        label = f"repository {repo}" + (f", part {part} of {parts}" if parts > 1 else "")
+        if known:
+            # Already found locally: the model only has to name what is missing
+            context = f"{context}\n\nAlready detected (do not repeat these): {', '.join(known)}. List only other skills; [] if there are none.".strip()
+        return [
+            {"role": "system", "content": "You are an assistant that extracts only technical skills from README files."},
+            {
+                "role": "user",
+                "content": f"""
+                Extract the technical skills (languages, frameworks, tools, libraries) from the README content below.
+                Return them as a **JSON array of strings**, nothing else.
+
+                Example:
+                ["Python", "FastAPI", "Git"]
+
+                {context}
+
+                README content ({label}):
+                {text}
+                """
+            },
+        ]
+
+    def extract_local(self, readmes: Dict[str, str]) -> ExtractionResult:
+        """Fast mode: skills from the taxonomy only, no network"""
+        repo_skills = {repo: local_skill_extractor.extract(text) for repo, text in readmes.items() if text and text.strip()}
+        raw = "\n\n".join(f"--- {repo} (local) ---\n{json.dumps(skills)}" for repo, skills in repo_skills.items())
+        self.counts["readmes"] += len(repo_skills)
+        self.counts["local_only"] += len(repo_skills)
+        return ExtractionResult(reduce_skills(list(repo_skills.values())), repo_skills, raw, 0, 0)
+
+    async def extract(self, readmes: Dict[str, str], context: str = "", mode: Optional[str] = None) -> ExtractionResult:
+        """
+        Extract skills from {repo: README text}. READMEs already in the cache skip
+        the LLM; identical READMEs in one request are extracted once. Chunks that
+        fail are skipped (and their README not cached); the first LLMError is
+        raised only when every chunk failed and there are no taxonomy hits or
+        cached skill lists to fall back on; otherwise failures are summarised
+        in the result's `warning`.
+
+        `context` (e.g. the measured language summary) is a hint in the prompt
+        only; cache keys leave it out because measured languages are merged in
+        after extraction anyway. `mode` overrides SKILL_EXTRACTION_MODE.
+        """
+        mode = mode if mode in EXTRACTION_MODES else self.mode
+        if mode == "local":
+            return self.extract_local(readmes)
+
+        readmes = {repo: text for repo, text in readmes.items() if text and text.strip()}
+        prepared = readme_preprocessor.preprocess_many(readmes)
+        variant = f"{mode}:{readme_preprocessor.signature}"
+        hashes = {repo: content_hash(text, llm_client.model, variant) for repo, text in prepared.items()}
+        cached = await cache_service.get_ai_skills_analyses(sorted(set(hashes.values())))
+        distinct = set(hashes.values())
+        llm_metrics.record_cache("readme_skills", True, len(distinct & set(cached)))
+        llm_metrics.record_cache("readme_skills", False, len(distinct - set(cached)))
+
+        # One extraction per distinct README that is not cached
+        pending: Dict[str, Tuple[str, str]] = {}
+        for repo, text in prepared.items():
+            if hashes[repo] not in cached and hashes[repo] not in pending:
+                pending[hashes[repo]] = (repo, text)
+        plan = self.plan({key: text for key, (_, text) in pending.items()}, context)
+        tokens_before = sum(estimate_tokens(readmes[repo]) for repo, _ in pending.values())
+        tokens_after = sum(estimate_tokens(text) for _, text in pending.values())
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(key: str, part: int, parts: int, text: str):
+            known = local_skill_extractor.extract(text) if mode == "hybrid" else None
+            async with semaphore:
+                result = await llm_client.chat(
+                    self.messages_for(pending[key][0], part, parts, text, context, known), temperature=0.3
+                )
+            return result.content
+
+        outputs = await asyncio.gather(*(run(*chunk) for chunk in plan), return_exceptions=True)
+
+        # Taxonomy hits come from the full README: trimmed code blocks still name their imports
+        per_hash: Dict[str, List[List[str]]] = {
+            key: [local_skill_extractor.extract(readmes[repo])] if mode == "hybrid" else [] for key, (repo, _) in pending.items()
+        }
+        failed_hashes = set()
+        raw_parts, errors = [], []
+        for (key, part, parts, _), output in zip(plan, outputs):
+            header = f"--- {pending[key][0]}" + (f" ({part}/{parts})" if parts > 1 else "") + " ---"
+            if isinstance(output, BaseException):
+                if not isinstance(output, LLMError):
+                    raise output
+                errors.append(output)
+                failed_hashes.add(key)
+                raw_parts.append(f"{header}\n⚠️ {output.message}")
+                continue
+            per_hash[key].append(local_skill_extractor.normalize(llm_metrics.parse("skills", parse_skill_list, output)))
+            raw_parts.append(f"{header}\n{output}")
+
+        fallback = any(any(lists) for lists in per_hash.values()) or any(cached.values())
+        if plan and len(errors) == len(plan) and not fallback:
+            # Nothing came back from the LLM, and neither the taxonomy nor the cache has skills to fall back on
+            raise errors[0]
+        warning = f"{len(errors)} of {len(plan)} README chunks failed: {errors[0].message}" if errors else ""
+
+        extracted = {key: reduce_skills(lists) for key, lists in per_hash.items()}
+        await cache_service.set_ai_skills_analyses(
+            {key: skills for key, skills in extracted.items() if key not in failed_hashes}, self.cache_ttl
+        )
+
+        repo_skills = {}
+        hits = 0
+        for repo in readmes:
+            key = hashes[repo]
+            if key in cached:
+                hits += 1
+                repo_skills[repo] = list(cached[key])
+                raw_parts.append(f"--- {repo} (cached) ---\n{json.dumps(repo_skills[repo])}")
+            else:
+                repo_skills[repo] = extracted[key]
+        misses = len(readmes) - hits
+        self.counts["readmes"] += len(readmes)
+        self.counts["cache_hits"] += hits
+        self.counts["cache_misses"] += misses
+        self.counts["chunks"] += len(plan)
+        self.counts["failed_chunks"] += len(errors)
+        self.counts["tokens_before_preprocessing"] += tokens_before
+        self.counts["tokens_after_preprocessing"] += tokens_after
+
+        if tokens_before:
+            raw_parts.insert(0, f"README preprocessing: ~{tokens_before} -> ~{tokens_after} tokens "
+                                f"({(1 - tokens_after / tokens_before) * 100:.0f}% fewer)")
+        skills = reduce_skills(list(repo_skills.values()))
+        return ExtractionResult(
+            skills, repo_skills, "\n\n".join(raw_parts), len(plan), len(errors), hits, misses, tokens_before, tokens_after,
+            warning,
+        )
+
+    def stats(self) -> dict:
+        readmes = self.counts["readmes"]
+        return {**self.counts, "cache_hit_ratio": round(self.counts["cache_hits"] / readmes, 3) if readmes else 0.0}
+
+
+# Global instance
+skill_extractor = SkillExtractor()
@@ -0,0 +1,108 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Any, List, Optional
+from config import settings
+from cache_service import cache_service
+from llm_client import llm_client
+from llm_metrics import llm_metrics
+from models import SkillCategory
+from skill_extraction import normalize_skill
+from skill_taxonomy import local_skill_extractor
+from stream_parsing import parse_json_items
+
+# Bump when the suggestion or job prompts change so older answers are not served
+SKILL_SET_CACHE_VERSION = "skill-set-v1"
+
+
+def parse_skills(text: str) -> List[str]:
+    """Skills of a posted skill list: JSON or Python list text, or comma/line separated"""
+    items = parse_json_items(text or "")
+    if items is None:
+        items = re.split(r"[,\n]", text or "")
+    return [str(item).strip(" \"'-*") for item in items if str(item).strip(" \"'-*")]
+
+
+class SkillSetCache:
+    """
+    Job matches and skill suggestions cached per skill *set*: "React, Python"
+    and "python, react.js" are the same profile. The key is the sorted set of
+    canonical names (taxonomy aliases resolved, other skills case- and
+    punctuation-normalized) plus the model, so any equivalent skill list seen
+    within SKILL_SET_CACHE_TTL is answered without an AI call.
+
+    With SKILL_SET_CACHE_BUCKETS the key keeps only the taxonomy skills,
+    grouped by category: profiles that differ only in skills outside the
+    taxonomy share their answers, trading precision for hit rate.
+    """
+
+    def __init__(self):
+        self.ttl = settings.SKILL_SET_CACHE_TTL
+        self.buckets = settings.SKILL_SET_CACHE_BUCKETS
+        self.counts = Counter()
+
+    def canonical_set(self, skills: str) -> List[str]:
+        """Sorted, de-duplicated canonical skill names of a posted skill list"""
+        canonical = set()
+        for skill in parse_skills(skills):
+            name = local_skill_extractor.canonical(skill)
+            if name is None and not self.buckets:
+                name = normalize_skill(skill)
+            if name:
+                canonical.add(name)
+        return sorted(canonical, key=str.lower)
+
+    def key_for(self, skills: str) -> Optional[str]:
+        """Cache key of a skill list (None when it names no skills)"""
+        canonical = self.canonical_set(skills)
+        if not canonical:
+            return None
+        if self.buckets:
+            grouped = local_skill_extractor.categorize(canonical)
+            parts = [f"{category.value}={','.join(grouped[category])}" for category in SkillCategory if category in grouped]
+        else:
+            parts = canonical
+        data = "|".join([SKILL_SET_CACHE_VERSION, llm_client.model] + parts)
+        return hashlib.sha256(data.lower().encode("utf-8")).hexdigest()[:32]
+
+    async def _get(self, kind: str, skills: str, get) -> Optional[Any]:
+        key = self.key_for(skills)
+        if key is None:
+            return None
+        value = await get(key)
+        self.counts[f"{kind}_hits" if value else f"{kind}_misses"] += 1
+        llm_metrics.record_cache(f"skill_set_{kind}", bool(value))
+        return value
+
+    async def _set(self, skills: str, value: Any, set_) -> bool:
+        key = self.key_for(skills)
+        if key is None or not value:
+            return False
+        return await set_(key, value, self.ttl)
+
+    async def get_suggestions(self, skills: str) -> Optional[dict]:
+        """{"suggestions": raw answer, "resources": [...]} of an equivalent skill set"""
+        return await self._get("suggestions", skills, cache_service.get_ai_skill_suggestions)
+
+    async def set_suggestions(self, skills: str, suggestions: dict) -> bool:
+        if not suggestions.get("resources"):
+            return False
+        return await self._set(skills, suggestions, cache_service.set_ai_skill_suggestions)
+
+    async def get_jobs(self, skills: str) -> Optional[list]:
+        """Prepared job cards of an equivalent skill set"""
+        return await self._get("jobs", skills, cache_service.get_ai_job_matches)
+
+    async def set_jobs(self, skills: str, jobs: list) -> bool:
+        return await self._set(skills, jobs, cache_service.set_ai_job_matches)
+
+    def stats(self) -> dict:
+        stats = {"buckets": self.buckets, **self.counts}
+        for kind in ("suggestions", "jobs"):
+            lookups = self.counts[f"{kind}_hits"] + self.counts[f"{kind}_misses"]
+            stats[f"{kind}_hit_ratio"] = round(self.counts[f"{kind}_hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# Global instance
+skill_set_cache = SkillSetCache()
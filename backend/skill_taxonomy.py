@@ -0,0 +1,326 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import SkillCategory
+
+# Canonical skill -> aliases (matched case-insensitively, whole words only).
+# The canonical name itself matches too; list only the other spellings.
+# Words that are ordinary English ("go", "express", "spring") only match
+# through unambiguous spellings such as "golang" or "express.js".
+TAXONOMY: Dict[SkillCategory, Dict[str, Tuple[str, ...]]] = {
+    SkillCategory.PROGRAMMING_LANGUAGES: {
+        "Python": ("python3", "py3"),
+        "JavaScript": ("ecmascript", "es6", "vanilla js"),
+        "TypeScript": (),
+        "Java": ("java 8", "java 11", "java 17", "java 21", "jdk", "openjdk"),
+        "Kotlin": (),
+        "C++": ("cpp", "c plus plus"),
+        "C#": ("csharp", "c sharp"),
+        "C": ("ansi c", "c99", "c11", "c17", "c language"),
+        "Go": ("golang", "go.mod", "go modules"),
+        "Rust": ("rustlang", "cargo.toml"),
+        "Ruby": (),
+        "PHP": ("php8",),
+        "Swift": ("swiftui",),
+        "Objective-C": ("objc", "objective c"),
+        "Scala": (),
+        "Dart": (),
+        "Elixir": (),
+        "Erlang": (),
+        "Haskell": (),
+        "Clojure": (),
+        "Lua": (),
+        "Perl": (),
+        "R": ("r language", "rstats", "tidyverse", "ggplot2"),
+        "Julia": ("julialang",),
+        "MATLAB": (),
+        "Solidity": (),
+        "Zig": ("ziglang",),
+        "Shell": ("bash", "shell script", "shell scripting", "zsh", "powershell"),
+        "SQL": ("t-sql", "pl/sql", "plpgsql"),
+        "HTML": ("html5",),
+        "CSS": ("css3", "scss", "sass", "less css"),
+    },
+    SkillCategory.FRAMEWORKS: {
+        "Node.js": ("nodejs", "node js"),
+        "Deno": (),
+        "React": ("react.js", "reactjs", "react js"),
+        "React Native": ("react-native",),
+        "Next.js": ("nextjs", "next js"),
+        "Vue.js": ("vue", "vuejs", "vue js", "vue 3"),
+        "Nuxt": ("nuxt.js", "nuxtjs"),
+        "Angular": ("angularjs", "angular.js"),
+        "Svelte": ("sveltekit",),
+        "Redux": ("redux toolkit",),
+        "jQuery": (),
+        "Express.js": ("expressjs", "express js"),
+        "NestJS": ("nest.js",),
+        "FastAPI": ("fast api",),
+        "Django": ("django rest framework", "drf"),
+        "Flask": (),
+        "Spring Boot": ("spring-boot", "springboot", "spring framework"),
+        "Ruby on Rails": ("rails", "ror"),
+        "Laravel": (),
+        "Symfony": (),
+        ".NET": ("dotnet", ".net core", "asp.net", "asp.net core"),
+        "Flutter": (),
+        "Electron": ("electron.js", "electronjs"),
+        "Tailwind CSS": ("tailwind", "tailwindcss"),
+        "Bootstrap": (),
+        "Three.js": ("threejs",),
+        "D3.js": ("d3js",),
+        "Gin": ("gin-gonic",),
+        "Actix": ("actix-web",),
+        "Phoenix": ("phoenix framework",),
+        "TensorFlow": ("tensorflow.js", "tf.keras"),
+        "PyTorch": ("torch",),
+        "Keras": (),
+        "scikit-learn": ("sklearn", "scikit learn"),
+        "Pandas": (),
+        "NumPy": (),
+        "SciPy": (),
+        "Matplotlib": (),
+        "OpenCV": ("cv2",),
+        "Hugging Face Transformers": ("huggingface", "hugging face", "transformers library"),
+        "LangChain": (),
+        "LlamaIndex": ("llama_index", "llama-index"),
+        "Streamlit": (),
+        "Gradio": (),
+        "SQLAlchemy": (),
+        "Prisma": (),
+        "Pydantic": (),
+        "Celery": (),
+        "Jinja2": ("jinja",),
+        "Jest": (),
+        "Pytest": ("py.test",),
+        "Mocha": (),
+        "Cypress": (),
+        "Playwright": (),
+        "Selenium": (),
+        "Puppeteer": (),
+        "Beautiful Soup": ("beautifulsoup", "beautifulsoup4", "bs4"),
+        "Scrapy": (),
+    },
+    SkillCategory.DATABASES: {
+        "PostgreSQL": ("postgres", "postgresql", "psql", "pgsql"),
+        "MySQL": (),
+        "MariaDB": (),
+        "SQLite": ("sqlite3",),
+        "MongoDB": ("mongo", "mongoose"),
+        "Redis": (),
+        "Elasticsearch": ("elastic search", "opensearch"),
+        "Cassandra": ("apache cassandra",),
+        "DynamoDB": ("dynamo db",),
+        "Neo4j": (),
+        "ClickHouse": (),
+        "CockroachDB": (),
+        "InfluxDB": (),
+        "SQL Server": ("mssql", "microsoft sql server"),
+        "Oracle Database": ("oracle db", "oracledb"),
+        "Memcached": (),
+        "Firestore": ("cloud firestore",),
+        "Pinecone": (),
+        "Qdrant": (),
+        "Milvus": (),
+        "ChromaDB": ("chroma db",),
+    },
+    SkillCategory.TOOLS: {
+        "Git": (),
+        "GitHub Actions": ("github workflows",),
+        "GitLab CI": ("gitlab-ci", "gitlab ci/cd"),
+        "Docker": ("dockerfile", "dockerized", "containerized"),
+        "Docker Compose": ("docker-compose", "compose.yaml"),
+        "Kubernetes": ("k8s", "kubectl"),
+        "Helm": ("helm chart", "helm charts"),
+        "Terraform": (),
+        "Ansible": (),
+        "Jenkins": (),
+        "Nginx": (),
+        "Apache Kafka": ("kafka",),
+        "RabbitMQ": (),
+        "GraphQL": ("apollo graphql", "apollo server"),
+        "gRPC": ("protobuf", "protocol buffers"),
+        "Swagger": ("openapi",),
+        "Postman": (),
+        "Webpack": (),
+        "Vite": ("vitejs",),
+        "Babel": (),
+        "ESLint": (),
+        "Prettier": (),
+        "npm": (),
+        "Yarn": (),
+        "pnpm": (),
+        "Poetry": (),
+        "Conda": ("anaconda", "miniconda"),
+        "CMake": (),
+        "Gradle": (),
+        "Maven": (),
+        "Bazel": (),
+        "Linux": ("ubuntu", "debian"),
+        "Jupyter": ("jupyter notebook", "jupyterlab", "ipynb"),
+        "Prometheus": (),
+        "Grafana": (),
+        "Sentry": (),
+        "Apache Airflow": ("airflow",),
+        "Apache Spark": ("pyspark", "spark sql"),
+        "Hadoop": (),
+        "Storybook": (),
+        "Vagrant": (),
+    },
+    SkillCategory.CLOUD_SERVICES: {
+        "AWS": ("amazon web services",),
+        "AWS Lambda": ("lambda functions",),
+        "Amazon S3": ("aws s3", "s3 bucket", "s3 buckets"),
+        "Amazon EC2": ("ec2",),
+        "Google Cloud": ("gcp", "google cloud platform"),
+        "Azure": ("microsoft azure",),
+        "Firebase": (),
+        "Supabase": (),
+        "Heroku": (),
+        "Vercel": (),
+        "Netlify": (),
+        "Cloudflare": ("cloudflare workers",),
+        "DigitalOcean": ("digital ocean",),
+        "OpenAI API": ("openai", "gpt-4", "gpt-3.5", "chatgpt api"),
+        "OpenRouter": (),
+        "Stripe": (),
+        "Twilio": (),
+    },
+    SkillCategory.OTHER: {
+        "REST APIs": ("rest api", "restful", "restful api", "rest apis"),
+        "WebSockets": ("websocket", "socket.io"),
+        "OAuth": ("oauth2", "oauth 2.0"),
+        "JWT": ("json web token", "json web tokens"),
+        "Microservices": ("microservice", "micro-services"),
+        "CI/CD": ("continuous integration", "continuous deployment"),
+        "Machine Learning": ("ml model", "ml models"),
+        "Deep Learning": ("neural network", "neural networks"),
+        "Natural Language Processing": ("nlp",),
+        "Computer Vision": (),
+        "Web Scraping": ("web scraper", "scraping"),
+        "Unit Testing": ("unit tests", "tdd"),
+        "Blockchain": ("web3", "smart contract", "smart contracts"),
+    },
+}
+
+# Aliases that only count in exactly this spelling (too common otherwise)
+CASE_SENSITIVE_ALIASES: Dict[str, str] = {
+    "JS": "JavaScript",
+    "TS": "TypeScript",
+    "Vue": "Vue.js",
+}
+# Canonical names that are also everyday words: only their capitalized spelling counts
+CASE_SENSITIVE_NAMES = frozenset({
+    "Swift", "Dart", "Rust", "Ruby", "Gin", "Helm", "Babel", "Poetry", "Mocha", "Jest",
+    "Prettier", "Electron", "Phoenix", "Bootstrap", "Yarn", "Celery", "Vagrant", "Sentry",
+    "Stripe", "Flask", "Maven", "Prisma", "Scala",
+})
+# Canonical names too ambiguous to match at all in free text ("Plan C", "Go to settings");
+# they are still found through their aliases
+UNMATCHED_NAMES = frozenset({"C", "R", "Go"})
+
+# A skill starts and ends at a word boundary; "+" and "#" continue a word so
+# "C" does not match inside "C++" or "C#"
+_BEFORE = r"(?<![\w+#.-])"
+_AFTER = r"(?![\w+#]|-\w)"
+
+
+def _scan_pattern(words: Iterable[str], flags: int = 0) -> re.Pattern:
+    """Whole-word matcher for `words`; the first-character lookahead lets the engine skip most positions cheaply"""
+    words = list(words)
+    first = re.escape("".join(sorted({word[0] for word in words})))
+    return re.compile(f"(?=[{first}]){_BEFORE}({_trie_pattern(words)}){_AFTER}", flags)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation of `words` shaped like a trie, e.g. node|nodejs -> node(?:js)?.
+    Shared prefixes are tried once, so the regex engine scans each position in
+    time bounded by the longest alias instead of the number of aliases.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if ends else body
+
+    return build(trie)
+
+
+class LocalSkillExtractor:
+    """
+    Dictionary-based skill extraction, no network involved.
+
+    All aliases of the taxonomy are compiled into one trie-shaped regex, so a
+    README is scanned in a single pass of the C regex engine; every hit is
+    normalized to its canonical name ("postgres" -> "PostgreSQL"). Used on its
+    own for the fast mode, and to seed the LLM prompt with what is already known.
+    """
+
+    def __init__(self, taxonomy: Dict[SkillCategory, Dict[str, Tuple[str, ...]]] = TAXONOMY):
+        self.categories: Dict[str, SkillCategory] = {}
+        # Every known spelling (lowercase) -> canonical name, for normalizing any skill list
+        self.lookup: Dict[str, str] = {}
+        # What the scan matches: case-insensitive spellings, and exact ones
+        self.aliases: Dict[str, str] = {}
+        self.exact_aliases: Dict[str, str] = dict(CASE_SENSITIVE_ALIASES)
+        for category, skills in taxonomy.items():
+            for canonical, aliases in skills.items():
+                self.categories[canonical] = category
+                self.lookup[canonical.lower()] = canonical
+                if canonical in CASE_SENSITIVE_NAMES:
+                    self.exact_aliases[canonical] = canonical
+                elif canonical not in UNMATCHED_NAMES:
+                    self.aliases[canonical.lower()] = canonical
+                for alias in aliases:
+                    self.lookup[alias.lower()] = canonical
+                    self.aliases[alias.lower()] = canonical
+        # Case-insensitive aliases are matched against lowercased text: cheaper than re.IGNORECASE
+        self.pattern = _scan_pattern(self.aliases)
+        self.exact_pattern = _scan_pattern(self.exact_aliases)
+
+    def scan(self, text: str) -> Counter:
+        """Canonical skill -> number of mentions, in order of first mention"""
+        # Both passes merged by position; str.lower() keeps offsets for all but a few rare characters
+        hits = [(match.start(), self.aliases[match.group(1)]) for match in self.pattern.finditer(text.lower())]
+        hits += [(match.start(), self.exact_aliases[match.group(1)]) for match in self.exact_pattern.finditer(text)]
+        hits.sort(key=lambda hit: hit[0])
+        return Counter(skill for _, skill in hits)
+
+    def extract(self, text: str) -> List[str]:
+        """Skills mentioned in `text`, most mentioned first"""
+        counts = self.scan(text)
+        order = {skill: i for i, skill in enumerate(counts)}
+        return sorted(counts, key=lambda skill: (-counts[skill], order[skill]))
+
+    def canonical(self, skill: str) -> Optional[str]:
+        """Canonical name of a skill spelled any known way (None when not in the taxonomy)"""
+        return self.lookup.get(skill.strip().lower()) or CASE_SENSITIVE_ALIASES.get(skill.strip())
+
+    def normalize(self, skills: Iterable[str]) -> List[str]:
+        """Replace known aliases by their canonical name; unknown skills are kept as written"""
+        return [self.canonical(skill) or skill for skill in skills]
+
+    def category(self, skill: str) -> SkillCategory:
+        canonical = self.canonical(skill)
+        return self.categories.get(canonical, SkillCategory.OTHER)
+
+    def categorize(self, skills: Iterable[str]) -> Dict[SkillCategory, List[str]]:
+        """Skills grouped by SkillCategory, keeping their order"""
+        grouped: Dict[SkillCategory, List[str]] = {}
+        for skill in skills:
+            grouped.setdefault(self.category(skill), []).append(skill)
+        return grouped
+
+
+# Global instance
+local_skill_extractor = LocalSkillExtractor()
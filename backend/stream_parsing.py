@@ -0,0 +1,223 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# Same pairs extract_resources_from_gpt reads from a finished answer
+SUGGESTION_PATTERN = re.compile(r"Skill\s*:\s*(.*?)\s*Search\s*:\s*(.*?)\s*(?=\n|$)", re.DOTALL | re.IGNORECASE)
+
+
+# What the parser looks for next, depending on where it is
+STRING_SPECIAL = re.compile(r'["\\]')
+VALUE_START = re.compile(r"[\[{]")
+NON_SPACE = re.compile(r"\S")
+BARE_END = re.compile(r"[,\]\n]")
+STRUCTURAL = re.compile(r'[\[\]{}":,]')
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """`{"a": 1,}` -> `{"a": 1}`: drop commas right before a closing bracket, outside strings"""
+    out = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "]}":
+            while out and out[-1] in " \t\r\n":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(char)
+    return "".join(out)
+
+
+def loads_tolerant(text: str) -> Any:
+    """json.loads that also accepts trailing commas"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(_strip_trailing_commas(text))
+
+
+class JsonItemStream:
+    """
+    Incremental, tolerant reader for JSON arrays in LLM output.
+
+    Feed the completion as it arrives; every element of the item array is
+    returned as soon as it is complete: objects once their closing brace
+    arrives, strings once they close, bare words and numbers at the next comma.
+    The item array is the first array in the answer, or with `key` the first
+    array under that key (`JsonItemStream("jobs")` for `{"jobs": [...]}`).
+
+    The text is scanned once, however it is chunked, jumping from one
+    structural character to the next with small regexes instead of stepping
+    through it in Python; complete elements go to json.loads. Code
+    fences and chatter before or after the JSON are skipped, trailing commas
+    are accepted and elements that still do not parse are dropped.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.buffer = ""
+        self.position = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None  # latest string closed inside an object: the key when ':' follows
+        self.pending_key = None
+        self.item_depth = None
+        self.item_start = None
+        self.bare_start = None
+        self.found = False
+        self.done = False
+
+    def _item(self, text: str, items: List[Any]):
+        try:
+            items.append(loads_tolerant(text))
+        except ValueError:
+            pass
+
+    def _bare(self, end: int, items: List[Any]):
+        """A bare word or number element (`[Python, 3.11]`) ending at `end`"""
+        text = self.buffer[self.bare_start:end].strip().strip("'")
+        self.bare_start = None
+        if text:
+            try:
+                items.append(json.loads(text))
+            except ValueError:
+                items.append(text)
+
+    def feed(self, text: str) -> List[Any]:
+        self.buffer += text
+        items = []
+        buffer = self.buffer
+        index, end = self.position, len(buffer)
+        while index < end and not self.done:
+            # Jump straight to the next character that matters where we are
+            if self.in_string:
+                match = STRING_SPECIAL.search(buffer, index)
+                if match is None:
+                    index = end
+                    break
+                index = match.start()
+                if buffer[index] == "\\":
+                    if index + 1 == end:
+                        break  # the escaped character is in the next delta
+                    index += 2
+                    continue
+                self.in_string = False
+                at_items = self.item_depth is not None and len(self.stack) == self.item_depth
+                if at_items and self.item_start is None:
+                    self._item(buffer[self.string_start:index + 1], items)
+                elif self.stack and self.stack[-1] == "{":
+                    self.last_string = buffer[self.string_start + 1:index]
+                index += 1
+                continue
+
+            at_items = self.item_depth is not None and len(self.stack) == self.item_depth
+            if not self.stack:
+                pattern = VALUE_START  # outside any JSON value: fences and chatter
+            elif self.bare_start is not None:
+                pattern = BARE_END
+            elif at_items and self.item_start is None:
+                pattern = NON_SPACE
+            else:
+                pattern = STRUCTURAL
+            match = pattern.search(buffer, index)
+            if match is None:
+                index = end
+                break
+            index = match.start()
+            char = buffer[index]
+            if self.bare_start is not None:
+                self._bare(index, items)
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = index
+            elif char in "[{":
+                if char == "[" and self.item_depth is None and (
+                    self.key is None or self.pending_key == self.key or not self.stack
+                ):
+                    self.item_depth = len(self.stack) + 1
+                    self.found = True
+                elif at_items:
+                    self.item_start = index
+                self.stack.append(char)
+                self.pending_key = None
+            elif char in "]}":
+                if self.stack:
+                    self.stack.pop()
+                if self.item_start is not None and self.item_depth is not None and len(self.stack) == self.item_depth:
+                    self._item(buffer[self.item_start:index + 1], items)
+                    self.item_start = None
+                elif at_items and char == "]":
+                    # The item array is complete: whatever follows is chatter
+                    self.done = True
+            elif char == ":" and self.stack[-1] == "{":
+                self.pending_key = self.last_string
+            elif char == ",":
+                self.pending_key = None
+            elif at_items and char != "\n":
+                self.bare_start = index
+            index += 1
+        self.position = index
+        return items
+
+    def close(self) -> List[Any]:
+        """Elements completed by the end of the answer (a final bare element)"""
+        items = []
+        if self.bare_start is not None and not self.done:
+            self._bare(len(self.buffer), items)
+        return items
+
+
+def parse_json_items(content: str, key: Optional[str] = None) -> Optional[List[Any]]:
+    """Elements of the item array of a finished completion (None when it has no such array)"""
+    # Clean JSON, the common case, needs no scan
+    stripped = content.strip()
+    if stripped[:1] in ("[", "{"):
+        try:
+            value = json.loads(stripped)
+        except ValueError:
+            value = None
+        if isinstance(value, list):
+            return value
+        if key is not None and isinstance(value, dict) and isinstance(value.get(key), list):
+            return value[key]
+    stream = JsonItemStream(key)
+    items = stream.feed(content) + stream.close()
+    return items if stream.found else None
+
+
+class SuggestionStream:
+    """
+    Picks complete `Skill: ... / Search: ...` pairs out of a streaming answer.
+    A pair counts as complete once the line after its Search term has started;
+    `close()` returns whatever completed with the final line.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+
+    def _pairs(self, text: str) -> List[Tuple[str, str]]:
+        pairs = [(skill.strip(), search.strip()) for skill, search in SUGGESTION_PATTERN.findall(text)]
+        new = pairs[self.emitted:]
+        self.emitted = len(pairs)
+        return new
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self.buffer += text
+        complete = self.buffer[:self.buffer.rfind("\n") + 1]
+        return self._pairs(complete) if complete else []
+
+    def close(self) -> List[Tuple[str, str]]:
+        return self._pairs(self.buffer)